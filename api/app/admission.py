@@ -0,0 +1,154 @@
+# api/app/admission.py
+"""Admission control: per route-class concurrency limits, bounded wait queues and load shedding.
+
+Requests are classed by path prefix before routing, so a refused request costs no auth or DB work.
+Each class runs at most `concurrency` requests; up to `queue` more wait FIFO for a slot, for at most
+ADMISSION_QUEUE_TIMEOUT_MS. A full queue or an expired wait gets 503 + Retry-After.
+
+Shedding: pressure = max(loop lag / ADMISSION_LAG_MS, recent pool wait / ADMISSION_POOL_WAIT_MS), so
+1.0 means a signal is at its threshold. A class is refused outright while pressure >= its shed_at;
+compute goes first, then public and billing reads. Paid reads and webhooks are never shed, only limited.
+/healthz, /metrics, the live stream and CORS preflights bypass admission.
+"""
+from collections import deque
+from typing import Optional
+import asyncio, logging, time
+
+from fastapi.responses import JSONResponse
+
+from .config import settings
+from .db import recent_pool_wait
+from .metrics import Histogram, last_loop_lag, registry
+
+log = logging.getLogger(__name__)
+
+# name -> pressure at which it is shed (None = never)
+SHED_AT = {"webhook": None, "paid": None, "account": 3.0, "billing": 2.0, "public": 1.5, "compute": 1.0}
+
+# First matching prefix wins; anything else is "public"
+ROUTES = (
+    ("/webhooks/", "webhook"),
+    ("/v1/billing/", "billing"),
+    ("/v1/parlay/", "compute"),
+    ("/v1/parlays/evaluate", "compute"),
+    ("/v1/backtest/", "compute"),
+    ("/v1/predictions/today", "paid"),
+    ("/v1/odds/", "paid"),
+    ("/v1/teams/", "paid"),
+    ("/v1/parlays", "paid"),
+    ("/v1/auth/", "account"),
+    ("/v1/api-keys", "account"),
+)
+EXEMPT = ("/healthz", "/metrics", "/v1/live/stream")
+
+ADMISSION_REJECTED = registry.counter("admission_rejected_total", "Requests refused by admission control", ("class", "reason"))
+
+def parse_limits(spec: str) -> dict[str, tuple[int, int]]:
+    """'compute=8/32,billing=8/32' -> {class: (concurrency, queue)}."""
+    out = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, limits = part.partition("=")
+        concurrency, _, queue = limits.partition("/")
+        out[name.strip()] = (int(concurrency), int(queue or 0))
+    return out
+
+def classify(path: str) -> str:
+    for prefix, name in ROUTES:
+        if path.startswith(prefix):
+            return name
+    return "public"
+
+def pressure() -> float:
+    return max(last_loop_lag() * 1000 / settings.ADMISSION_LAG_MS, recent_pool_wait() * 1000 / settings.ADMISSION_POOL_WAIT_MS)
+
+class Gate:
+    """A counting semaphore with a bounded FIFO of waiters; release() hands the slot straight to the next waiter."""
+    def __init__(self, name: str, concurrency: int, queue: int, shed_at: Optional[float]):
+        self.name, self.concurrency, self.queue, self.shed_at = name, concurrency, queue, shed_at
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0, "shed": 0}
+        self.wait = Histogram()
+        registry.histogram("admission_wait_seconds", "Time queued for an admission slot", ("class",)).attach((name,), self.wait)
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        """None once a slot is held, else why the request was refused."""
+        if self.shed_at is not None and pressure() >= self.shed_at:
+            return "shed"
+        if self.active < self.concurrency and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            self.wait.observe(0.0)
+            return None
+        if len(self.waiters) >= self.queue:
+            return "queue_full"
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters.append(fut)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                # The slot arrived as we gave up: keep it on timeout, hand it on if cancelled
+                if isinstance(e, asyncio.CancelledError):
+                    self.release()
+                    raise
+            else:
+                fut.cancel()
+                self.waiters.remove(fut)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                return "timeout"
+        self.admitted += 1
+        self.wait.observe(time.perf_counter() - started)
+        return None
+
+    def release(self) -> None:
+        while self.waiters:
+            fut = self.waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)  # slot passes to the waiter; active is unchanged
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency, "queue": self.queue, "shed_at": self.shed_at,
+            "active": self.active, "waiting": len(self.waiters), "admitted": self.admitted,
+            "rejected": dict(self.rejected), "wait_seconds": self.wait.snapshot(),
+        }
+
+class Admission:
+    def __init__(self, limits: dict[str, tuple[int, int]]):
+        self.gates = {name: Gate(name, *limits.get(name, (64, 256)), shed_at) for name, shed_at in SHED_AT.items()}
+        registry.gauge("admission_active", "Requests holding an admission slot", lambda: {(n,): g.active for n, g in self.gates.items()}, ("class",))
+        registry.gauge("admission_waiting", "Requests queued for an admission slot", lambda: {(n,): len(g.waiters) for n, g in self.gates.items()}, ("class",))
+        registry.gauge("admission_pressure", "max(loop lag, pool wait) over their shedding thresholds", pressure)
+
+    def stats(self) -> dict:
+        return {"enabled": settings.ADMISSION_ENABLED, "pressure": round(pressure(), 3),
+                "classes": {n: g.stats() for n, g in self.gates.items()}}
+
+admission = Admission(parse_limits(settings.ADMISSION_LIMITS))
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not settings.ADMISSION_ENABLED or scope["method"] == "OPTIONS"
+                or scope["path"].startswith(EXEMPT)):
+            return await self.app(scope, receive, send)
+        gate = admission.gates[classify(scope["path"])]
+        refused = await gate.acquire(settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000)
+        if refused is not None:
+            gate.rejected[refused] += 1
+            ADMISSION_REJECTED.inc((gate.name, refused))
+            retry = settings.ADMISSION_RETRY_AFTER_SECONDS if refused == "shed" else 1
+            response = JSONResponse({"detail": "Server is busy, please retry shortly"}, status_code=503, headers={"Retry-After": str(retry)})
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
@@ -0,0 +1,190 @@
+# api/app/api_keys.py
+"""API keys for programmatic clients, resolved from an in-memory index of active keys.
+
+Keys are `piq_` + 43 url-safe characters; only their SHA-256 is stored (api_keys.token_hash). Each worker
+holds {token_hash: KeyEntry} for every unrevoked key, so resolving a key is a hash and a dict lookup.
+Issue/revoke in this worker update the index at once; other workers reload it when the table's
+(count, max created_at, max revoked_at) moves, checked every API_KEY_INDEX_POLL_SECONDS. A key the index
+hasn't seen yet (issued on another worker since the last poll) falls back to one indexed query. Once the
+index is loaded those fallbacks are capped at API_KEY_MISS_QUERIES_PER_POLL per poll, and a key that missed is
+remembered until the next poll, so random keys can't turn into one query each.
+
+Per-key request counts accumulate in memory and are flushed to api_keys.request_count/last_used_at
+on the same poll and at shutdown.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+import asyncio, hashlib, logging, secrets, uuid
+
+from sqlalchemy import bindparam, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .db import SessionLocal
+from .models import ApiKey
+
+log = logging.getLogger(__name__)
+
+KEY_PREFIX = "piq_"
+
+def new_key() -> str:
+    return KEY_PREFIX + secrets.token_urlsafe(32)
+
+def hash_key(key: str) -> str:
+    # Keys carry 256 random bits, so a fast unsalted digest is enough (unlike passwords)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+@dataclass
+class KeyEntry:
+    id: uuid.UUID
+    user_id: uuid.UUID
+    requests: int = 0                        # since the last flush
+    last_used: Optional[datetime] = None
+
+class ApiKeyIndex:
+    def __init__(self):
+        self.keys: dict[str, KeyEntry] = {}
+        self.by_id: dict[uuid.UUID, str] = {}
+        self.version: Optional[tuple] = None
+        self.loaded_at: Optional[datetime] = None
+        self.unknown: set[str] = set()           # token hashes that missed since the last poll
+        self.miss_queries = 0                    # fallback queries since the last poll
+        self._removed: Optional[set] = None      # keys removed while a refresh is reading
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.reloads = 0
+        self.flushed = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def add(self, token_hash: str, key_id: uuid.UUID, user_id: uuid.UUID) -> KeyEntry:
+        entry = self.keys.get(token_hash)
+        if entry is None:
+            entry = self.keys[token_hash] = KeyEntry(key_id, user_id)
+            self.by_id[key_id] = token_hash
+        return entry
+
+    def remove(self, key_id: uuid.UUID) -> None:
+        if self._removed is not None:
+            self._removed.add(key_id)
+        token_hash = self.by_id.pop(key_id, None)
+        if token_hash is not None:
+            self.keys.pop(token_hash, None)
+
+    def pending(self, key_id: uuid.UUID) -> tuple[int, Optional[datetime]]:
+        """Requests counted here but not yet flushed, and this worker's last use."""
+        entry = self.keys.get(self.by_id.get(key_id, ""))
+        return (entry.requests, entry.last_used) if entry else (0, None)
+
+    async def resolve(self, db: AsyncSession, key: str) -> Optional[KeyEntry]:
+        """The active key's entry, counting the request; None if unknown or revoked."""
+        token_hash = hash_key(key)
+        entry = self.keys.get(token_hash)
+        if entry is None:
+            self.misses += 1
+            if self.ready and (token_hash in self.unknown or self.miss_queries >= settings.API_KEY_MISS_QUERIES_PER_POLL):
+                self.rejected += 1
+                return None
+            self.miss_queries += 1
+            row = (await db.execute(
+                select(ApiKey.id, ApiKey.user_id).where(ApiKey.token_hash == token_hash, ApiKey.revoked_at.is_(None))
+            )).first()
+            if row is None:
+                self.rejected += 1
+                if self.ready:
+                    self.unknown.add(token_hash)
+                return None
+            entry = self.add(token_hash, row.id, row.user_id)
+        else:
+            self.hits += 1
+        entry.requests += 1
+        entry.last_used = datetime.now(tz=timezone.utc)
+        return entry
+
+    async def refresh(self, db: AsyncSession, force: bool = False) -> bool:
+        version = tuple((await db.execute(text("SELECT count(*), max(created_at), max(revoked_at) FROM api_keys"))).one())
+        self.unknown, self.miss_queries = set(), 0
+        if not force and self.ready and version == self.version:
+            return False
+        self._removed = set()
+        try:
+            rows = (await db.execute(select(ApiKey.id, ApiKey.user_id, ApiKey.token_hash).where(ApiKey.revoked_at.is_(None)))).all()
+        finally:
+            removed, self._removed = self._removed, None
+        old = self.keys
+        self.keys, self.by_id = {}, {}
+        for r in rows:
+            entry = self.add(r.token_hash, r.id, r.user_id)
+            prev = old.get(r.token_hash)
+            if prev is not None:
+                entry.requests, entry.last_used = prev.requests, prev.last_used
+        # Revoked here while the query ran: the rows may predate that commit
+        for key_id in removed:
+            self.remove(key_id)
+        # Unflushed counts of keys revoked since the last flush are dropped with them
+        self.version = version
+        self.loaded_at = datetime.now(tz=timezone.utc)
+        self.reloads += 1
+        return True
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Add this worker's counts to api_keys in one executemany; counts return to memory on failure."""
+        batch = [(e, e.requests, e.last_used) for e in self.keys.values() if e.requests]
+        if not batch:
+            return 0
+        for e, _, _ in batch:
+            e.requests = 0
+        t = ApiKey.__table__
+        try:
+            # Core executemany on the connection: a parameter list on an ORM update() is read as a bulk update by primary key
+            await (await db.connection()).execute(
+                update(t).where(t.c.id == bindparam("key_id")).values(
+                    request_count=t.c.request_count + bindparam("n"),
+                    last_used_at=func.greatest(t.c.last_used_at, bindparam("ts")),
+                ),
+                [{"key_id": e.id, "n": n, "ts": ts} for e, n, ts in batch],
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            for e, n, _ in batch:
+                e.requests += n
+            raise
+        self.flushed += sum(n for _, n, _ in batch)
+        return len(batch)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            # Separately, so a failing flush can't keep revocations from other workers out of the index
+            try:
+                async with SessionLocal() as db:
+                    await self.flush(db)
+            except Exception:
+                log.warning("api key counter flush failed", exc_info=True)
+            try:
+                async with SessionLocal() as db:
+                    await self.refresh(db)
+            except Exception:
+                log.warning("api key index refresh failed", exc_info=True)
+            await asyncio.sleep(interval)
+
+    async def close(self) -> None:
+        try:
+            async with SessionLocal() as db:
+                await self.flush(db)
+        except Exception:
+            log.warning("api key counter flush at shutdown failed", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self.keys), "hits": self.hits, "misses": self.misses, "rejected": self.rejected,
+            "miss_queries": self.miss_queries,
+            "reloads": self.reloads, "flushed_requests": self.flushed,
+            "unflushed_requests": sum(e.requests for e in self.keys.values()),
+        }
+
+api_key_index = ApiKeyIndex()
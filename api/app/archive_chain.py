@@ -0,0 +1,229 @@
+# api/app/archive_chain.py
+"""Tamper-evident hash chain over prediction_archive.
+
+    sha256_chain[seq] = sha256(sha256_chain[seq - 1] || canonical(row))      (genesis = 64 zeros)
+
+Rows are chained in chain_seq order. Every CHECKPOINT_EVERY rows the chain hash is also written to
+archive_checkpoints, which splits the archive into segments that can be re-hashed independently:
+the verifier streams rows once and hands each segment to a process pool.
+
+CLI:
+    python -m app.archive_chain publish [--day YYYY-MM-DD] [--republish]
+    python -m app.archive_chain verify [--workers N]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Optional
+import argparse, asyncio, hashlib, json, os, sys, time, uuid
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .db import SessionLocal
+from .models import ArchiveCheckpoint, Game, Prediction, PredictionArchive
+from .slate import served_predictions, today_et
+
+GENESIS = "0" * 64
+# Fields covered by the hash, in canonical order
+CHAIN_FIELDS = (
+    "chain_seq", "id", "published_at", "game_id", "model_version_snapshot", "p_home_win",
+    "expected_total", "pred_home_runs", "pred_away_runs", "confidence", "raw_json",
+)
+
+def _canon(v):
+    if v is None:
+        return None
+    if isinstance(v, (Decimal, float, int)) and not isinstance(v, bool):
+        d = v if isinstance(v, Decimal) else Decimal(repr(v)) if isinstance(v, float) else Decimal(v)
+        return format(d.normalize(), "f")
+    if isinstance(v, datetime):
+        return v.astimezone(timezone.utc).isoformat(timespec="microseconds")
+    if isinstance(v, uuid.UUID):
+        return str(v)
+    return v
+
+def canonical(row: tuple) -> bytes:
+    """Stable bytes for one archive row given as a tuple in CHAIN_FIELDS order."""
+    return json.dumps([_canon(v) for v in row], sort_keys=True, separators=(",", ":"), default=str).encode()
+
+def chain_hash(prev: str, row: tuple) -> str:
+    return hashlib.sha256(prev.encode() + canonical(row)).hexdigest()
+
+# ---------------- publish ----------------
+
+async def publish_day(db: AsyncSession, day: date, republish: bool = False) -> dict:
+    """Append the day's latest prediction per game to the archive in one transaction, extending the chain."""
+    # One publisher at a time: the chain tail must not move underneath us
+    await db.execute(text("SELECT pg_advisory_xact_lock(hashtext('prediction_archive_chain'))"))
+    tail = (await db.execute(
+        select(PredictionArchive.chain_seq, PredictionArchive.sha256_chain)
+        .where(PredictionArchive.chain_seq.is_not(None))
+        .order_by(PredictionArchive.chain_seq.desc()).limit(1)
+    )).first()
+    seq, prev = (tail.chain_seq, tail.sha256_chain) if tail else (0, GENESIS)
+
+    stmt = (
+        select(Prediction)
+        .join(Game, Game.id == Prediction.game_id)
+        .where(Game.game_date == day, *served_predictions())
+        .order_by(Prediction.game_id, Prediction.created_at.desc())
+        .distinct(Prediction.game_id)
+    )
+    if not republish:
+        stmt = stmt.where(~select(PredictionArchive.id).where(PredictionArchive.game_id == Prediction.game_id).exists())
+    preds = (await db.execute(stmt)).scalars().all()
+
+    published_at = datetime.now(tz=timezone.utc)
+    rows, checkpoints = [], []
+    for p in sorted(preds, key=lambda p: str(p.game_id)):
+        seq += 1
+        row = {
+            "chain_seq": seq, "id": uuid.uuid4(), "published_at": published_at, "game_id": p.game_id,
+            "model_version_snapshot": p.model_version, "p_home_win": p.p_home_win, "expected_total": p.expected_total,
+            "pred_home_runs": p.pred_home_runs, "pred_away_runs": p.pred_away_runs, "confidence": p.confidence,
+            "raw_json": p.extras_json,
+        }
+        prev = row["sha256_chain"] = chain_hash(prev, tuple(row[f] for f in CHAIN_FIELDS))
+        rows.append(row)
+        if seq % settings.ARCHIVE_CHECKPOINT_EVERY == 0:
+            checkpoints.append({"seq": seq, "sha256_chain": prev, "created_at": published_at})
+    if rows:
+        await db.execute(insert(PredictionArchive), rows)
+    if checkpoints:
+        await db.execute(insert(ArchiveCheckpoint), checkpoints)
+    await db.commit()
+    return {"day": day.isoformat(), "published": len(rows), "head_seq": seq, "head_hash": prev, "checkpoints": len(checkpoints)}
+
+# ---------------- verify ----------------
+
+@dataclass
+class SegmentResult:
+    start_seq: int
+    end_seq: int
+    ok: bool
+    rows: int
+    first_bad_seq: Optional[int] = None
+    reason: Optional[str] = None
+
+def verify_segment(start_seq: int, start_hash: str, rows: list[tuple], expected_end: Optional[str]) -> SegmentResult:
+    """Re-hash rows (CHAIN_FIELDS + stored sha256_chain) from start_hash. Runs in a worker process."""
+    prev, expect_seq = start_hash, start_seq + 1
+    for r in rows:
+        seq, stored = r[0], r[-1]
+        if seq != expect_seq:
+            return SegmentResult(start_seq, seq, False, len(rows), expect_seq, "gap in chain_seq")
+        prev = chain_hash(prev, r[:-1])
+        if prev != stored:
+            return SegmentResult(start_seq, seq, False, len(rows), seq, "hash mismatch")
+        expect_seq += 1
+    end = expect_seq - 1
+    if expected_end is not None and prev != expected_end:
+        return SegmentResult(start_seq, end, False, len(rows), end, "checkpoint mismatch")
+    return SegmentResult(start_seq, end, True, len(rows))
+
+@dataclass
+class VerifyReport:
+    ok: bool = True
+    rows: int = 0
+    segments: int = 0
+    head_seq: int = 0
+    head_hash: str = GENESIS
+    failures: list[SegmentResult] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+async def verify_chain(workers: int, from_seq: int = 0, to_seq: Optional[int] = None) -> VerifyReport:
+    """Stream the archive in chain order once; each checkpoint-delimited segment is re-hashed in parallel."""
+    started = time.perf_counter()
+    report = VerifyReport()
+    loop = asyncio.get_running_loop()
+    async with SessionLocal() as db:
+        cps = dict((await db.execute(select(ArchiveCheckpoint.seq, ArchiveCheckpoint.sha256_chain).order_by(ArchiveCheckpoint.seq))).all())
+        if from_seq and from_seq not in cps:
+            raise ValueError(f"from_seq {from_seq} is not a checkpoint")
+        start_seq, start_hash = from_seq, cps.get(from_seq, GENESIS)
+        stmt = select(*(getattr(PredictionArchive, f) for f in CHAIN_FIELDS), PredictionArchive.sha256_chain) \
+            .where(PredictionArchive.chain_seq > from_seq).order_by(PredictionArchive.chain_seq)
+        if to_seq is not None:
+            stmt = stmt.where(PredictionArchive.chain_seq <= to_seq)
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = []
+            segment: list[tuple] = []
+            result = await db.stream(stmt.execution_options(yield_per=5000))
+            async for rows in result.partitions():
+                for r in rows:
+                    segment.append(tuple(r))
+                    if r.chain_seq in cps:
+                        futures.append(loop.run_in_executor(pool, verify_segment, start_seq, start_hash, segment, cps[r.chain_seq]))
+                        start_seq, start_hash, segment = r.chain_seq, cps[r.chain_seq], []
+                    report.head_seq, report.head_hash = r.chain_seq, r.sha256_chain
+            if segment:
+                futures.append(loop.run_in_executor(pool, verify_segment, start_seq, start_hash, segment, None))
+            for seg in await asyncio.gather(*futures):
+                report.segments += 1
+                report.rows += seg.rows
+                if not seg.ok:
+                    report.ok = False
+                    report.failures.append(seg)
+    report.failures.sort(key=lambda s: s.start_seq)
+    report.elapsed_s = round(time.perf_counter() - started, 3)
+    return report
+
+async def verify_range(db: AsyncSession, end_seq: Optional[int]) -> SegmentResult:
+    """Verify the single segment ending at checkpoint `end_seq` (None = the tail after the last checkpoint) in a thread."""
+    cps = dict((await db.execute(select(ArchiveCheckpoint.seq, ArchiveCheckpoint.sha256_chain).order_by(ArchiveCheckpoint.seq))).all())
+    if end_seq is not None and end_seq not in cps:
+        raise ValueError(f"{end_seq} is not a checkpoint")
+    earlier = [c for c in cps if end_seq is None or c < end_seq]
+    start_seq = max(earlier, default=0)
+    stmt = select(*(getattr(PredictionArchive, f) for f in CHAIN_FIELDS), PredictionArchive.sha256_chain) \
+        .where(PredictionArchive.chain_seq > start_seq).order_by(PredictionArchive.chain_seq)
+    if end_seq is not None:
+        stmt = stmt.where(PredictionArchive.chain_seq <= end_seq)
+    rows = [tuple(r) for r in (await db.execute(stmt)).all()]
+    return await asyncio.get_running_loop().run_in_executor(
+        None, verify_segment, start_seq, cps.get(start_seq, GENESIS), rows, cps.get(end_seq) if end_seq is not None else None,
+    )
+
+async def chain_head(db: AsyncSession) -> dict:
+    head = (await db.execute(
+        select(PredictionArchive.chain_seq, PredictionArchive.sha256_chain, PredictionArchive.published_at)
+        .where(PredictionArchive.chain_seq.is_not(None))
+        .order_by(PredictionArchive.chain_seq.desc()).limit(1)
+    )).first()
+    cps = (await db.execute(select(ArchiveCheckpoint.seq, ArchiveCheckpoint.sha256_chain).order_by(ArchiveCheckpoint.seq))).all()
+    return {
+        "genesis": GENESIS,
+        "head_seq": head.chain_seq if head else 0,
+        "head_hash": head.sha256_chain if head else GENESIS,
+        "head_published_at": head.published_at.isoformat() if head else None,
+        "checkpoint_every": settings.ARCHIVE_CHECKPOINT_EVERY,
+        "checkpoints": [{"seq": c.seq, "sha256_chain": c.sha256_chain} for c in cps],
+        "hash_fields": list(CHAIN_FIELDS),
+    }
+
+async def _main(a: argparse.Namespace) -> None:
+    if a.cmd == "publish":
+        async with SessionLocal() as db:
+            print(json.dumps(await publish_day(db, date.fromisoformat(a.day) if a.day else today_et(), a.republish)))
+    else:
+        rep = await verify_chain(a.workers)
+        print(json.dumps({
+            "ok": rep.ok, "rows": rep.rows, "segments": rep.segments, "head_seq": rep.head_seq,
+            "head_hash": rep.head_hash, "elapsed_s": rep.elapsed_s,
+            "failures": [f.__dict__ for f in rep.failures],
+        }))
+        if not rep.ok:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="prediction_archive hash chain")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("publish")
+    p.add_argument("--day")
+    p.add_argument("--republish", action="store_true", help="Archive games that already have an archive row again")
+    v = sub.add_parser("verify")
+    v.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    asyncio.run(_main(ap.parse_args()))
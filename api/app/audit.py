@@ -0,0 +1,169 @@
+# api/app/audit.py
+"""Buffered audit_log writer.
+
+Handlers call audit_log.record(...), which only appends to a bounded in-memory buffer. A background task
+flushes every AUDIT_FLUSH_MS, or at once when AUDIT_BATCH_ROWS are waiting, with one multi-row INSERT per
+batch. Rows leave the buffer only after their batch commits, so a failed flush is retried on the next tick.
+If the database answers but the batch still fails, a row is at fault: the batch is halved until the rows
+that fail on their own are found, and only those are discarded and counted. A batch that fails
+AUDIT_MAX_ATTEMPTS times in a row with the database unreachable is discarded and counted. When the buffer is full,
+new events are dropped and counted rather than blocking the request. close() drains what is left on
+graceful shutdown.
+"""
+from collections import deque
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Optional
+import asyncio, logging, time, uuid
+
+from sqlalchemy import insert, text
+
+from .config import settings
+from .db import SessionLocal
+from .metrics import registry
+from .models import AuditLog
+
+log = logging.getLogger(__name__)
+
+AUDIT_EVENTS = registry.counter("audit_events_total", "Audit events by outcome", ("outcome",))
+
+class AuditWriter:
+    def __init__(self, max_buffer: int, batch_rows: int, flush_ms: float, max_attempts: int):
+        self.max_buffer = max_buffer
+        self.batch_rows = batch_rows
+        self.interval = flush_ms / 1000.0
+        self.max_attempts = max_attempts
+        self.buffer: deque = deque()
+        self.wake = asyncio.Event()
+        self.lock = asyncio.Lock()
+        self.attempts = 0
+        self.enqueued = 0
+        self.written = 0
+        self.flushes = 0
+        self.dropped = 0        # events refused because the buffer was full
+        self.overflows = 0      # times the buffer filled up
+        self.failed = 0         # events discarded after max_attempts failed flushes
+        self.high_water = 0
+        self.full = False
+        self.last_flush_ms: Optional[float] = None
+
+    def record(self, actor, action: str, entity: Optional[str] = None, entity_id: Optional[uuid.UUID] = None,
+               details: Optional[dict] = None) -> bool:
+        """Queue one event; never blocks or touches the DB. Returns False if it was dropped."""
+        n = len(self.buffer)
+        if n >= self.max_buffer:
+            if not self.full:
+                self.full = True
+                self.overflows += 1
+                log.warning("audit buffer full (%d); dropping events until the next flush", n)
+            self.dropped += 1
+            AUDIT_EVENTS.inc(("dropped",))
+            return False
+        self.buffer.append({
+            "id": uuid.uuid4(), "actor": str(actor), "action": action, "entity": entity, "entity_id": entity_id,
+            "ts": datetime.now(tz=timezone.utc), "details_json": details,
+        })
+        self.enqueued += 1
+        if n + 1 > self.high_water:
+            self.high_water = n + 1
+        if n + 1 == self.batch_rows:
+            self.wake.set()
+        return True
+
+    async def _insert(self, rows: list) -> Optional[Exception]:
+        try:
+            async with SessionLocal() as db:
+                await db.execute(insert(AuditLog), rows)
+                await db.commit()
+        except Exception as e:
+            return e
+        return None
+
+    async def _reachable(self) -> bool:
+        try:
+            async with SessionLocal() as db:
+                await db.execute(text("SELECT 1"))
+        except Exception:
+            return False
+        return True
+
+    async def _isolate(self, rows: list) -> list:
+        """Write the good rows of a batch that failed; returns the rows that fail on their own."""
+        if len(rows) == 1:
+            return rows
+        mid = len(rows) // 2
+        bad = []
+        for part in (rows[:mid], rows[mid:]):
+            if await self._insert(part) is not None:
+                bad += await self._isolate(part)
+        return bad
+
+    async def flush(self) -> int:
+        """Write up to batch_rows of the oldest events. Returns how many left the buffer."""
+        async with self.lock:
+            batch = list(islice(self.buffer, self.batch_rows))
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            err = await self._insert(batch)
+            bad = []
+            if err is not None:
+                if not await self._reachable():
+                    self.attempts += 1
+                    if self.attempts < self.max_attempts:
+                        log.warning("audit flush of %d event(s) failed (attempt %d); will retry", len(batch), self.attempts, exc_info=err)
+                        return 0
+                    log.error("audit flush of %d event(s) failed %d times; discarding them", len(batch), self.attempts, exc_info=err)
+                    bad = batch
+                else:
+                    bad = await self._isolate(batch)
+                    if bad:
+                        log.error("audit: discarding %d event(s) that can't be written (first: %s)", len(bad), bad[0]["action"], exc_info=err)
+                self.failed += len(bad)
+                AUDIT_EVENTS.inc(("failed",), len(bad))
+            written = len(batch) - len(bad)
+            if written:
+                self.written += written
+                self.flushes += 1
+                self.last_flush_ms = (time.perf_counter() - started) * 1000
+                AUDIT_EVENTS.inc(("written",), written)
+            self.attempts = 0
+            for _ in batch:
+                self.buffer.popleft()
+            self.full = False
+            return len(batch)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                # Keep going while full batches are waiting
+                while await self.flush() == self.batch_rows and len(self.buffer) >= self.batch_rows:
+                    pass
+            except Exception:
+                log.warning("audit flush failed", exc_info=True)
+
+    async def close(self, timeout: float) -> None:
+        """Drain the buffer before shutdown; whatever is still buffered at the deadline is logged as lost."""
+        deadline = time.monotonic() + timeout
+        while self.buffer and time.monotonic() < deadline:
+            try:
+                await asyncio.wait_for(self.flush(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                break
+        if self.buffer:
+            log.error("audit shutdown: %d buffered event(s) not written", len(self.buffer))
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.buffer), "high_water": self.high_water, "max_buffer": self.max_buffer,
+            "enqueued": self.enqueued, "written": self.written, "flushes": self.flushes,
+            "dropped": self.dropped, "overflows": self.overflows, "failed": self.failed,
+            "last_flush_ms": round(self.last_flush_ms, 3) if self.last_flush_ms is not None else None,
+        }
+
+audit_log = AuditWriter(settings.AUDIT_BUFFER_MAX, settings.AUDIT_BATCH_ROWS, settings.AUDIT_FLUSH_MS, settings.AUDIT_MAX_ATTEMPTS)
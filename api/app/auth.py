@@ -6,13 +6,18 @@ import jwt, uuid
 from fastapi import Depends, HTTPException, status, Header
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from .api_keys import KEY_PREFIX, api_key_index
 from .config import settings
 from .db import SessionLocal
+from .hashing import hashing_pool
 from .models import User, Subscription
+from .principal_cache import Principal, principal_cache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 def hash_password(password:str)->str: return pwd_context.hash(password)
 def verify_password(plain:str, hashed:str)->bool: return pwd_context.verify(plain, hashed)
+async def hash_password_async(password:str)->str: return await hashing_pool.run(hash_password, password)
+async def verify_password_async(plain:str, hashed:str)->bool: return await hashing_pool.run(verify_password, plain, hashed)
 def create_jwt(user_id:str, email:str)->str:
     exp = datetime.now(tz=timezone.utc) + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
     payload={"sub":user_id,"email":email,"exp":exp}
@@ -22,14 +27,34 @@ async def get_db():
     async with SessionLocal() as session:
         yield session
 
-async def require_auth(authorization: Optional[str]=Header(default=None), db: AsyncSession=Depends(get_db)):
+async def load_principal(db: AsyncSession, user_id: uuid.UUID)->Principal:
+    principal=principal_cache.get(user_id)
+    if principal is None:
+        user=(await db.execute(select(User).where(User.id==user_id))).scalar_one_or_none()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        sub=(await db.execute(select(Subscription).where(Subscription.user_id==user_id))).scalar_one_or_none()
+        principal=Principal(user=user, sub_status=sub.status if sub else None, sub_period_end=sub.current_period_end if sub else None)
+        principal_cache.put(user_id, principal)
+    return principal
+
+async def require_auth(authorization: Optional[str]=Header(default=None), x_api_key: Optional[str]=Header(default=None), db: AsyncSession=Depends(get_db)):
     if settings.DEV_SKIP_AUTH:
         class U: pass
         u=U(); u.id="dev-user"; u.email="dev@local"
-        return {"user":u, "sub_active":True}
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid Authorization header")
-    token=authorization.split(" ",1)[1].strip()
+        return {"user":u, "sub_active":True, "api_key_id":None}
+    token=x_api_key.strip() if x_api_key else None
+    if token is None:
+        if not authorization or not authorization.lower().startswith("bearer "):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid Authorization header")
+        token=authorization.split(" ",1)[1].strip()
+    if token.startswith(KEY_PREFIX):
+        # API key: index lookup, then the cached principal; no DB round-trip on the warm path
+        entry=await api_key_index.resolve(db, token)
+        if entry is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or revoked API key")
+        principal=await load_principal(db, entry.user_id)
+        return {"user":principal.user, "sub_active":principal.sub_active, "api_key_id":entry.id}
     try:
         payload=jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
     except Exception:
@@ -41,9 +66,5 @@ async def require_auth(authorization: Optional[str]=Header(default=None), db: As
         user_id=uuid.UUID(user_id_str)
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user id in token")
-    user=(await db.execute(select(User).where(User.id==user_id))).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    sub=(await db.execute(select(Subscription).where(Subscription.user_id==user_id))).scalar_one_or_none()
-    sub_active=bool(sub and sub.status=="active" and (sub.current_period_end is None or sub.current_period_end>datetime.now(tz=timezone.utc)))
-    return {"user":user, "sub_active":sub_active}
+    principal=await load_principal(db, user_id)
+    return {"user":principal.user, "sub_active":principal.sub_active, "api_key_id":None}
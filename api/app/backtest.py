@@ -0,0 +1,343 @@
+# api/app/backtest.py
+"""Vectorized backtests of staking strategies over archived picks.
+
+Settled games are loaded once into columnar arrays (one row per game, in date order): the latest archived
+pick, the outcome, the price available when the pick was published (latest snapshot at or before
+published_at, any book) and the closing price (latest at or before first pitch, any book; as in rollups).
+Each market is reduced to one bet per game on the side the model favours, with its win probability,
+price, per-unit return and closing-line value (bet price / closing price - 1; TOTAL only when the line
+did not move). Strategies are then evaluated together as (strategies x games) matrices: a mask from the
+confidence/edge thresholds, a stake from the staking rule, per-day sums with reduceat, and the equity
+curve with a cumulative sum. Kelly stakes are fractions of the bankroll at the start of the day.
+
+    python -m app.backtest --market ML --market TOTAL --kelly 0.1 0.25 0.5 --min-confidence 0 0.1 0.2 --top 10
+    python -m app.backtest --synthetic 15000 --min-edge 0 0.01 0.02 0.04 --min-confidence 0 0.05 0.1 0.15 0.2
+"""
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from itertools import product
+from typing import Optional
+import argparse, asyncio, json, math, time
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .parlay_search import total_probabilities
+from .response_cache import data_versions
+from .season_store import Season, season_store
+
+MARKETS = ("ML", "TOTAL")
+STAKING = ("flat", "kelly")
+EPOCH = date(1970, 1, 1)
+
+# One row per settled game: latest archived pick, outcome, price at publication and at the close
+_LOAD_SQL = text("""
+SELECT DISTINCT ON (g.game_date, g.id)
+  g.game_date, pa.p_home_win, pa.confidence, pa.expected_total, pa.pred_home_runs, pa.pred_away_runs,
+  o.winner, o.actual_home_runs + o.actual_away_runs AS total_runs,
+  b.home_ml_decimal AS bet_home, b.away_ml_decimal AS bet_away, b.total AS bet_line, b.over_price_dec AS bet_over, b.under_price_dec AS bet_under,
+  c.home_ml_decimal AS close_home, c.away_ml_decimal AS close_away, c.total AS close_line, c.over_price_dec AS close_over, c.under_price_dec AS close_under
+FROM games g
+JOIN outcomes o ON o.game_id = g.id AND o.winner IS NOT NULL
+JOIN LATERAL (
+  SELECT p_home_win, confidence, expected_total, pred_home_runs, pred_away_runs, published_at FROM prediction_archive
+   WHERE game_id = g.id ORDER BY published_at DESC LIMIT 1
+) pa ON true
+LEFT JOIN LATERAL (
+  SELECT * FROM odds_snapshots s WHERE s.game_id = g.id AND s.ts <= pa.published_at ORDER BY s.ts DESC LIMIT 1
+) b ON true
+LEFT JOIN LATERAL (
+  SELECT * FROM odds_snapshots s WHERE s.game_id = g.id AND (g.start_time_et IS NULL OR s.ts <= g.start_time_et)
+   ORDER BY s.ts DESC LIMIT 1
+) c ON true
+WHERE (CAST(:from_date AS date) IS NULL OR g.game_date >= :from_date)
+  AND (CAST(:to_date AS date) IS NULL OR g.game_date <= :to_date)
+  AND NOT (CAST(EXTRACT(YEAR FROM g.game_date) AS int) = ANY(CAST(:exclude_years AS int[])))
+ORDER BY g.game_date, g.id, o.closed_at DESC NULLS LAST
+""")
+
+@dataclass(frozen=True)
+class Strategy:
+    market: str = "ML"
+    staking: str = "flat"
+    kelly_fraction: float = 0.25
+    min_confidence: float = 0.0
+    min_edge: Optional[float] = None    # expected return per unit staked; None = no filter
+
+@dataclass
+class Dataset:
+    """Columnar settled games, sorted by day (days since 1970-01-01). Missing values are NaN."""
+    day: np.ndarray
+    p_home: np.ndarray
+    confidence: np.ndarray
+    lam_total: np.ndarray
+    home_won: np.ndarray
+    total_runs: np.ndarray
+    bet_home: np.ndarray
+    bet_away: np.ndarray
+    bet_line: np.ndarray
+    bet_over: np.ndarray
+    bet_under: np.ndarray
+    close_home: np.ndarray
+    close_away: np.ndarray
+    close_line: np.ndarray
+    close_over: np.ndarray
+    close_under: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def between(self, from_date: Optional[date], to_date: Optional[date]) -> "Dataset":
+        lo = np.searchsorted(self.day, (from_date - EPOCH).days, "left") if from_date else 0
+        hi = np.searchsorted(self.day, (to_date - EPOCH).days, "right") if to_date else len(self.day)
+        return Dataset(**{k: v[lo:hi] for k, v in self.__dict__.items()})
+
+@dataclass
+class MarketBets:
+    """The model's side in one market, one entry per game."""
+    valid: np.ndarray       # priced and probability known
+    p_win: np.ndarray
+    price: np.ndarray
+    ret: np.ndarray         # per unit staked: price - 1, -1, or 0 on a push
+    edge: np.ndarray        # expected return per unit
+    kelly: np.ndarray       # full-Kelly fraction, 0 when edge <= 0
+    clv: np.ndarray
+    won: np.ndarray
+
+def _f(v) -> float:
+    return float(v) if v is not None else math.nan
+
+async def load_dataset(db: AsyncSession, from_date: Optional[date] = None, to_date: Optional[date] = None, exclude_years: tuple[int, ...] = ()) -> Dataset:
+    rows = (await db.execute(_LOAD_SQL, {"from_date": from_date, "to_date": to_date, "exclude_years": list(exclude_years)})).all()
+    cols = {k: np.array([_f(getattr(r, k)) for r in rows], dtype=np.float64) for k in (
+        "p_home_win", "confidence", "expected_total", "pred_home_runs", "pred_away_runs", "total_runs",
+        "bet_home", "bet_away", "bet_line", "bet_over", "bet_under",
+        "close_home", "close_away", "close_line", "close_over", "close_under",
+    )}
+    lam = np.where(np.isnan(cols["expected_total"]), cols["pred_home_runs"] + cols["pred_away_runs"], cols["expected_total"])
+    return Dataset(
+        day=np.array([(r.game_date - EPOCH).days for r in rows], dtype=np.int64),
+        p_home=cols["p_home_win"], confidence=cols["confidence"], lam_total=lam,
+        home_won=np.array([r.winner == "HOME" for r in rows], dtype=bool), total_runs=cols["total_runs"],
+        **{k: cols[k] for k in cols if k.startswith(("bet_", "close_"))},
+    )
+
+def season_dataset(season: Season) -> Dataset:
+    """Settled games of a stored season (memory-mapped columns, widened to float64)."""
+    c = season.cols
+    settled = np.flatnonzero(c["winner"] >= 0)
+    f = lambda k: c[k][settled].astype(np.float64)
+    lam = np.where(np.isnan(f("expected_total")), f("pred_home_runs") + f("pred_away_runs"), f("expected_total"))
+    return Dataset(
+        day=c["day"][settled].astype(np.int64), p_home=f("p_home_win"), confidence=f("confidence"), lam_total=lam,
+        home_won=c["winner"][settled] == 1, total_runs=(c["home_runs"][settled] + c["away_runs"][settled]).astype(np.float64),
+        **{k: f(k) for k in ("bet_home", "bet_away", "bet_line", "bet_over", "bet_under", "close_home", "close_away", "close_line", "close_over", "close_under")},
+    )
+
+def concat(parts: list[Dataset]) -> Dataset:
+    merged = {k: np.concatenate([getattr(p, k) for p in parts]) for k in Dataset.__dataclass_fields__}
+    order = np.argsort(merged["day"], kind="stable")
+    return Dataset(**{k: v[order] for k, v in merged.items()})
+
+async def load_history(db: AsyncSession) -> Dataset:
+    """Stored seasons from the season store, everything else from Postgres."""
+    stored = [s for s in (season_store.get(y) for y in season_store.seasons()) if s is not None]
+    live = await load_dataset(db, exclude_years=tuple(s.season for s in stored))
+    return concat([season_dataset(s) for s in stored] + [live]) if stored else live
+
+def _fill(bet: np.ndarray, close: np.ndarray) -> np.ndarray:
+    # No snapshot before publication: assume the bet was placed at the close
+    return np.where(np.isnan(bet), close, bet)
+
+def market_bets(ds: Dataset, market: str) -> MarketBets:
+    if market == "ML":
+        home = ds.p_home >= 0.5
+        p_win = np.where(home, ds.p_home, 1.0 - ds.p_home)
+        price = np.where(home, _fill(ds.bet_home, ds.close_home), _fill(ds.bet_away, ds.close_away))
+        close = np.where(home, ds.close_home, ds.close_away)
+        p_push = np.zeros_like(p_win)
+        won = home == ds.home_won
+        push = np.zeros_like(won)
+        clv = price / close - 1.0
+    else:
+        line = _fill(ds.bet_line, ds.close_line)
+        p_over, p_under, p_push = np.full(len(ds), np.nan), np.full(len(ds), np.nan), np.zeros(len(ds))
+        for i in np.flatnonzero(~np.isnan(line) & (ds.lam_total > 0)):
+            p_over[i], p_under[i], p_push[i] = total_probabilities(float(ds.lam_total[i]), float(line[i]))
+        over = p_over >= p_under
+        p_win = np.where(over, p_over, p_under)
+        bet_line_known = ~np.isnan(ds.bet_line)
+        price = np.where(over, np.where(bet_line_known, ds.bet_over, ds.close_over), np.where(bet_line_known, ds.bet_under, ds.close_under))
+        close = np.where(over, ds.close_over, ds.close_under)
+        won = np.where(over, ds.total_runs > line, ds.total_runs < line)
+        push = ds.total_runs == line
+        same_line = line == ds.close_line
+        clv = np.where(same_line, price / close - 1.0, np.nan)
+    valid = ~np.isnan(p_win) & (price > 1.0)
+    price = np.where(valid, price, 2.0)
+    p_lose = np.clip(1.0 - p_win - p_push, 0.0, 1.0)
+    edge = np.where(valid, p_win * (price - 1.0) - p_lose, -np.inf)
+    ret = np.where(push, 0.0, np.where(won, price - 1.0, -1.0))
+    kelly = np.where(valid, np.clip(edge / (price - 1.0), 0.0, 1.0), 0.0)
+    return MarketBets(valid, p_win, price, np.where(valid, ret, 0.0), edge, kelly, np.where(valid, clv, np.nan), won & valid)
+
+def evaluate(ds: Dataset, strategies: list[Strategy], flat_stake: float, max_stake: float, series: bool = False) -> list[dict]:
+    """Summary (and optionally daily series) per strategy, in input order. Bankrolls start at 1.0."""
+    if not len(ds):
+        return [_summary(s, 0, 0, 0.0, 0.0, np.ones(1), np.zeros(1), 0.0, 0) for s in strategies]
+    out: list[Optional[dict]] = [None] * len(strategies)
+    starts = np.flatnonzero(np.r_[True, ds.day[1:] != ds.day[:-1]])
+    days = [(EPOCH + timedelta(days=int(d))).isoformat() for d in ds.day[starts]] if series else []
+    conf = np.nan_to_num(ds.confidence, nan=0.0)
+    for market in MARKETS:
+        idx = [i for i, s in enumerate(strategies) if s.market == market]
+        if not idx:
+            continue
+        group = [strategies[i] for i in idx]
+        mb = market_bets(ds, market)
+        min_conf = np.array([s.min_confidence for s in group])[:, None]
+        min_edge = np.array([-np.inf if s.min_edge is None else s.min_edge for s in group])[:, None]
+        is_kelly = np.array([s.staking == "kelly" for s in group])[:, None]
+        frac = np.array([s.kelly_fraction for s in group])[:, None]
+
+        mask = mb.valid[None, :] & (conf[None, :] >= min_conf) & (mb.edge[None, :] >= min_edge)
+        stake = np.where(is_kelly, np.minimum(frac * mb.kelly[None, :], max_stake), flat_stake) * mask
+        mask &= stake > 0
+        day_stake = np.add.reduceat(stake, starts, axis=1)
+        day_ret = np.add.reduceat(stake * mb.ret[None, :], starts, axis=1)
+        # Kelly: fractions of the start-of-day bankroll, so the curve compounds; flat: fixed units
+        growth = np.cumprod(np.maximum(1.0 + day_ret, 0.0), axis=1)
+        prev = np.hstack([np.ones((len(group), 1)), growth[:, :-1]])
+        scale = np.where(is_kelly, prev, 1.0)
+        staked, pnl = scale * day_stake, scale * day_ret
+        equity = 1.0 + np.cumsum(pnl, axis=1)
+        peak = np.maximum.accumulate(np.hstack([np.ones((len(group), 1)), equity]), axis=1)[:, 1:]
+        drawdown = 1.0 - equity / peak
+
+        has_clv = mask & ~np.isnan(mb.clv)[None, :]
+        clv = np.where(has_clv, np.nan_to_num(mb.clv)[None, :], 0.0)
+        day_clv, day_clv_n = np.add.reduceat(clv, starts, axis=1), np.add.reduceat(has_clv, starts, axis=1)
+        bets, wins = mask.sum(axis=1), (mask & mb.won[None, :]).sum(axis=1)
+        clv_beats = (has_clv & (clv > 0)).sum(axis=1)
+        for j, i in enumerate(idx):
+            res = _summary(strategies[i], bets[j], wins[j], staked[j], pnl[j], equity[j], drawdown[j], day_clv[j], day_clv_n[j], clv_beats[j])
+            if series:
+                cum_staked, cum_clv_n = np.cumsum(staked[j]), np.cumsum(day_clv_n[j])
+                res["series"] = {
+                    "day": days,
+                    "bankroll": np.round(equity[j], 6).tolist(),
+                    "drawdown": np.round(drawdown[j], 6).tolist(),
+                    "roi": np.round(np.divide(np.cumsum(pnl[j]), cum_staked, out=np.zeros_like(cum_staked), where=cum_staked > 0), 6).tolist(),
+                    "clv": np.round(np.divide(np.cumsum(day_clv[j]), cum_clv_n, out=np.zeros(len(days)), where=cum_clv_n > 0), 6).tolist(),
+                }
+            out[i] = res
+    return out  # type: ignore[return-value]
+
+def _summary(s: Strategy, bets, wins, staked, pnl, equity, drawdown, day_clv, day_clv_n, clv_beats=0) -> dict:
+    bets, wins, n_clv = int(np.sum(bets)), int(np.sum(wins)), int(np.sum(day_clv_n))
+    total_staked, profit = float(np.sum(staked)), float(np.sum(pnl))
+    return {
+        "strategy": asdict(s),
+        "bets": bets,
+        "wins": wins,
+        "win_pct": round(wins / bets, 4) if bets else None,
+        "staked": round(total_staked, 6),
+        "profit": round(profit, 6),
+        "roi": round(profit / total_staked, 6) if total_staked else None,
+        "final_bankroll": round(float(equity[-1]), 6),
+        "max_drawdown": round(float(np.max(drawdown)), 6),
+        "avg_clv": round(float(np.sum(day_clv)) / n_clv, 6) if n_clv else None,
+        "clv_beat_rate": round(int(clv_beats) / n_clv, 4) if n_clv else None,
+    }
+
+class DatasetCache:
+    """Full settled history for the endpoint, reloaded when games, archive or outcomes change or a season
+    snapshot is (re)written. Odds aren't versioned, but prices for already-settled games don't move."""
+    def __init__(self):
+        self.key: Optional[tuple] = None
+        self.dataset: Optional[Dataset] = None
+        self._lock = asyncio.Lock()
+        self.loads = 0
+
+    async def get(self, db: AsyncSession) -> Dataset:
+        versions = data_versions.get("games", "prediction_archive", "outcomes")
+        key = versions and (versions, tuple(str((season_store.root / str(y)).resolve()) for y in season_store.seasons()))
+        if key is not None and key == self.key:
+            return self.dataset
+        async with self._lock:
+            if key is not None and key == self.key:
+                return self.dataset
+            ds = await load_history(db)
+            self.loads += 1
+            if key is not None:
+                self.key, self.dataset = key, ds
+            return ds
+
+    def stats(self) -> dict:
+        return {"games": len(self.dataset) if self.dataset is not None else None, "loads": self.loads}
+
+def grid(markets: list[str], staking: list[str], kelly_fractions: list[float], min_confidence: list[float], min_edge: list[Optional[float]]) -> list[Strategy]:
+    """Cartesian product; kelly_fraction only varies for Kelly staking."""
+    out = []
+    for m, st, c, e in product(markets, staking, min_confidence, min_edge):
+        for k in (kelly_fractions if st == "kelly" else [0.0]):
+            out.append(Strategy(m, st, k, c, e))
+    return out
+
+def synthetic_dataset(n: int, seed: int = 7, games_per_day: int = 15) -> Dataset:
+    """Calibrated-ish picks against vigged, noisy prices, for benchmarks without a database."""
+    rng = np.random.default_rng(seed)
+    true_p = np.clip(rng.normal(0.53, 0.09, n), 0.15, 0.85)
+    p_home = np.clip(true_p + rng.normal(0, 0.03, n), 0.05, 0.95)
+    close_p = np.clip(true_p + rng.normal(0, 0.02, n), 0.05, 0.95)
+    bet_p = np.clip(close_p + rng.normal(0, 0.015, n), 0.05, 0.95)
+    lam = rng.uniform(7.0, 10.5, n)
+    line = np.round(lam * 2 + rng.normal(0, 1.0, n)) / 2
+    runs = rng.poisson(np.clip(lam + rng.normal(0, 1.5, n), 1.0, None)).astype(np.float64)
+    nan = np.full(n, np.nan)
+    return Dataset(
+        day=np.arange(n, dtype=np.int64) // games_per_day + (date(2023, 4, 1) - EPOCH).days,
+        p_home=p_home, confidence=np.abs(p_home - 0.5) * 2, lam_total=lam,
+        home_won=rng.random(n) < true_p, total_runs=runs,
+        bet_home=1 / (bet_p * 1.045), bet_away=1 / ((1 - bet_p) * 1.045), bet_line=line, bet_over=np.full(n, 1.91), bet_under=np.full(n, 1.91),
+        close_home=1 / (close_p * 1.045), close_away=1 / ((1 - close_p) * 1.045), close_line=np.where(rng.random(n) < 0.8, line, nan),
+        close_over=np.full(n, 1.91), close_under=np.full(n, 1.91),
+    )
+
+backtest_cache = DatasetCache()
+
+async def _main(a: argparse.Namespace) -> None:
+    if a.synthetic:
+        ds = synthetic_dataset(a.synthetic)
+    else:
+        from .db import SessionLocal
+        async with SessionLocal() as db:
+            ds = (await load_history(db)).between(
+                date.fromisoformat(a.from_date) if a.from_date else None, date.fromisoformat(a.to_date) if a.to_date else None,
+            )
+    strategies = grid(a.market or ["ML"], a.staking or list(STAKING), a.kelly, a.min_confidence, [None if e < 0 else e for e in a.min_edge])
+    started = time.perf_counter()
+    results = evaluate(ds, strategies, a.flat_stake, a.max_stake, series=a.series)
+    elapsed = time.perf_counter() - started
+    ranked = sorted(results, key=lambda r: r["final_bankroll"], reverse=True)
+    print(json.dumps({
+        "games": len(ds), "strategies": len(strategies), "elapsed_ms": round(elapsed * 1000, 2), "top": ranked[:a.top],
+    }, indent=None if a.series else 2))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Backtest staking strategies over archived picks")
+    ap.add_argument("--from-date")
+    ap.add_argument("--to-date")
+    ap.add_argument("--market", action="append", choices=MARKETS)
+    ap.add_argument("--staking", action="append", choices=STAKING)
+    ap.add_argument("--kelly", type=float, nargs="+", default=[0.25], help="Kelly fractions")
+    ap.add_argument("--min-confidence", type=float, nargs="+", default=[0.0])
+    ap.add_argument("--min-edge", type=float, nargs="+", default=[-1.0], help="Negative = no edge filter")
+    ap.add_argument("--flat-stake", type=float, default=settings.BACKTEST_FLAT_STAKE)
+    ap.add_argument("--max-stake", type=float, default=settings.BACKTEST_MAX_STAKE)
+    ap.add_argument("--series", action="store_true")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--synthetic", type=int, help="Use N synthetic games instead of the database")
+    asyncio.run(_main(ap.parse_args()))
@@ -18,5 +18,71 @@ class Settings:
     STRIPE_PRICE_YEARLY: str = os.getenv("STRIPE_PRICE_YEARLY", "")
     APP_BASE_URL: str = os.getenv("APP_BASE_URL", "http://localhost:3000")
     API_BASE_URL: str = os.getenv("API_BASE_URL", "http://localhost:8080")
+    STRIPE_API_BASE: str = os.getenv("STRIPE_API_BASE", "https://api.stripe.com")
+    STRIPE_TIMEOUT_SECONDS: float = float(os.getenv("STRIPE_TIMEOUT_SECONDS", "5"))
+    STRIPE_MAX_CONNECTIONS: int = int(os.getenv("STRIPE_MAX_CONNECTIONS", "20"))
+    STRIPE_BREAKER_FAILURES: int = int(os.getenv("STRIPE_BREAKER_FAILURES", "5"))
+    STRIPE_BREAKER_RESET_SECONDS: float = float(os.getenv("STRIPE_BREAKER_RESET_SECONDS", "30"))
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_SLOW_QUERY_MS: float = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+    LOOP_LAG_SAMPLE_SECONDS: float = float(os.getenv("LOOP_LAG_SAMPLE_SECONDS", "0.5"))
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")  # empty = /metrics is disabled (404)
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))  # 0 disables
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_LIMIT: int = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+    PARLAY_BATCH_MAX: int = int(os.getenv("PARLAY_BATCH_MAX", "10000"))
+    SIM_DEFAULT_SIMS: int = int(os.getenv("SIM_DEFAULT_SIMS", "200000"))
+    SIM_MAX_SIMS: int = int(os.getenv("SIM_MAX_SIMS", "5000000"))
+    SIM_TIME_BUDGET_MS: float = float(os.getenv("SIM_TIME_BUDGET_MS", "250"))
+    SIM_MAX_WORKERS: int = int(os.getenv("SIM_MAX_WORKERS", "4"))
+    SIM_SHARED_RUNS: float = float(os.getenv("SIM_SHARED_RUNS", "0.3"))  # bivariate Poisson shared component
+    SEARCH_MAX_TOP: int = int(os.getenv("SEARCH_MAX_TOP", "50"))
+    SEARCH_TIME_LIMIT_MS: float = float(os.getenv("SEARCH_TIME_LIMIT_MS", "500"))
+    SEARCH_MAX_NODES: int = int(os.getenv("SEARCH_MAX_NODES", "2000000"))
+    ODDS_RING_CAPACITY: int = int(os.getenv("ODDS_RING_CAPACITY", "4096"))  # line-movement ticks kept per game
+    ODDS_INDEX_POLL_SECONDS: float = float(os.getenv("ODDS_INDEX_POLL_SECONDS", "1"))
+    ODDS_INDEX_LOOKBACK_SECONDS: float = float(os.getenv("ODDS_INDEX_LOOKBACK_SECONDS", "2"))
+    ODDS_INDEX_RETENTION_HOURS: float = float(os.getenv("ODDS_INDEX_RETENTION_HOURS", "48"))
+    ARCHIVE_CHECKPOINT_EVERY: int = int(os.getenv("ARCHIVE_CHECKPOINT_EVERY", "1000"))
+    STRIPE_EVENTS_BATCH_SIZE: int = int(os.getenv("STRIPE_EVENTS_BATCH_SIZE", "200"))
+    STRIPE_EVENTS_POLL_SECONDS: float = float(os.getenv("STRIPE_EVENTS_POLL_SECONDS", "2"))
+    STRIPE_EVENTS_MAX_ATTEMPTS: int = int(os.getenv("STRIPE_EVENTS_MAX_ATTEMPTS", "5"))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))  # 0 disables
+    DATA_VERSION_POLL_SECONDS: float = float(os.getenv("DATA_VERSION_POLL_SECONDS", "1"))
+    LIVE_MAX_CLIENTS: int = int(os.getenv("LIVE_MAX_CLIENTS", "5000"))
+    LIVE_CLIENT_QUEUE: int = int(os.getenv("LIVE_CLIENT_QUEUE", "64"))  # events buffered per client before it is dropped
+    LIVE_HEARTBEAT_SECONDS: float = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+    LIVE_REPLAY_EVENTS: int = int(os.getenv("LIVE_REPLAY_EVENTS", "256"))
+    LIVE_TICKET_SECONDS: int = int(os.getenv("LIVE_TICKET_SECONDS", "30"))  # lifetime of a single-use stream ticket
+    BACKTEST_MAX_STRATEGIES: int = int(os.getenv("BACKTEST_MAX_STRATEGIES", "500"))
+    BACKTEST_SERIES_MAX: int = int(os.getenv("BACKTEST_SERIES_MAX", "10"))
+    BACKTEST_FLAT_STAKE: float = float(os.getenv("BACKTEST_FLAT_STAKE", "0.01"))
+    BACKTEST_MAX_STAKE: float = float(os.getenv("BACKTEST_MAX_STAKE", "0.05"))
+    SEASON_STORE_DIR: str = os.getenv("SEASON_STORE_DIR", "seasons")
+    MODEL_VERSION: str = os.getenv("MODEL_VERSION", "")  # served version; empty = latest prediction of any version
+    SHADOW_MODEL_VERSIONS: str = os.getenv("SHADOW_MODEL_VERSIONS", "")
+    SCORING_MODELS_FILE: str = os.getenv("SCORING_MODELS_FILE", "")
+    TEAM_FEATURES_POLL_SECONDS: float = float(os.getenv("TEAM_FEATURES_POLL_SECONDS", "60"))
+    AUDIT_BUFFER_MAX: int = int(os.getenv("AUDIT_BUFFER_MAX", "20000"))
+    AUDIT_BATCH_ROWS: int = int(os.getenv("AUDIT_BATCH_ROWS", "500"))
+    AUDIT_FLUSH_MS: float = float(os.getenv("AUDIT_FLUSH_MS", "250"))
+    AUDIT_MAX_ATTEMPTS: int = int(os.getenv("AUDIT_MAX_ATTEMPTS", "20"))
+    AUDIT_SHUTDOWN_SECONDS: float = float(os.getenv("AUDIT_SHUTDOWN_SECONDS", "5"))
+    API_KEYS_MAX_PER_USER: int = int(os.getenv("API_KEYS_MAX_PER_USER", "10"))
+    API_KEY_INDEX_POLL_SECONDS: float = float(os.getenv("API_KEY_INDEX_POLL_SECONDS", "5"))
+    API_KEY_MISS_QUERIES_PER_POLL: int = int(os.getenv("API_KEY_MISS_QUERIES_PER_POLL", "100"))
+    PARLAY_SETTLE_POLL_SECONDS: float = float(os.getenv("PARLAY_SETTLE_POLL_SECONDS", "60"))
+    MARKET_DEVIG_METHOD: str = os.getenv("MARKET_DEVIG_METHOD", "shin")  # multiplicative | power | shin
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    # class=concurrency/queue per worker; classes: webhook, paid, account, billing, public, compute
+    ADMISSION_LIMITS: str = os.getenv("ADMISSION_LIMITS", "webhook=16/64,paid=64/256,account=16/64,billing=8/32,public=64/256,compute=8/32")
+    ADMISSION_QUEUE_TIMEOUT_MS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "2000"))
+    ADMISSION_LAG_MS: float = float(os.getenv("ADMISSION_LAG_MS", "100"))  # loop lag at pressure 1.0
+    ADMISSION_POOL_WAIT_MS: float = float(os.getenv("ADMISSION_POOL_WAIT_MS", "250"))  # recent pool wait at pressure 1.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+    ACCURACY_REFRESH_SECONDS: float = float(os.getenv("ACCURACY_REFRESH_SECONDS", "30"))
+    ROLLUP_APPLY_POLL_SECONDS: float = float(os.getenv("ROLLUP_APPLY_POLL_SECONDS", "60"))
 
 settings = Settings()
@@ -1,9 +1,86 @@
 # api/app/db.py
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+import logging, time
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import event, text
 from .config import settings
-engine=create_async_engine(settings.DATABASE_URL, echo=False, future=True)
+from .metrics import registry
+
+log=logging.getLogger(__name__)
+
+@dataclass
+class QueryStats:
+    """DB work attributed to the current request (set by the instrumentation middleware)."""
+    path: str
+    queries: int=0
+    seconds: float=0.0
+    pool_wait: float=0.0
+
+current_queries: ContextVar[Optional[QueryStats]]=ContextVar("current_queries", default=None)
+
+DB_QUERY_SECONDS=registry.histogram("db_query_duration_seconds", "Statement execution time").labels()
+DB_POOL_WAIT=registry.histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection").labels()
+DB_SLOW=registry.counter("db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS")
+
+# Peak checkout wait, halving every POOL_WAIT_HALF_LIFE seconds: a pressure signal that fades once the pool is quiet
+POOL_WAIT_HALF_LIFE=1.0
+_pool_wait=[0.0, 0.0]  # (peak seconds, perf_counter when it was taken)
+
+def recent_pool_wait()->float:
+    peak, at=_pool_wait
+    return peak*0.5**((time.perf_counter()-at)/POOL_WAIT_HALF_LIFE)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
+    def _do_get(self):
+        t=time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited=time.perf_counter()-t
+            DB_POOL_WAIT.observe(waited)
+            if waited>=recent_pool_wait():
+                _pool_wait[:]=[waited, time.perf_counter()]
+            qs=current_queries.get()
+            if qs is not None:
+                qs.pool_wait+=waited
+
+engine=create_async_engine(
+    settings.DATABASE_URL, echo=False, future=True, poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW,
+)
 SessionLocal=async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed=time.perf_counter()-conn.info["query_started"].pop()
+    qs=current_queries.get()
+    if qs is not None:
+        qs.queries+=1
+        qs.seconds+=elapsed
+    DB_QUERY_SECONDS.observe(elapsed)
+    if elapsed*1000>=settings.DB_SLOW_QUERY_MS:
+        DB_SLOW.inc()
+        log.warning("slow query %.1fms path=%s: %s", elapsed*1000, qs.path if qs else "background", " ".join(statement.split())[:500])
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _handle_error(ctx):
+    # after_cursor_execute won't fire for a failed statement
+    if ctx.connection is not None and ctx.connection.info.get("query_started"):
+        ctx.connection.info["query_started"].pop()
+
+registry.gauge("db_pool_checked_out", "Connections currently checked out", lambda: engine.pool.checkedout())
+registry.gauge("db_pool_overflow", "Connections open beyond pool_size", lambda: max(0, engine.pool.overflow()))
+registry.gauge("db_pool_size", "Configured pool size", lambda: engine.pool.size())
+registry.gauge("db_pool_wait_recent_seconds", "Decaying peak of recent connection waits", recent_pool_wait)
+
 async def healthcheck()->bool:
     async with engine.begin() as conn:
         await conn.execute(text("SELECT 1"))
@@ -0,0 +1,144 @@
+# api/app/fake_stripe.py
+"""Local stand-in for the slice of the Stripe API the billing routes use.
+
+    python -m app.fake_stripe --port 12111 --latency-ms 150          # serve; set STRIPE_API_BASE=http://127.0.0.1:12111
+    python -m app.fake_stripe --bench 2000 --concurrency 100          # in-process server + StripeGateway load, prints latency/loop lag
+
+Latency and a 5xx failure rate are injectable, to exercise timeouts and the circuit breaker.
+"""
+from urllib.parse import parse_qsl
+import argparse, asyncio, json, random, secrets, time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="fake-stripe")
+app.state.latency_ms = 0.0
+app.state.fail_rate = 0.0
+_sessions: dict[str, dict] = {}
+
+def _unflatten(pairs: list[tuple[str, str]]) -> dict:
+    # line_items[0][price]=p -> {"line_items": {"0": {"price": "p"}}}; enough for lookups here
+    out: dict = {}
+    for key, value in pairs:
+        parts = key.replace("]", "").split("[")
+        cur = out
+        for p in parts[:-1]:
+            cur = cur.setdefault(p, {})
+        cur[parts[-1]] = value
+    return out
+
+async def _gate(request: Request):
+    if app.state.latency_ms:
+        await asyncio.sleep(app.state.latency_ms / 1000.0)
+    if not request.headers.get("authorization", "").startswith("Bearer "):
+        return JSONResponse({"error": {"type": "invalid_request_error", "message": "No API key provided"}}, status_code=401)
+    if app.state.fail_rate and random.random() < app.state.fail_rate:
+        return JSONResponse({"error": {"type": "api_error", "message": "injected failure"}}, status_code=500)
+    return None
+
+def _id(prefix: str) -> str:
+    return f"{prefix}_test_{secrets.token_hex(8)}"
+
+@app.post("/v1/checkout/sessions")
+async def create_checkout(request: Request):
+    if (err := await _gate(request)) is not None:
+        return err
+    form = _unflatten(parse_qsl((await request.body()).decode()))
+    sid = _id("cs")
+    customer = {"id": _id("cus"), "object": "customer"}
+    sub = {
+        "id": _id("sub"), "object": "subscription", "status": "active", "customer": customer["id"],
+        "current_period_end": int(time.time()) + 30 * 86400,
+        "metadata": {"user_id": form.get("client_reference_id")},
+        "items": {"data": [{"plan": {"interval": "month", "id": (form.get("line_items") or {}).get("0", {}).get("price")}}]},
+    }
+    _sessions[sid] = {
+        "id": sid, "object": "checkout.session", "mode": form.get("mode"), "url": f"https://checkout.stripe.test/{sid}",
+        "client_reference_id": form.get("client_reference_id"), "customer": customer, "subscription": sub,
+    }
+    return _render(_sessions[sid], ())
+
+@app.get("/v1/checkout/sessions/{session_id}")
+async def retrieve_checkout(session_id: str, request: Request):
+    if (err := await _gate(request)) is not None:
+        return err
+    s = _sessions.get(session_id)
+    if s is None:
+        return JSONResponse({"error": {"type": "invalid_request_error", "message": f"No such checkout.session: '{session_id}'"}}, status_code=404)
+    expand = tuple(v for k, v in request.query_params.multi_items() if k.startswith("expand"))
+    return _render(s, expand)
+
+@app.post("/v1/billing_portal/sessions")
+async def create_portal(request: Request):
+    if (err := await _gate(request)) is not None:
+        return err
+    form = _unflatten(parse_qsl((await request.body()).decode()))
+    if not form.get("customer"):
+        return JSONResponse({"error": {"type": "invalid_request_error", "message": "Missing required param: customer."}}, status_code=400)
+    pid = _id("bps")
+    return {"id": pid, "object": "billing_portal.session", "customer": form["customer"], "return_url": form.get("return_url"),
+            "url": f"https://billing.stripe.test/{pid}"}
+
+def _render(s: dict, expand: tuple) -> dict:
+    # Unexpanded references are plain ids, as in the real API
+    return {**s, **{k: s[k] if k in expand else s[k]["id"] for k in ("customer", "subscription")}}
+
+async def _bench(a: argparse.Namespace) -> None:
+    import uvicorn
+    from .stripe_client import CircuitBreaker, StripeGateway, StripeUnavailable
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=a.port, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    gw = StripeGateway(f"http://127.0.0.1:{a.port}", a.timeout, a.concurrency, CircuitBreaker(a.breaker_failures, 5))
+    lag_max = 0.0
+
+    async def ticker():
+        nonlocal lag_max
+        while True:
+            t = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag_max = max(lag_max, time.perf_counter() - t - 0.01)
+
+    sem = asyncio.Semaphore(a.concurrency)
+    unavailable = 0
+
+    async def one(i: int):
+        nonlocal unavailable
+        async with sem:
+            try:
+                s = await gw.create_checkout_session(mode="subscription", line_items=[{"price": "price_x", "quantity": 1}], client_reference_id=str(i))
+                await gw.retrieve_checkout_session(s["id"], expand=("subscription", "customer"))
+            except StripeUnavailable:
+                unavailable += 1
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(a.bench)))
+    elapsed = time.perf_counter() - started
+    tick.cancel()
+    await gw.close()
+    server.should_exit = True
+    await serve
+    print(json.dumps({
+        "calls": a.bench * 2, "elapsed_s": round(elapsed, 3), "calls_per_s": round(a.bench * 2 / elapsed),
+        "unavailable": unavailable, "max_loop_lag_ms": round(lag_max * 1000, 2), **gw.stats(),
+    }))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fake Stripe API for local tests/benchmarks")
+    ap.add_argument("--port", type=int, default=12111)
+    ap.add_argument("--latency-ms", type=float, default=0)
+    ap.add_argument("--fail-rate", type=float, default=0)
+    ap.add_argument("--bench", type=int, help="Run N checkout create+retrieve pairs against an in-process server")
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--timeout", type=float, default=5)
+    ap.add_argument("--breaker-failures", type=int, default=5)
+    args = ap.parse_args()
+    app.state.latency_ms, app.state.fail_rate = args.latency_ms, args.fail_rate
+    if args.bench:
+        asyncio.run(_bench(args))
+    else:
+        import uvicorn
+        uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,64 @@
+# api/app/hashing.py
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+import asyncio, time
+
+from fastapi import HTTPException, status
+
+from .config import settings
+from .metrics import Histogram, registry
+
+T = TypeVar("T")
+
+class HashingPool:
+    """Runs password hashing off the event loop on a size-capped thread pool.
+    bcrypt releases the GIL while hashing, so threads give real parallelism without process overhead.
+    Admission: at most `workers` jobs run and `queue_limit` wait; anything beyond is rejected with 503.
+    """
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._inflight = 0
+        self.rejected = 0
+        self.queue_wait = Histogram()
+        self.hash_time = Histogram()
+        fam = registry.histogram("password_hash_seconds", "Password hashing time by stage", ("stage",))
+        fam.attach(("queue_wait",), self.queue_wait)
+        fam.attach(("hash",), self.hash_time)
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        if self._inflight >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self._inflight += 1
+        enqueued = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            result = fn(*args)
+            return started, time.perf_counter(), result
+
+        try:
+            started, finished, result = await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self._inflight -= 1
+        self.queue_wait.observe(started - enqueued)
+        self.hash_time.observe(finished - started)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "inflight": self._inflight,
+            "rejected": self.rejected,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "hash_seconds": self.hash_time.snapshot(),
+        }
+
+hashing_pool = HashingPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT)
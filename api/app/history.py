@@ -0,0 +1,120 @@
+# api/app/history.py
+from datetime import date
+from typing import AsyncIterator, Optional
+import base64, csv, io, json, uuid
+
+from sqlalchemy import Select, select, tuple_
+
+from .db import engine
+from .models import Game, Outcome, PredictionArchive
+
+STREAM_BATCH = 2000
+CSV_COLUMNS = [
+    "game_id", "date", "home", "away", "p_home_win", "expected_total", "pred_home_runs",
+    "pred_away_runs", "confidence", "winner", "home_runs", "away_runs", "win",
+]
+
+class InvalidCursor(ValueError):
+    pass
+
+Cursor = tuple[date, uuid.UUID, uuid.UUID]  # (game_date, game_id, archive id)
+
+def encode_cursor(game_date: date, game_id: uuid.UUID, archive_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(f"{game_date.isoformat()}|{game_id}|{archive_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        d, g, i = raw.split("|")
+        return date.fromisoformat(d), uuid.UUID(g), uuid.UUID(i)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+def history_query(from_date: Optional[date], to_date: Optional[date], after: Optional[Cursor]) -> Select:
+    """Archived predictions joined to their game and (if settled) outcome, ordered by the keyset (game_date, game_id, archive id).
+    Games are walked in games_game_date_id_idx order and each game's archive rows come from
+    prediction_archive_game_id_id_idx (0003), so a page is an index range scan rather than a sort of the whole join.
+    """
+    stmt = (
+        select(
+            PredictionArchive.id,
+            Game.id.label("game_id"),
+            Game.game_date,
+            Game.home_abbr,
+            Game.away_abbr,
+            PredictionArchive.p_home_win,
+            PredictionArchive.expected_total,
+            PredictionArchive.pred_home_runs,
+            PredictionArchive.pred_away_runs,
+            PredictionArchive.confidence,
+            Outcome.winner,
+            Outcome.actual_home_runs,
+            Outcome.actual_away_runs,
+        )
+        .join(Game, Game.id == PredictionArchive.game_id)
+        .outerjoin(Outcome, Outcome.game_id == Game.id)
+        .order_by(Game.game_date, Game.id, PredictionArchive.id)
+    )
+    if from_date:
+        stmt = stmt.where(Game.game_date >= from_date)
+    if to_date:
+        stmt = stmt.where(Game.game_date <= to_date)
+    if after:
+        d, game_id, archive_id = after
+        # The (game_date, id) bound is what the games index can seek on; the full tuple breaks ties within a game
+        stmt = stmt.where(
+            tuple_(Game.game_date, Game.id) >= tuple_(d, game_id),
+            tuple_(Game.game_date, Game.id, PredictionArchive.id) > tuple_(d, game_id, archive_id),
+        )
+    return stmt
+
+def _num(v):
+    return float(v) if v is not None else None
+
+def row_to_item(r) -> dict:
+    p_home_win = float(r.p_home_win)
+    result = None
+    if r.winner:
+        picked = "HOME" if p_home_win >= 0.5 else "AWAY"
+        result = {
+            "winner": r.winner,
+            "home_runs": _num(r.actual_home_runs),
+            "away_runs": _num(r.actual_away_runs),
+            "win": r.winner == picked,
+        }
+    return {
+        "game_id": str(r.game_id),
+        "date": r.game_date.isoformat(),
+        "home": r.home_abbr,
+        "away": r.away_abbr,
+        "p_home_win": p_home_win,
+        "expected_total": _num(r.expected_total),
+        "pred_home_runs": _num(r.pred_home_runs),
+        "pred_away_runs": _num(r.pred_away_runs),
+        "confidence": _num(r.confidence),
+        "result": result,
+    }
+
+def _csv_row(item: dict) -> list:
+    res = item["result"] or {}
+    return [item[c] for c in CSV_COLUMNS[:9]] + [res.get("winner"), res.get("home_runs"), res.get("away_runs"), res.get("win")]
+
+async def stream_history(stmt: Select, fmt: str) -> AsyncIterator[str]:
+    """Yield NDJSON lines or CSV text from a server-side cursor, one fetch batch at a time.
+    Uses its own connection: the request-scoped session is closed before a streaming body is sent.
+    """
+    async with engine.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=STREAM_BATCH))
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(CSV_COLUMNS)
+            yield buf.getvalue()
+        async for rows in result.partitions():
+            if fmt == "csv":
+                buf.seek(0)
+                buf.truncate()
+                writer.writerows(_csv_row(row_to_item(r)) for r in rows)
+                yield buf.getvalue()
+            else:
+                yield "".join(json.dumps(row_to_item(r), separators=(",", ":")) + "\n" for r in rows)
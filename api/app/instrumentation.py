@@ -0,0 +1,71 @@
+# api/app/instrumentation.py
+"""Per-route request metrics and the Prometheus /metrics endpoint.
+
+InstrumentationMiddleware puts a QueryStats in `current_queries` for the request; the engine events in
+db.py add every statement (and pool wait) to it. When the response is done, latency and DB work are
+recorded under the matched route template (never the raw path, to keep cardinality bounded).
+"""
+from typing import Optional
+import hmac, time
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from .config import settings
+from .db import QueryStats, current_queries
+from .metrics import registry
+
+HTTP_SECONDS = registry.histogram("http_request_duration_seconds", "Request latency by route", ("router", "route", "method", "status"))
+DB_QUERIES_PER_REQUEST = registry.histogram(
+    "db_queries_per_request", "Statements executed per request", ("router", "route"),
+    buckets=(0, 1, 2, 3, 4, 5, 8, 12, 20, 50, 100),
+)
+DB_SECONDS_PER_REQUEST = registry.histogram("db_time_per_request_seconds", "Statement time per request", ("router", "route"))
+POOL_WAIT_PER_REQUEST = registry.histogram("db_pool_wait_per_request_seconds", "Connection wait per request", ("router", "route"))
+
+def route_labels(scope) -> tuple[str, str]:
+    """(router tag, route template) once routing has run; FastAPI records the matched route in the scope."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched", "unmatched"
+    tags = getattr(route, "tags", None)
+    return (tags[0] if tags else "other"), getattr(route, "path", "unmatched")
+
+class InstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        qs = QueryStats(path=scope["path"])
+        token = current_queries.set(qs)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_queries.reset(token)
+            router, route = route_labels(scope)
+            HTTP_SECONDS.labels(router, route, scope["method"], f"{status[0] // 100}xx").observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(router, route).observe(qs.queries)
+            DB_SECONDS_PER_REQUEST.labels(router, route).observe(qs.seconds)
+            POOL_WAIT_PER_REQUEST.labels(router, route).observe(qs.pool_wait)
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    if not settings.METRICS_TOKEN:
+        # Off unless a scraper token is configured: the series expose routes, traffic and pool internals
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,186 @@
+# api/app/live.py
+"""Live event fan-out: one Postgres LISTEN per worker, many SSE clients.
+
+Triggers (0010) NOTIFY predictiq_live once per statement with {"kind", "game_ids"}. The hub turns each
+notification into an event, encodes it to SSE bytes once, and offers it to every matching subscriber's
+bounded queue. A subscriber whose queue is full is a slow consumer: it is dropped (told so, then
+disconnected) rather than letting memory grow or slowing everyone else down. Clients reconnect with
+Last-Event-ID and get the recent events they missed from a small replay buffer.
+
+Event ids come from a DB sequence carried in the NOTIFY payload (0015), so they are the same on every
+worker and survive restarts. Postgres delivers notifications to all listeners in commit order, so replay
+is "everything after the cursor's event in this buffer"; a cursor the buffer doesn't hold (too old, or
+from before this worker started) gets a `resync` event instead.
+
+Before publishing, the hub brings the worker's own read paths up to date (data versions for the
+response cache, the odds index for line moves), so a client refetching on an event sees new data.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+import asyncio, json, logging, time, uuid
+
+from .config import settings
+from .odds_index import odds_index
+from .odds_ingest import asyncpg_dsn
+from .response_cache import data_versions
+from .parlays import parlay_settler
+from .rollups import rollup_applier
+from .team_features import team_feature_store
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "predictiq_live"
+KINDS = ("prediction", "odds", "outcome")
+
+@dataclass(frozen=True)
+class LiveEvent:
+    id: Optional[str]  # None for hub-local events (resync)
+    kind: str
+    sse: bytes
+
+def _event(event_id: Optional[str], kind: str, data: dict) -> LiveEvent:
+    # No id line for hub-local events, so the client's Last-Event-ID stays on the last shared one
+    payload = json.dumps({"kind": kind, "ts": time.time(), **data}, separators=(",", ":"))
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return LiveEvent(event_id, kind, f"{head}event: {kind}\ndata: {payload}\n\n".encode())
+
+class Subscriber:
+    __slots__ = ("kinds", "queue", "dropped")
+
+    def __init__(self, kinds: frozenset, queue_size: int):
+        self.kinds = kinds
+        self.queue: asyncio.Queue[Optional[LiveEvent]] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+class HubFull(Exception):
+    pass
+
+class LiveHub:
+    def __init__(self, max_clients: int, queue_size: int, replay: int):
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self.subscribers: set[Subscriber] = set()
+        self.recent: deque[LiveEvent] = deque(maxlen=replay)
+        self.epoch = uuid.uuid4().hex[:8]  # prefixes local ids if a notification has none (trigger older than 0015)
+        self.seq = 0
+        self.last_id: Optional[str] = None
+        self.listening = False
+        self._was_listening = False
+        self._inbox: asyncio.Queue[str] = asyncio.Queue(maxsize=10_000)
+        self.notifications = 0
+        self.delivered = 0
+        self.slow_dropped = 0
+
+    # ---- clients ----
+    def subscribe(self, kinds: frozenset, last_event_id: Optional[str] = None) -> Subscriber:
+        if len(self.subscribers) >= self.max_clients:
+            raise HubFull()
+        sub = Subscriber(kinds, self.queue_size)
+        if last_event_id:
+            recent = list(self.recent)
+            at = next((i for i in range(len(recent) - 1, -1, -1) if recent[i].id == last_event_id), None)
+            if at is None:
+                sub.queue.put_nowait(_event(None, "resync", {"reason": "unknown_last_event_id"}))
+            else:
+                for ev in recent[at + 1:]:
+                    if (ev.kind in kinds or ev.kind == "resync") and not sub.queue.full():
+                        sub.queue.put_nowait(ev)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self.subscribers.discard(sub)
+
+    def _drop(self, sub: Subscriber) -> None:
+        # Make room for the sentinel so the client's stream ends promptly
+        sub.dropped = True
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+        self.subscribers.discard(sub)
+        self.slow_dropped += 1
+
+    def publish(self, kind: str, data: dict, event_id: Optional[str] = None) -> LiveEvent:
+        self.seq += 1
+        ev = _event(event_id, kind, data)
+        self.recent.append(ev)
+        if event_id is not None:
+            self.last_id = event_id
+        for sub in list(self.subscribers):
+            if kind not in sub.kinds and kind != "resync":
+                continue
+            try:
+                sub.queue.put_nowait(ev)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self._drop(sub)
+        return ev
+
+    # ---- Postgres side ----
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        self.notifications += 1
+        try:
+            self._inbox.put_nowait(payload)
+        except asyncio.QueueFull:
+            log.warning("live inbox full; dropping notification")
+
+    async def _process(self) -> None:
+        while True:
+            payload = await self._inbox.get()
+            try:
+                msg = json.loads(payload)
+                kind, game_ids = msg["kind"], msg.get("game_ids") or []
+                event_id = str(msg["id"]) if msg.get("id") is not None else f"{self.epoch}-{self.notifications}"
+                data: dict = {"game_ids": game_ids}
+                if kind == "odds" and odds_index.ready:
+                    await odds_index.sync()
+                    data["best"] = {gid: odds_index.best(uuid.UUID(gid)) for gid in game_ids}
+                elif kind in ("prediction", "outcome"):
+                    await data_versions.refresh()
+                    if kind == "outcome":
+                        team_feature_store.notify()
+                        parlay_settler.notify()
+                        rollup_applier.notify()
+                self.publish(kind, data, event_id)
+            except Exception:
+                log.warning("bad live notification %r", payload[:200], exc_info=True)
+
+    async def run(self) -> None:
+        import asyncpg
+        processor = asyncio.create_task(self._process())
+        backoff = 1.0
+        try:
+            while True:
+                conn = None
+                try:
+                    conn = await asyncpg.connect(asyncpg_dsn(settings.DATABASE_URL))
+                    await conn.add_listener(CHANNEL, self._on_notify)
+                    if self._was_listening:
+                        # Notifications may have been missed while disconnected
+                        self.publish("resync", {})
+                    self.listening = self._was_listening = True
+                    backoff = 1.0
+                    while not conn.is_closed():
+                        await asyncio.sleep(5)
+                        await conn.execute("SELECT 1")
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    log.warning("live listener disconnected", exc_info=True)
+                finally:
+                    self.listening = False
+                    if conn is not None and not conn.is_closed():
+                        await conn.close()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+        finally:
+            processor.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "listening": self.listening, "clients": len(self.subscribers), "last_event_id": self.last_id, "events": self.seq,
+            "notifications": self.notifications, "delivered": self.delivered, "slow_dropped": self.slow_dropped,
+        }
+
+live_hub = LiveHub(settings.LIVE_MAX_CLIENTS, settings.LIVE_CLIENT_QUEUE, settings.LIVE_REPLAY_EVENTS)
@@ -0,0 +1,351 @@
+# api/app/loadtest.py
+"""Load test: drive the API with fixed traffic mixes and compare per-route latency with a baseline.
+
+    python -m app.loadtest_seed --migrate --reset                     # once, against a scratch DATABASE_URL
+    python -m app.loadtest                                            # all mixes; fails on regression vs the baseline
+    python -m app.loadtest --mix dashboard --mix parlay --duration 30
+    python -m app.loadtest --write-baseline                           # accept the current numbers
+
+By default it starts app.fake_stripe and `uvicorn app.main:app` as subprocesses (same DATABASE_URL,
+Stripe pointed at the fake, a known webhook secret); --target runs against an already running API instead.
+Each mix runs --concurrency closed-loop virtual users for --warmup then --duration seconds. Virtual users
+have their own RNG derived from --seed, so a run issues the same request sequence every time.
+
+Results (throughput and p50/p95/p99 per route) go to --out as JSON. A route regresses when its p50 or
+p95 grows by more than --threshold (and by more than --noise-ms), its error rate rises by more than a
+point, or a mix's throughput drops by more than --threshold; any regression exits 1.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+import argparse, asyncio, hashlib, hmac, json, os, platform, random, subprocess, sys, time
+
+import httpx
+import numpy as np
+
+from .loadtest_seed import LOADTEST_PASSWORD, user_email, user_id
+
+API_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_BASELINE = API_DIR / "loadtest_baseline.json"
+WEBHOOK_SECRET = "whsec_loadtest"
+
+MIXES: dict[str, dict[str, float]] = {
+    "login_burst": {"login": 1.0},
+    "dashboard": {"dashboard": 1.0},
+    "parlay": {"parlay": 1.0},
+    "webhook_storm": {"webhook": 1.0},
+    "mixed": {"dashboard": 0.6, "parlay": 0.25, "login": 0.1, "webhook": 0.05},
+}
+
+@dataclass
+class RouteSamples:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+
+class Recorder:
+    """Collects samples from requests that start after `start_at` (the end of warmup)."""
+    def __init__(self, start_at: float = 0.0):
+        self.routes: dict[str, RouteSamples] = {}
+        self.start_at = start_at
+
+    def record(self, route: str, started: float, status: int, ok: bool) -> None:
+        if started < self.start_at:
+            return
+        s = self.routes.get(route)
+        if s is None:
+            s = self.routes[route] = RouteSamples()
+        s.latencies.append(time.perf_counter() - started)
+        s.statuses[status] = s.statuses.get(status, 0) + 1
+        if not ok:
+            s.errors += 1
+
+def summarize(samples: RouteSamples, duration: float) -> dict:
+    n = len(samples.latencies)
+    ms = np.asarray(samples.latencies) * 1000.0
+    p50, p95, p99 = np.percentile(ms, (50, 95, 99)) if n else (0.0, 0.0, 0.0)
+    return {
+        "requests": n, "errors": samples.errors, "error_rate": round(samples.errors / n, 4) if n else 0.0,
+        "rps": round(n / duration, 2), "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2), "max_ms": round(float(ms.max()), 2) if n else 0.0,
+        "statuses": {str(k): v for k, v in sorted(samples.statuses.items())},
+    }
+
+def sign_webhook(payload: bytes, secret: str, ts: Optional[int] = None) -> str:
+    """A Stripe-Signature header stripe.Webhook.construct_event accepts."""
+    ts = ts or int(time.time())
+    mac = hmac.new(secret.encode(), f"{ts}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={ts},v1={mac}"
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    recorder: Recorder
+    users: int
+    seed: int
+    webhook_secret: str
+    tokens: list[str]
+    slate: list[dict]
+
+class VirtualUser:
+    def __init__(self, ctx: Context, index: int):
+        self.ctx = ctx
+        self.rng = random.Random(ctx.seed * 100_003 + index)
+        self.token = ctx.tokens[index % len(ctx.tokens)]
+        self.etags: dict[str, str] = {}
+        self.event_ids: list[str] = []
+
+    async def call(self, route: str, method: str, url: str, ok: tuple = (200,), auth: bool = True, **kw) -> Optional[httpx.Response]:
+        headers = kw.pop("headers", {})
+        if auth:
+            headers["Authorization"] = f"Bearer {self.token}"
+        started = time.perf_counter()
+        try:
+            resp = await self.ctx.client.request(method, url, headers=headers, **kw)
+        except httpx.HTTPError:
+            self.ctx.recorder.record(route, started, 0, False)
+            return None
+        self.ctx.recorder.record(route, started, resp.status_code, resp.status_code in ok)
+        return resp
+
+    async def conditional_get(self, route: str, url: str, auth: bool = True) -> None:
+        # Polling clients revalidate with the last ETag, as the web app does
+        headers = {"If-None-Match": self.etags[url]} if url in self.etags else {}
+        resp = await self.call(route, "GET", url, ok=(200, 304), auth=auth, headers=headers)
+        if resp is not None and resp.status_code == 200 and "etag" in resp.headers:
+            self.etags[url] = resp.headers["etag"]
+
+    async def login(self) -> None:
+        i = self.rng.randrange(self.ctx.users)
+        await self.call("POST /v1/auth/login", "POST", "/v1/auth/login", auth=False,
+                        json={"email": user_email(i), "password": LOADTEST_PASSWORD})
+
+    async def dashboard(self) -> None:
+        await self.conditional_get("GET /v1/predictions/today", "/v1/predictions/today")
+        await self.conditional_get("GET /v1/accuracy", f"/v1/accuracy?window={self.rng.choice(('7d', '30d', '90d'))}", auth=False)
+        await self.call("GET /v1/billing/status", "GET", "/v1/billing/status")
+        if self.rng.random() < 0.3:
+            since = date.today() - timedelta(days=self.rng.randrange(7, 90))
+            await self.conditional_get("GET /v1/predictions/history", f"/v1/predictions/history?from_date={since}&limit=100", auth=False)
+
+    def _legs(self, n: int) -> list[dict]:
+        games = self.rng.sample(self.ctx.slate, min(n, len(self.ctx.slate)))
+        legs = []
+        for g in games:
+            home = self.rng.random() < 0.5
+            p = g["p_home_win"] if home else 1 - g["p_home_win"]
+            legs.append({
+                "game_id": g["game_id"], "market": "ML", "selection": "HOME" if home else "AWAY",
+                "price_decimal": round(1 / (p * 1.045), 3), "leg_probability": round(p, 4),
+            })
+        return legs
+
+    async def parlay(self) -> None:
+        legs = self._legs(self.rng.randint(2, 4))
+        await self.call("POST /v1/parlay/build", "POST", "/v1/parlay/build", json={
+            "stake": 10.0,
+            "picks": [{"market": "ML", "selection": l["selection"], "odds_type": "decimal", "odds": l["price_decimal"]} for l in legs],
+        })
+        await self.call("POST /v1/parlays/evaluate", "POST", "/v1/parlays/evaluate", json={"stake_cents": 1000, "legs": legs})
+        batch = [self._legs(self.rng.randint(2, 5)) for _ in range(50)]
+        await self.call("POST /v1/parlay/evaluate-batch", "POST", "/v1/parlay/evaluate-batch", json={"parlays": [
+            {"stake_cents": 1000, "odds": [l["price_decimal"] for l in b], "leg_probabilities": [l["leg_probability"] for l in b]}
+            for b in batch
+        ]})
+
+    async def webhook(self) -> None:
+        # ~5% are redeliveries of an event this user already sent, as Stripe retries do
+        if self.event_ids and self.rng.random() < 0.05:
+            event_id = self.rng.choice(self.event_ids)
+        else:
+            event_id = f"evt_lt_{self.rng.getrandbits(64):016x}"
+            self.event_ids.append(event_id)
+        i = self.rng.randrange(self.ctx.users)
+        payload = json.dumps({
+            "id": event_id, "object": "event", "type": "customer.subscription.updated", "created": int(time.time()),
+            "data": {"object": {
+                "id": f"sub_lt_{i}", "customer": f"cus_lt_{i}", "status": self.rng.choice(("active", "active", "past_due")),
+                "current_period_end": int(time.time()) + 30 * 86400, "metadata": {"user_id": str(user_id(self.ctx.seed, i))},
+                # Stored verbatim as subscriptions.plan, so it must pass that column's CHECK or every event retries
+                "items": {"data": [{"plan": {"interval": self.rng.choice(("monthly", "quarterly", "yearly"))}}]},
+            }},
+        }).encode()
+        await self.call("POST /webhooks/stripe", "POST", "/webhooks/stripe", auth=False, content=payload, headers={
+            "Content-Type": "application/json", "Stripe-Signature": sign_webhook(payload, self.ctx.webhook_secret),
+        })
+
+    async def loop(self, weights: dict[str, float], stop_at: float, think_s: float) -> None:
+        scenarios: list[Callable[[], Awaitable[None]]] = [getattr(self, name) for name in weights]
+        w = list(weights.values())
+        while time.perf_counter() < stop_at:
+            await self.rng.choices(scenarios, w)[0]()
+            if think_s:
+                await asyncio.sleep(self.rng.expovariate(1 / think_s))
+
+async def run_mix(ctx: Context, name: str, concurrency: int, warmup: float, duration: float, think_s: float) -> dict:
+    vus = [VirtualUser(ctx, i) for i in range(concurrency)]
+    started = time.perf_counter()
+    ctx.recorder = Recorder(started + warmup)
+    await asyncio.gather(*(vu.loop(MIXES[name], started + warmup + duration, think_s) for vu in vus))
+    measured = time.perf_counter() - started - warmup
+    routes = {route: summarize(s, measured) for route, s in sorted(ctx.recorder.routes.items())}
+    total = RouteSamples()
+    for s in ctx.recorder.routes.values():
+        total.latencies += s.latencies
+        total.errors += s.errors
+    return {"concurrency": concurrency, "duration_s": round(measured, 2), "total": summarize(total, measured), "routes": routes}
+
+async def prepare(client: httpx.AsyncClient, a: argparse.Namespace) -> Context:
+    tokens = []
+    for i in range(min(a.concurrency, a.users)):
+        r = await client.post("/v1/auth/login", json={"email": user_email(i), "password": LOADTEST_PASSWORD})
+        if r.status_code != 200:
+            raise SystemExit(f"login as {user_email(i)} failed ({r.status_code}); seed with `python -m app.loadtest_seed`")
+        tokens.append(r.json()["token"])
+    r = await client.get("/v1/predictions/today", headers={"Authorization": f"Bearer {tokens[0]}"})
+    slate = r.json() if r.status_code == 200 else []
+    if len(slate) < 5:
+        raise SystemExit(f"today's slate has {len(slate)} games; reseed (games are dated relative to today ET)")
+    secret = os.getenv("STRIPE_WEBHOOK_SECRET") or WEBHOOK_SECRET
+    return Context(client, Recorder(), a.users, a.seed, secret, tokens, slate)
+
+# ---- baseline ----
+
+def compare(current: dict, baseline: dict, threshold: float, noise_ms: float, min_requests: int) -> list[str]:
+    problems = []
+    for mix, base in baseline.get("mixes", {}).items():
+        cur = current["mixes"].get(mix)
+        if cur is None:
+            continue
+        bt, ct = base["total"], cur["total"]
+        if ct["rps"] < bt["rps"] * (1 - threshold):
+            problems.append(f"{mix}: throughput {ct['rps']} rps < baseline {bt['rps']} rps")
+        for route, b in base["routes"].items():
+            c = cur["routes"].get(route)
+            if b["requests"] < min_requests:
+                continue
+            if c is None or c["requests"] == 0:
+                problems.append(f"{mix} {route}: no requests (baseline {b['requests']})")
+                continue
+            for q in ("p50_ms", "p95_ms"):
+                if c[q] > b[q] * (1 + threshold) and c[q] - b[q] > noise_ms:
+                    problems.append(f"{mix} {route}: {q[:-3]} {c[q]}ms > baseline {b[q]}ms")
+            if c["error_rate"] > b["error_rate"] + 0.01:
+                problems.append(f"{mix} {route}: error rate {c['error_rate']:.2%} > baseline {b['error_rate']:.2%}")
+    return problems
+
+def print_report(results: dict) -> None:
+    for mix, r in results["mixes"].items():
+        t = r["total"]
+        print(f"\n{mix}: {t['rps']} rps, {t['requests']} requests, {t['errors']} errors, c={r['concurrency']}", file=sys.stderr)
+        print(f"  {'route':<34}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err%':>7}", file=sys.stderr)
+        for route, s in r["routes"].items():
+            print(f"  {route:<34}{s['rps']:>9}{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}{s['error_rate'] * 100:>7.1f}", file=sys.stderr)
+
+# ---- processes ----
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+async def _wait_ready(url: str, proc: Optional[subprocess.Popen], timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as c:
+        while time.monotonic() < deadline:
+            if proc is not None and proc.poll() is not None:
+                raise SystemExit(f"{url}: process exited with {proc.returncode}")
+            try:
+                if (await c.get(url, timeout=2)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise SystemExit(f"{url} not ready after {timeout}s")
+
+def start_servers(a: argparse.Namespace) -> list[subprocess.Popen]:
+    stripe = subprocess.Popen(
+        [sys.executable, "-m", "app.fake_stripe", "--port", str(a.stripe_port), "--latency-ms", str(a.stripe_latency_ms)],
+        cwd=API_DIR,
+    )
+    env = {
+        **os.environ,
+        "STRIPE_API_BASE": f"http://127.0.0.1:{a.stripe_port}",
+        "STRIPE_SECRET_KEY": os.getenv("STRIPE_SECRET_KEY") or "sk_test_loadtest",
+        "STRIPE_WEBHOOK_SECRET": os.getenv("STRIPE_WEBHOOK_SECRET") or WEBHOOK_SECRET,
+    }
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(a.port),
+         "--workers", str(a.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=API_DIR, env=env,
+    )
+    return [stripe, api]
+
+async def main(a: argparse.Namespace) -> int:
+    procs: list[subprocess.Popen] = []
+    base_url = a.target or f"http://127.0.0.1:{a.port}"
+    try:
+        if not a.target:
+            procs = start_servers(a)
+            await _wait_ready(f"http://127.0.0.1:{a.stripe_port}/docs", procs[0])
+            await _wait_ready(f"{base_url}/healthz", procs[1])
+        limits = httpx.Limits(max_connections=a.concurrency + 10, max_keepalive_connections=a.concurrency + 10)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            ctx = await prepare(client, a)
+            # Let the background pollers (data versions, odds index, rollups) load before measuring
+            await asyncio.sleep(a.settle)
+            results = {"meta": {
+                "git_rev": _git_rev(), "python": platform.python_version(), "cpus": os.cpu_count(),
+                "workers": a.workers, "users": a.users, "seed": a.seed, "stripe_latency_ms": a.stripe_latency_ms,
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }, "mixes": {}}
+            for mix in a.mix or list(MIXES):
+                results["mixes"][mix] = await run_mix(ctx, mix, a.concurrency, a.warmup, a.duration, a.think_ms / 1000)
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+    print_report(results)
+    Path(a.out).write_text(json.dumps(results, indent=2) + "\n")
+    if a.write_baseline:
+        Path(a.baseline).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nbaseline written to {a.baseline}", file=sys.stderr)
+        return 0
+    if not Path(a.baseline).exists():
+        print(f"\nno baseline at {a.baseline}; rerun with --write-baseline to record one", file=sys.stderr)
+        return 0
+    problems = compare(results, json.loads(Path(a.baseline).read_text()), a.threshold, a.noise_ms, a.min_requests)
+    for p in problems:
+        print(f"REGRESSION {p}", file=sys.stderr)
+    print(f"\n{len(problems)} regression(s) vs {a.baseline} (threshold {a.threshold:.0%})", file=sys.stderr)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Load test the API and compare with a baseline")
+    ap.add_argument("--mix", action="append", choices=list(MIXES), help="Repeatable; default all")
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--duration", type=float, default=20)
+    ap.add_argument("--warmup", type=float, default=3)
+    ap.add_argument("--settle", type=float, default=3, help="Seconds to wait after startup before the first mix")
+    ap.add_argument("--think-ms", type=float, default=0, help="Mean pause between scenarios (0 = closed loop)")
+    ap.add_argument("--users", type=int, default=2000, help="Must match the seeded --users")
+    ap.add_argument("--seed", type=int, default=7, help="Must match the seeded --seed")
+    ap.add_argument("--target", help="Base URL of a running API; skip starting servers")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--stripe-port", type=int, default=12111)
+    ap.add_argument("--stripe-latency-ms", type=float, default=50)
+    ap.add_argument("--out", default=str(API_DIR / "loadtest_results.json"))
+    ap.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    ap.add_argument("--write-baseline", action="store_true")
+    ap.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression")
+    ap.add_argument("--noise-ms", type=float, default=2.0, help="Ignore latency regressions smaller than this")
+    ap.add_argument("--min-requests", type=int, default=50, help="Skip routes with fewer baseline samples")
+    sys.exit(asyncio.run(main(ap.parse_args())))
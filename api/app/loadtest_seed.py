@@ -0,0 +1,149 @@
+# api/app/loadtest_seed.py
+"""Deterministic dataset for load tests. Point DATABASE_URL at a scratch database: --reset truncates it.
+
+    python -m app.loadtest_seed --migrate --reset                     # defaults: 2000 users, 120 days x 15 games
+    python -m app.loadtest_seed --reset --users 20000 --days 180 --books 12 --ticks 20
+
+Every user has password LOADTEST_PASSWORD and an active subscription. Games run up to today (ET); past
+days have outcomes and are published to the archive chain, and accuracy rollups are rebuilt, so every
+read path the API serves has realistic data behind it. The same --seed always produces the same rows.
+"""
+from datetime import datetime, time as dtime, timedelta, timezone
+from pathlib import Path
+import argparse, asyncio, json, random, time, uuid
+
+from .config import settings
+from .odds_ingest import asyncpg_dsn
+from .slate import ET, today_et
+
+LOADTEST_PASSWORD = "loadtest-password"
+MODEL_VERSION = settings.MODEL_VERSION or "loadtest-v1"
+SQL_DIR = Path(__file__).resolve().parents[2] / "infra" / "sql"
+TEAMS = (
+    "ARI", "ATL", "BAL", "BOS", "CHC", "CWS", "CIN", "CLE", "COL", "DET", "HOU", "KC", "LAA", "LAD", "MIA",
+    "MIL", "MIN", "NYM", "NYY", "OAK", "PHI", "PIT", "SD", "SEA", "SF", "STL", "TB", "TEX", "TOR", "WSH",
+)
+
+def user_email(i: int) -> str:
+    return f"loadtest+{i}@example.test"
+
+def _uid(ns: uuid.UUID, *parts) -> uuid.UUID:
+    return uuid.uuid5(ns, ":".join(map(str, parts)))
+
+def _namespace(seed: int) -> uuid.UUID:
+    return uuid.uuid5(uuid.NAMESPACE_URL, f"predictiq-loadtest/{seed}")
+
+def user_id(seed: int, i: int) -> uuid.UUID:
+    return _uid(_namespace(seed), "user", i)
+
+async def migrate(conn) -> list[str]:
+    applied = []
+    for f in sorted(SQL_DIR.glob("*.sql")):
+        await conn.execute(f.read_text())
+        applied.append(f.name)
+    return applied
+
+def build_rows(users: int, days: int, games_per_day: int, books: int, ticks: int, seed: int, password_hash: str) -> dict:
+    rng = random.Random(seed)
+    ns = _namespace(seed)
+    now = datetime.now(tz=timezone.utc)
+    rows: dict[str, list[tuple]] = {k: [] for k in ("users", "subscriptions", "games", "predictions", "outcomes", "odds_snapshots")}
+    for i in range(users):
+        uid = _uid(ns, "user", i)
+        rows["users"].append((uid, user_email(i), now, password_hash))
+        rows["subscriptions"].append((
+            _uid(ns, "sub", i), uid, f"cus_lt_{i}", f"sub_lt_{i}", "monthly", "active", now + timedelta(days=30), now,
+        ))
+    today = today_et()
+    book_names = [f"book{b:02d}" for b in range(books)]
+    for d in range(days - 1, -1, -1):
+        day = today - timedelta(days=d)
+        teams = list(TEAMS)
+        rng.shuffle(teams)
+        for g in range(min(games_per_day, len(teams) // 2)):
+            gid = _uid(ns, "game", day, g)
+            home, away = teams[2 * g], teams[2 * g + 1]
+            start = datetime.combine(day, dtime(13 + g % 8, 5), tzinfo=ET)
+            p_home = min(max(rng.gauss(0.53, 0.08), 0.2), 0.8)
+            exp_total = round(rng.uniform(7.0, 10.5), 2)
+            home_runs = round(exp_total * (0.45 + 0.1 * p_home), 2)
+            line = round(rng.uniform(7.0, 10.0) * 2) / 2
+            rows["games"].append((gid, day, "MLB", home, away, f"{home} Park", start, None, line, None))
+            rows["predictions"].append((
+                _uid(ns, "pred", gid), gid, MODEL_VERSION, round(p_home, 4), exp_total, home_runs,
+                round(exp_total - home_runs, 2), round(abs(p_home - 0.5) * 2, 4), start - timedelta(hours=6),
+            ))
+            for b, book in enumerate(book_names):
+                fair = p_home + rng.gauss(0, 0.02)
+                for t in range(ticks):
+                    fair = min(max(fair + rng.gauss(0, 0.005), 0.15), 0.85)
+                    vig = 1.045
+                    rows["odds_snapshots"].append((
+                        _uid(ns, "odds", gid, b, t), gid, book, start - timedelta(hours=ticks - t),
+                        round(1 / (fair * vig), 3), round(1 / ((1 - fair) * vig), 3), line, 1.91, 1.91,
+                    ))
+            if d > 0:
+                hr, ar = rng.randint(0, 11), rng.randint(0, 11)
+                if hr == ar:
+                    hr += 1
+                rows["outcomes"].append((
+                    _uid(ns, "outcome", gid), gid, hr, ar, "HOME" if hr > ar else "AWAY", start + timedelta(hours=3), "loadtest",
+                ))
+    return rows
+
+COPY_COLUMNS = {
+    "users": ("id", "email", "created_at", "password_hash"),
+    "subscriptions": ("id", "user_id", "stripe_customer_id", "stripe_sub_id", "plan", "status", "current_period_end", "updated_at"),
+    "games": ("id", "game_date", "league", "home_abbr", "away_abbr", "venue", "start_time_et", "sportsbook_line_home_ml", "sportsbook_total", "park_factor"),
+    "predictions": ("id", "game_id", "model_version", "p_home_win", "expected_total", "pred_home_runs", "pred_away_runs", "confidence", "created_at"),
+    "outcomes": ("id", "game_id", "actual_home_runs", "actual_away_runs", "winner", "closed_at", "source"),
+    "odds_snapshots": ("id", "game_id", "book", "ts", "home_ml_decimal", "away_ml_decimal", "total", "over_price_dec", "under_price_dec"),
+}
+
+async def seed(a: argparse.Namespace) -> dict:
+    import asyncpg
+    from .auth import hash_password
+    from .archive_chain import publish_day
+    from .db import SessionLocal
+    from .rollups import rebuild
+
+    started = time.perf_counter()
+    conn = await asyncpg.connect(asyncpg_dsn(settings.DATABASE_URL))
+    try:
+        applied = await migrate(conn) if a.migrate else []
+        if a.reset:
+            await conn.execute("TRUNCATE users, games, stripe_events, archive_checkpoints, accuracy_rollups, accuracy_rollup_inputs CASCADE")
+        elif await conn.fetchval("SELECT EXISTS (SELECT 1 FROM users)"):
+            raise SystemExit("database already has users; pass --reset to truncate it first")
+        rows = build_rows(a.users, a.days, a.games_per_day, a.books, a.ticks, a.seed, hash_password(LOADTEST_PASSWORD))
+        async with conn.transaction():
+            for table, cols in COPY_COLUMNS.items():
+                await conn.copy_records_to_table(table, records=rows[table], columns=list(cols))
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+
+    async with SessionLocal() as db:
+        days = sorted({r[1] for r in rows["games"]})
+        for day in days:
+            await publish_day(db, day)
+        settled = await rebuild(db)
+    return {
+        "migrations": applied, **{t: len(r) for t, r in rows.items()}, "archived_days": len(days),
+        "rollup_outcomes": settled, "elapsed_s": round(time.perf_counter() - started, 2),
+    }
+
+def add_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--days", type=int, default=120)
+    ap.add_argument("--games-per-day", type=int, default=15)
+    ap.add_argument("--books", type=int, default=8)
+    ap.add_argument("--ticks", type=int, default=6, help="Odds snapshots per game and book")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--migrate", action="store_true", help="Apply infra/sql/*.sql first (all are idempotent)")
+    ap.add_argument("--reset", action="store_true", help="Truncate users, games and dependent tables first")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Seed a scratch database for load tests")
+    add_args(ap)
+    print(json.dumps(asyncio.run(seed(ap.parse_args()))))
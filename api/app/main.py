@@ -1,4 +1,6 @@
 # api/app/main.py
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -7,23 +9,90 @@ from .routers_auth import router as auth_router
 from .routers_billing import router as billing_router, webhooks as billing_webhooks
 from .routers_predictions import router as predictions_router
 from .routers_parlay import router as parlay_router
+from .routers_odds import router as odds_router
+from .routers_archive import router as archive_router
+from .principal_cache import principal_cache
+from .hashing import hashing_pool
+from .rollups import accuracy_snapshot, rollup_applier
+from .simulation import shutdown_pool as shutdown_sim_pool
+from .odds_index import odds_index
+from .stripe_events import stripe_event_worker
+from .stripe_client import stripe_gateway
+from .instrumentation import InstrumentationMiddleware, router as metrics_router
+from .metrics import run_loop_lag_sampler
+from .response_cache import data_versions, response_cache
+from .live import live_hub
+from .routers_live import router as live_router
+from .routers_backtest import router as backtest_router
+from .backtest import backtest_cache
+from .routers_seasons import router as seasons_router
+from .season_store import season_store
+from .routers_teams import router as teams_router
+from .team_features import team_feature_store
+from .audit import audit_log
+from .routers_api_keys import router as api_keys_router
+from .api_keys import api_key_index
+from .routers_parlays import router as parlays_router
+from .parlays import parlay_settler
+from .market import market_engine
+from .admission import AdmissionMiddleware, admission
 
-app = FastAPI(title="PredictIQ Sports API", version="0.3.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [
+        asyncio.create_task(accuracy_snapshot.run_refresher(settings.ACCURACY_REFRESH_SECONDS)),
+        asyncio.create_task(odds_index.run(settings.ODDS_INDEX_POLL_SECONDS)),
+        asyncio.create_task(stripe_event_worker.run(settings.STRIPE_EVENTS_POLL_SECONDS)),
+        asyncio.create_task(run_loop_lag_sampler(settings.LOOP_LAG_SAMPLE_SECONDS)),
+        asyncio.create_task(data_versions.run(settings.DATA_VERSION_POLL_SECONDS)),
+        asyncio.create_task(live_hub.run()),
+        asyncio.create_task(team_feature_store.run(settings.TEAM_FEATURES_POLL_SECONDS)),
+        asyncio.create_task(api_key_index.run(settings.API_KEY_INDEX_POLL_SECONDS)),
+        asyncio.create_task(parlay_settler.run(settings.PARLAY_SETTLE_POLL_SECONDS)),
+        asyncio.create_task(rollup_applier.run(settings.ROLLUP_APPLY_POLL_SECONDS)),
+    ]
+    audit_task = asyncio.create_task(audit_log.run())
+    yield
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await api_key_index.close()
+    # After the other tasks stop, so the stripe worker's last events are in the buffer too
+    await audit_log.close(settings.AUDIT_SHUTDOWN_SECONDS)
+    audit_task.cancel()
+    await asyncio.gather(audit_task, return_exceptions=True)
+    shutdown_sim_pool()
+    await stripe_gateway.close()
 
+app = FastAPI(title="PredictIQ Sports API", version="0.3.0", lifespan=lifespan)
+
+# Innermost of the three: CORS headers still reach 503s, and sheds are counted in the request metrics
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+app.add_middleware(InstrumentationMiddleware)
 
 app.include_router(auth_router)
+app.include_router(api_keys_router)
 app.include_router(billing_router)
 app.include_router(billing_webhooks)
 app.include_router(predictions_router)
 app.include_router(parlay_router)
+app.include_router(parlays_router)
+app.include_router(odds_router)
+app.include_router(archive_router)
+app.include_router(live_router)
+app.include_router(backtest_router)
+app.include_router(seasons_router)
+app.include_router(teams_router)
+app.include_router(metrics_router)
 
 @app.get("/healthz")
 async def healthz():
-    return {"ok": True, "version": "0.3.0"}
+    return {"ok": True, "version": "0.3.0", "principal_cache": principal_cache.stats(), "password_hashing": hashing_pool.stats(), "odds_index": odds_index.stats(), "stripe_events": stripe_event_worker.stats(), "stripe_api": stripe_gateway.stats(), "response_cache": response_cache.stats(), "live": live_hub.stats(), "backtest": backtest_cache.stats(), "season_store": season_store.stats(), "team_features": team_feature_store.stats(), "audit": audit_log.stats(), "api_keys": api_key_index.stats(), "parlay_settlement": parlay_settler.stats(), "market": market_engine.stats(), "admission": admission.stats(), "accuracy_rollups": rollup_applier.stats()}
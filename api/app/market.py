@@ -0,0 +1,191 @@
+# api/app/market.py
+"""Vig-free market probabilities from every book's latest prices.
+
+Each (game, book) line in the odds index is one row of a two-way price matrix (home/away ML, over/under),
+so removing the margin for all books of all games is a few numpy passes:
+  - multiplicative: scale the implied probabilities to sum to 1;
+  - power: p_i = q_i ** k, with k solved so the row sums to 1 (moves more margin onto longshots);
+  - shin: Shin's insider model, solving the insider share z per row.
+k and z are found by bisection over all rows at once. Rows without a margin (implied sum <= 1) are only normalized.
+
+A game's consensus is the mean of its books' fair probabilities; for totals, over the books at the most
+common line. Snapshots are cached per method and rebuilt only when odds_index.applied moves, so slate-wide
+EV/edge screens between two odds ticks are array indexing on an existing snapshot.
+"""
+from dataclasses import dataclass
+from typing import Optional
+import time, uuid
+
+import numpy as np
+
+from .config import settings
+from .odds_index import PRICE_FIELDS, Line, odds_index
+
+METHODS = ("multiplicative", "power", "shin")
+_ITERS = 40  # bisection halvings: k to ~1e-10, z to ~1e-12
+
+def _bisect(f, lo: float, hi: float, n: int) -> np.ndarray:
+    """Root of a per-row decreasing function f over [lo, hi], for n rows in parallel."""
+    lo, hi = np.full(n, lo), np.full(n, hi)
+    for _ in range(_ITERS):
+        mid = (lo + hi) / 2.0
+        above = f(mid) > 0.0
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+    return (lo + hi) / 2.0
+
+def devig(q: np.ndarray, method: str) -> np.ndarray:
+    """Fair probabilities for rows of implied probabilities q (rows x outcomes, 1/decimal price; NaN rows stay NaN)."""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    booksum = q.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore"):
+        fair = q / booksum
+    over = booksum[:, 0] > 1.0
+    if method == "multiplicative" or not over.any():
+        return fair
+    r, s = q[over], booksum[over]
+    if method == "power":
+        k = _bisect(lambda k: (r ** k[:, None]).sum(axis=1) - 1.0, 1.0, 50.0, len(r))
+        p = r ** k[:, None]
+    else:
+        def shin(z):
+            z = z[:, None]
+            return (np.sqrt(z * z + 4.0 * (1.0 - z) * r * r / s) - z) / (2.0 * (1.0 - z))
+        p = shin(_bisect(lambda z: shin(z).sum(axis=1) - 1.0, 0.0, 0.99, len(r)))
+    fair[over] = p / p.sum(axis=1, keepdims=True)  # absorb what's left of the bisection
+    return fair
+
+def _mean_by(group: np.ndarray, values: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    ok = np.isfinite(values)
+    count = np.bincount(group[ok], minlength=n)
+    total = np.bincount(group[ok], weights=values[ok], minlength=n)
+    with np.errstate(invalid="ignore"):
+        return total / count, count
+
+def _modal_line(group: np.ndarray, line: np.ndarray, n: int) -> np.ndarray:
+    """Most common total per game (ties: the lower line); NaN for games without one."""
+    out = np.full(n, np.nan)
+    ok = np.isfinite(line)
+    if not ok.any():
+        return out
+    g, l = group[ok], line[ok]
+    o = np.lexsort((l, g))
+    g, l = g[o], l[o]
+    new = np.ones(g.size, dtype=bool)
+    new[1:] = (g[1:] != g[:-1]) | (l[1:] != l[:-1])
+    starts = np.flatnonzero(new)
+    counts = np.diff(np.append(starts, g.size))
+    g, l = g[starts], l[starts]
+    order = np.lexsort((-counts, g))       # stable, so ties keep the lower line
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = g[order[1:]] != g[order[:-1]]
+    out[g[order[first]]] = l[order[first]]
+    return out
+
+@dataclass
+class MarketSnapshot:
+    method: str
+    version: int                 # odds_index.applied when built
+    built_ms: float
+    game_ids: list[uuid.UUID]
+    index: dict[uuid.UUID, int]
+    # one entry per (game, book) line
+    row_game: np.ndarray         # index into game_ids
+    books: list[str]
+    prices: np.ndarray           # rows x PRICE_FIELDS, NaN if missing
+    fair_home: np.ndarray        # NaN unless the book prices both sides
+    fair_over: np.ndarray        # at the book's own total
+    # one entry per game
+    n_ml: np.ndarray
+    p_home: np.ndarray           # consensus fair P(home win)
+    total: np.ndarray            # most common line
+    n_total: np.ndarray
+    p_over: np.ndarray           # consensus fair P(over) at `total`
+
+    def fair(self, game_id, market: str, selection: str, line: Optional[float] = None) -> Optional[float]:
+        """Consensus fair probability of one leg; None if the game or market isn't priced (or the total is off the consensus line)."""
+        try:
+            i = self.index.get(uuid.UUID(str(game_id)))
+        except ValueError:
+            return None
+        if i is None:
+            return None
+        market, selection = (market or "").strip().upper(), (selection or "").strip().upper()
+        if market == "ML" and selection in ("HOME", "AWAY"):
+            p = self.p_home[i] if selection == "HOME" else 1.0 - self.p_home[i]
+        elif market == "TOTAL" and selection in ("OVER", "UNDER") and line is not None and line == self.total[i]:
+            p = self.p_over[i] if selection == "OVER" else 1.0 - self.p_over[i]
+        else:
+            return None
+        return None if np.isnan(p) else float(p)
+
+    def edges(self, game_ids: list[uuid.UUID], p_model: np.ndarray) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Model vs market for these games: (snapshot row per game or -1, per-book columns for their lines).
+        Per book: fair P(home), the model's edge over it, and EV per unit staked on each side at that book's price.
+        """
+        pos = np.fromiter((self.index.get(g, -1) for g in game_ids), dtype=np.int64, count=len(game_ids))
+        slot = np.full(len(self.game_ids), -1, dtype=np.int64)
+        slot[pos[pos >= 0]] = np.flatnonzero(pos >= 0)
+        rows = np.flatnonzero(slot[self.row_game] >= 0)
+        g = slot[self.row_game[rows]]
+        pm = p_model[g]
+        return pos, {
+            "game": g,
+            "row": rows,
+            "fair_home": self.fair_home[rows],
+            "edge_home": pm - self.fair_home[rows],
+            "ev_home": pm * self.prices[rows, 0] - 1.0,
+            "ev_away": (1.0 - pm) * self.prices[rows, 1] - 1.0,
+        }
+
+def build(latest: dict[uuid.UUID, dict[str, Line]], method: str, version: int = 0) -> MarketSnapshot:
+    started = time.perf_counter()
+    game_ids = list(latest)
+    lines = [(i, l) for i, g in enumerate(game_ids) for l in latest[g].values()]
+    n = len(game_ids)
+    row_game = np.fromiter((i for i, _ in lines), dtype=np.int64, count=len(lines))
+    # None -> NaN on the float64 cast
+    prices = np.array([(l.home_ml_decimal, l.away_ml_decimal, l.total, l.over_price_dec, l.under_price_dec) for _, l in lines],
+                      dtype=np.float64).reshape(len(lines), len(PRICE_FIELDS))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = np.where(prices > 1.0, 1.0 / prices, np.nan)
+    fair_home = devig(q[:, [0, 1]], method)[:, 0]
+    fair_over = devig(q[:, [3, 4]], method)[:, 0]
+    fair_over[~np.isfinite(prices[:, 2])] = np.nan
+    p_home, n_ml = _mean_by(row_game, fair_home, n)
+    total = _modal_line(row_game, np.where(np.isfinite(fair_over), prices[:, 2], np.nan), n)
+    p_over, n_total = _mean_by(row_game, np.where(prices[:, 2] == total[row_game], fair_over, np.nan), n)
+    return MarketSnapshot(
+        method, version, (time.perf_counter() - started) * 1000, game_ids, {g: i for i, g in enumerate(game_ids)},
+        row_game, [l.book for _, l in lines], prices, fair_home, fair_over, n_ml, p_home, total, n_total, p_over,
+    )
+
+class MarketEngine:
+    def __init__(self, method: str):
+        if method not in METHODS:
+            raise ValueError(f"MARKET_DEVIG_METHOD must be one of {', '.join(METHODS)}, not {method!r}")
+        self.method = method
+        self._snapshots: dict[str, MarketSnapshot] = {}
+        self.builds = 0
+        self.hits = 0
+
+    def snapshot(self, method: Optional[str] = None) -> MarketSnapshot:
+        """The snapshot for the odds index's current version, rebuilt only if the index has moved."""
+        method = method or self.method
+        snap = self._snapshots.get(method)
+        if snap is not None and snap.version == odds_index.applied:
+            self.hits += 1
+            return snap
+        snap = self._snapshots[method] = build(odds_index.latest, method, odds_index.applied)
+        self.builds += 1
+        return snap
+
+    def stats(self) -> dict:
+        return {
+            "method": self.method, "builds": self.builds, "hits": self.hits,
+            "snapshots": {m: {"version": s.version, "games": len(s.game_ids), "lines": len(s.books), "built_ms": round(s.built_ms, 3)}
+                          for m, s in self._snapshots.items()},
+        }
+
+market_engine = MarketEngine(settings.MARKET_DEVIG_METHOD)
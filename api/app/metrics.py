@@ -0,0 +1,152 @@
+# api/app/metrics.py
+from bisect import bisect_left
+from typing import Callable, Optional, Sequence
+import asyncio
+
+# Seconds; spans sub-millisecond handlers up to the multi-second Stripe/DB tail
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus semantics: bucket i counts observations <= bounds[i])."""
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (None if empty, inf past the last bound)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "p50_le": self.quantile(0.5),
+            "p95_le": self.quantile(0.95),
+            "p99_le": self.quantile(0.99),
+        }
+
+def _fmt(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v))
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = ['%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class HistogramFamily:
+    """Histograms sharing a name, one per label-value tuple."""
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help, tuple(labelnames), tuple(buckets)
+        self.children: dict[tuple, Histogram] = {}
+
+    def labels(self, *values) -> Histogram:
+        h = self.children.get(values)
+        if h is None:
+            h = self.children[values] = Histogram(self.buckets)
+        return h
+
+    def attach(self, values: tuple, hist: Histogram) -> Histogram:
+        # Export a Histogram some component already owns
+        self.children[values] = hist
+        return hist
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, h in list(self.children.items()):
+            cum = 0
+            for bound, c in zip(h.bounds + (float("inf"),), h.counts):
+                cum += c
+                le = 'le="%s"' % _fmt(bound)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cum}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_fmt(h.sum)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, values)} {h.count}")
+        return out
+
+class CounterFamily:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, values: tuple = (), amount: float = 1.0) -> None:
+        self.values[values] = self.values.get(values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        out += [f"{self.name}{_labels(self.labelnames, v)} {_fmt(n)}" for v, n in list(self.values.items())]
+        return out
+
+class GaugeFunc:
+    """Gauge read at scrape time; fn returns a number or {label-values tuple: number}."""
+    def __init__(self, name: str, help: str, fn: Callable[[], float | dict], labelnames: Sequence[str] = ()):
+        self.name, self.help, self.fn, self.labelnames = name, help, fn, tuple(labelnames)
+
+    def render(self) -> list[str]:
+        try:
+            v = self.fn()
+        except Exception:
+            return []
+        samples = v.items() if isinstance(v, dict) else [((), v)]
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        out += [f"{self.name}{_labels(self.labelnames, k)} {_fmt(x)}" for k, x in samples if x is not None]
+        return out
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, HistogramFamily | CounterFamily | GaugeFunc] = {}
+
+    def _add(self, m):
+        # Idempotent by name so module reloads / repeated setup don't duplicate series
+        return self.metrics.setdefault(m.name, m)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> HistogramFamily:
+        return self._add(HistogramFamily(name, help, labelnames, buckets))
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> CounterFamily:
+        return self._add(CounterFamily(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float | dict], labelnames: Sequence[str] = ()) -> GaugeFunc:
+        return self._add(GaugeFunc(name, help, fn, labelnames))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for m in list(self.metrics.values()):
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# ---------------- event-loop lag ----------------
+
+LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds", "Scheduling delay of a periodic loop timer",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+).labels()
+_last_lag = [0.0]
+registry.gauge("event_loop_lag_last_seconds", "Most recent event-loop lag sample", lambda: _last_lag[0])
+
+async def run_loop_lag_sampler(interval: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        t = loop.time()
+        await asyncio.sleep(interval)
+        _last_lag[0] = max(0.0, loop.time() - t - interval)
+        LOOP_LAG.observe(_last_lag[0])
+
+def last_loop_lag() -> float:
+    return _last_lag[0]
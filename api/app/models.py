@@ -1,6 +1,6 @@
 # api/app/models.py
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Text, TIMESTAMP, ForeignKey, Integer, Numeric, JSON, Date
+from sqlalchemy import String, Text, TIMESTAMP, ForeignKey, Integer, BigInteger, Numeric, JSON, Date
 from sqlalchemy.dialects.postgresql import UUID
 from typing import Optional
 import uuid
@@ -16,6 +16,24 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
     password_hash: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    token_hash: Mapped[str] = mapped_column(Text, unique=True, nullable=False)
+    name: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    prefix: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    request_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_used_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+
+class LiveStreamTicket(Base):
+    __tablename__ = "live_stream_tickets"
+    ticket_hash: Mapped[str] = mapped_column(Text, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
 class Subscription(Base):
     __tablename__ = "subscriptions"
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -27,6 +45,17 @@ class Subscription(Base):
     current_period_end: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
 
+class StripeEvent(Base):
+    __tablename__ = "stripe_events"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    stripe_event_id: Mapped[Optional[str]] = mapped_column(Text, unique=True, nullable=True)
+    type: Mapped[str] = mapped_column(Text, nullable=False)
+    payload_json: Mapped[dict] = mapped_column(JSON, nullable=False)
+    received_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    processed_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
 class Game(Base):
     __tablename__ = "games"
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
@@ -35,6 +64,11 @@ class Game(Base):
     home_abbr: Mapped[str] = mapped_column(Text, nullable=False)
     away_abbr: Mapped[str] = mapped_column(Text, nullable=False)
     venue: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    start_time_et: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    sportsbook_line_home_ml: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    sportsbook_total: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    park_factor: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    weather_json: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
 class Prediction(Base):
     __tablename__ = "predictions"
@@ -47,6 +81,7 @@ class Prediction(Base):
     pred_away_runs: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
     confidence: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
     extras_json: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
 
 class Outcome(Base):
     __tablename__ = "outcomes"
@@ -57,3 +92,90 @@ class Outcome(Base):
     winner: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     closed_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     source: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+class PredictionArchive(Base):
+    __tablename__ = "prediction_archive"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    published_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    game_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
+    model_version_snapshot: Mapped[str] = mapped_column(Text, nullable=False)
+    p_home_win: Mapped[float] = mapped_column(Numeric, nullable=False)
+    expected_total: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    pred_home_runs: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    pred_away_runs: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    confidence: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    raw_json: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    sha256_chain: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    chain_seq: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True, unique=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+class OddsSnapshot(Base):
+    __tablename__ = "odds_snapshots"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    game_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
+    book: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    ts: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    home_ml_decimal: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    away_ml_decimal: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    total: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    over_price_dec: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    under_price_dec: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    inserted_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)  # DB default clock_timestamp() (0014)
+
+class Parlay(Base):
+    __tablename__ = "parlays"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    stake_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(Text, nullable=False, default="draft")
+    expected_value_cents: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    combined_decimal_odds: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    source: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    settled_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    payout_cents: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    pnl_cents: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+
+class ParlayLeg(Base):
+    __tablename__ = "parlay_legs"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    parlay_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("parlays.id", ondelete="CASCADE"), nullable=False)
+    game_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
+    market: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    selection: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    line: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    price_decimal: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    leg_probability: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    correlated_group_id: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    result: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    settled_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+
+class AccuracyRollup(Base):
+    __tablename__ = "accuracy_rollups"
+    window: Mapped[str] = mapped_column(Text, primary_key=True)
+    as_of_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    win_pct: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    roi_pct: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    avg_confidence: Mapped[Optional[float]] = mapped_column(Numeric, nullable=True)
+    n_picks: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    n_wins: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    n_priced: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    profit_units: Mapped[float] = mapped_column(Numeric, nullable=False, default=0)
+    n_confidence: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    confidence_sum: Mapped[float] = mapped_column(Numeric, nullable=False, default=0)
+
+class ArchiveCheckpoint(Base):
+    __tablename__ = "archive_checkpoints"
+    seq: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    sha256_chain: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+class AuditLog(Base):
+    __tablename__ = "audit_log"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    actor: Mapped[str] = mapped_column(Text, nullable=False)
+    action: Mapped[str] = mapped_column(Text, nullable=False)
+    entity: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    entity_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    ts: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    details_json: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
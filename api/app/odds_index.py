@@ -0,0 +1,221 @@
+# api/app/odds_index.py
+"""In-process index over odds_snapshots.
+
+- latest[game_id][book] -> the newest snapshot for that (game, book): O(1) current price / best price.
+- movement[game_id] -> fixed-capacity ring buffer of every accepted snapshot for the game
+  (float64 ts, int32 dictionary-encoded book, float32 prices), so line history costs ~40 bytes/tick.
+
+Warmed from the DB at startup, then kept current by a poller that reads rows past an inserted_at watermark
+(with a small lookback for transactions that commit after later inserts; see 0014) and by any in-process OddsIngestor hook. Reads never touch Postgres.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+import asyncio, logging, time, uuid
+
+import numpy as np
+from sqlalchemy import func, select
+
+from .config import settings
+from .db import SessionLocal
+from .models import Game, OddsSnapshot
+
+log = logging.getLogger(__name__)
+
+PRICE_FIELDS = ("home_ml_decimal", "away_ml_decimal", "total", "over_price_dec", "under_price_dec")
+
+@dataclass(frozen=True)
+class Line:
+    book: str
+    ts: datetime
+    home_ml_decimal: Optional[float]
+    away_ml_decimal: Optional[float]
+    total: Optional[float]
+    over_price_dec: Optional[float]
+    under_price_dec: Optional[float]
+
+    def as_dict(self) -> dict:
+        return {"book": self.book, "ts": self.ts.isoformat(), **{f: getattr(self, f) for f in PRICE_FIELDS}}
+
+class MovementRing:
+    __slots__ = ("ts", "book", "prices", "n", "head")
+
+    def __init__(self, capacity: int):
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.book = np.zeros(capacity, dtype=np.int32)
+        self.prices = np.full((capacity, len(PRICE_FIELDS)), np.nan, dtype=np.float32)
+        self.n = 0
+        self.head = 0
+
+    def append(self, ts: float, book: int, prices: tuple) -> None:
+        i = self.head
+        self.ts[i] = ts
+        self.book[i] = book
+        self.prices[i] = [np.nan if p is None else p for p in prices]
+        cap = self.ts.size
+        self.head = (i + 1) % cap
+        self.n = min(self.n + 1, cap)
+
+    def view(self, since: Optional[float] = None, book: Optional[int] = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        idx = np.arange(self.n) if self.n < self.ts.size else (np.arange(self.n) + self.head) % self.n
+        idx = idx[np.argsort(self.ts[idx], kind="stable")]
+        mask = np.ones(idx.size, dtype=bool)
+        if since is not None:
+            mask &= self.ts[idx] >= since
+        if book is not None:
+            mask &= self.book[idx] == book
+        idx = idx[mask]
+        return self.ts[idx], self.book[idx], self.prices[idx]
+
+def _f(v) -> Optional[float]:
+    return float(v) if v is not None else None
+
+class OddsIndex:
+    def __init__(self, ring_capacity: int):
+        self.ring_capacity = ring_capacity
+        self.latest: dict[uuid.UUID, dict[str, Line]] = {}
+        self.movement: dict[uuid.UUID, MovementRing] = {}
+        self.book_codes: dict[str, int] = {}
+        self.book_names: list[str] = []
+        self.watermark: Optional[datetime] = None           # newest feed ts applied
+        self.inserted_watermark: Optional[datetime] = None  # newest odds_snapshots.inserted_at read
+        self.ready = False
+        self.applied = 0
+        self.ignored_stale = 0
+
+    def _book_code(self, book: str) -> int:
+        code = self.book_codes.get(book)
+        if code is None:
+            code = self.book_codes[book] = len(self.book_names)
+            self.book_names.append(book)
+        return code
+
+    def apply(self, game_id: uuid.UUID, book: Optional[str], ts: datetime, prices: tuple) -> bool:
+        """Fold one snapshot in. Idempotent: anything not newer than the stored line for (game, book) is ignored."""
+        book = book or "unknown"
+        per_game = self.latest.setdefault(game_id, {})
+        cur = per_game.get(book)
+        if cur is not None and ts <= cur.ts:
+            self.ignored_stale += 1
+            return False
+        prices = tuple(_f(p) for p in prices)
+        per_game[book] = Line(book, ts, *prices)
+        ring = self.movement.get(game_id)
+        if ring is None:
+            ring = self.movement[game_id] = MovementRing(self.ring_capacity)
+        ring.append(ts.timestamp(), self._book_code(book), prices)
+        if self.watermark is None or ts > self.watermark:
+            self.watermark = ts
+        self.applied += 1
+        return True
+
+    async def apply_records(self, records: Iterable[tuple]) -> None:
+        """OddsIngestor hook: records are (game_id, book, ts, *prices) in odds_ingest.COLUMNS order."""
+        for r in records:
+            self.apply(r[0], r[1], r[2], r[3:])
+
+    # ---- reads (memory only) ----
+    def lines(self, game_id: uuid.UUID) -> list[Line]:
+        return sorted(self.latest.get(game_id, {}).values(), key=lambda l: l.book)
+
+    def best(self, game_id: uuid.UUID) -> Optional[dict]:
+        per_game = self.latest.get(game_id)
+        if not per_game:
+            return None
+        out: dict = {"game_id": str(game_id), "books": len(per_game)}
+        for side in ("home_ml_decimal", "away_ml_decimal", "over_price_dec", "under_price_dec"):
+            top = max((l for l in per_game.values() if getattr(l, side) is not None), key=lambda l: getattr(l, side), default=None)
+            if top is None:
+                out[side] = None
+            elif side in ("over_price_dec", "under_price_dec"):
+                # Best price regardless of line; the line it was offered at comes with it
+                out[side] = {"price": getattr(top, side), "book": top.book, "total": top.total}
+            else:
+                out[side] = {"price": getattr(top, side), "book": top.book}
+        return out
+
+    def movement_for(self, game_id: uuid.UUID, since: Optional[datetime] = None, book: Optional[str] = None) -> Optional[dict]:
+        ring = self.movement.get(game_id)
+        if ring is None:
+            return None
+        code = self.book_codes.get(book) if book else None
+        if book and code is None:
+            return {"game_id": str(game_id), "ts": [], "book": [], **{f: [] for f in PRICE_FIELDS}}
+        ts, books, prices = ring.view(since.timestamp() if since else None, code)
+        cols = np.where(np.isnan(prices), None, np.round(prices.astype(np.float64), 4)).T
+        return {
+            "game_id": str(game_id),
+            "ts": [datetime.fromtimestamp(t, tz=timezone.utc).isoformat() for t in ts],
+            "book": [self.book_names[b] for b in books],
+            **{f: cols[i].tolist() for i, f in enumerate(PRICE_FIELDS)},
+        }
+
+    def prune(self, older_than: datetime) -> int:
+        stale = [g for g, per in self.latest.items() if max(l.ts for l in per.values()) < older_than]
+        for g in stale:
+            self.latest.pop(g, None)
+            self.movement.pop(g, None)
+        return len(stale)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready, "games": len(self.latest), "books": len(self.book_names),
+            "applied": self.applied, "ignored_stale": self.ignored_stale,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "inserted_watermark": self.inserted_watermark.isoformat() if self.inserted_watermark else None,
+        }
+
+    # ---- DB sync (background task only) ----
+    async def _load(self, since: Optional[datetime]) -> int:
+        stmt = select(OddsSnapshot.game_id, OddsSnapshot.book, OddsSnapshot.ts, *(getattr(OddsSnapshot, f) for f in PRICE_FIELDS),
+                      OddsSnapshot.inserted_at)
+        if since is None:
+            stmt = stmt.join(Game, Game.id == OddsSnapshot.game_id).where(
+                Game.game_date >= (datetime.now(tz=timezone.utc) - timedelta(hours=settings.ODDS_INDEX_RETENTION_HOURS)).date()
+            ).order_by(OddsSnapshot.ts)
+        else:
+            stmt = stmt.where(OddsSnapshot.inserted_at > since).order_by(OddsSnapshot.inserted_at)
+        n = 0
+        async with SessionLocal() as db:
+            if since is None:
+                # Rows inserted while the warm runs are re-read by the first sync (apply is idempotent)
+                started = (await db.execute(select(func.clock_timestamp()))).scalar()
+            result = await db.stream(stmt.execution_options(yield_per=5000))
+            async for rows in result.partitions():
+                for r in rows:
+                    n += self.apply(r[0], r[1], r[2], r[3:-1])
+                    if r[-1] is not None and (self.inserted_watermark is None or r[-1] > self.inserted_watermark):
+                        self.inserted_watermark = r[-1]
+                await asyncio.sleep(0)
+        if since is None:
+            self.inserted_watermark = started
+        return n
+
+    async def warm(self) -> int:
+        n = await self._load(None)
+        if self.watermark is None:
+            self.watermark = datetime.now(tz=timezone.utc)
+        self.ready = True
+        return n
+
+    async def sync(self) -> int:
+        """Pull rows inserted past the watermark now (also called by the live hub when odds are NOTIFYed)."""
+        lookback = timedelta(seconds=settings.ODDS_INDEX_LOOKBACK_SECONDS)
+        return await self._load(self.inserted_watermark - lookback if self.inserted_watermark else None)
+
+    async def run(self, interval: float) -> None:
+        last_prune = time.monotonic()
+        while True:
+            try:
+                if not self.ready:
+                    log.info("odds index warmed with %d snapshots", await self.warm())
+                else:
+                    await self.sync()
+                if time.monotonic() - last_prune > 3600:
+                    self.prune(datetime.now(tz=timezone.utc) - timedelta(hours=settings.ODDS_INDEX_RETENTION_HOURS))
+                    last_prune = time.monotonic()
+            except Exception:
+                log.warning("odds index sync failed", exc_info=True)
+            await asyncio.sleep(interval)
+
+odds_index = OddsIndex(settings.ODDS_RING_CAPACITY)
@@ -0,0 +1,274 @@
+# api/app/odds_ingest.py
+"""Bulk odds_snapshots ingestion: parse a feed incrementally, drop unchanged prices per (game, book),
+and write large batches with asyncpg COPY.
+
+    python -m app.odds_ingest feed.jsonl            # JSONL, one snapshot per line ("-" = stdin)
+    python -m app.odds_ingest feed.csv              # CSV with a header row
+    python -m app.odds_ingest --synthetic 500000    # local stand-in feed
+    python -m app.odds_ingest --synthetic 2000000 --dry-run   # benchmark parse + dedup without a DB
+
+Records carry game_id, book, ts (ISO-8601 or epoch seconds; default now) and any of
+home_ml_decimal, away_ml_decimal, total, over_price_dec, under_price_dec.
+
+Pipeline: reader -> bounded queue of batches -> N COPY writers. When writers fall behind the
+queue fills and the reader blocks on put(), so memory stays at ~queue_batches * batch_size rows.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, TextIO
+import argparse, asyncio, csv, json, random, sys, time, uuid
+
+from .config import settings
+
+COLUMNS = ("game_id", "book", "ts", "home_ml_decimal", "away_ml_decimal", "total", "over_price_dec", "under_price_dec")
+PRICE_FIELDS = COLUMNS[3:]
+
+Record = tuple  # in COLUMNS order, typed for asyncpg COPY (UUID, str, datetime, Decimal...)
+BatchHook = Callable[[list[Record]], Awaitable[None]]
+
+class FeedError(ValueError):
+    pass
+
+def _dec(v) -> Optional[Decimal]:
+    if v is None or v == "":
+        return None
+    return Decimal(v) if isinstance(v, str) else Decimal(repr(v))
+
+def _ts(v) -> datetime:
+    if v is None or v == "":
+        return datetime.now(tz=timezone.utc)
+    if isinstance(v, (int, float)) or (isinstance(v, str) and v.replace(".", "", 1).isdigit()):
+        return datetime.fromtimestamp(float(v), tz=timezone.utc)
+    ts = datetime.fromisoformat(v.replace("Z", "+00:00"))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+_uuid_cache: dict[str, uuid.UUID] = {}
+
+def _game_uuid(v) -> uuid.UUID:
+    # A feed has few distinct games; parse each id once
+    u = _uuid_cache.get(v)
+    if u is None:
+        if len(_uuid_cache) > 100_000:
+            _uuid_cache.clear()
+        u = _uuid_cache[v] = uuid.UUID(str(v))
+    return u
+
+def to_record(d: dict) -> Record:
+    try:
+        return (_game_uuid(d["game_id"]), d.get("book") or None, _ts(d.get("ts")), *(_dec(d.get(f)) for f in PRICE_FIELDS))
+    except (KeyError, ValueError, ArithmeticError) as e:
+        raise FeedError(f"bad record {d!r}: {e}")
+
+def price_key(d: dict) -> tuple:
+    """Comparable price vector straight from the raw feed dict (JSON floats or CSV strings)."""
+    return tuple(None if (v := d.get(f)) is None or v == "" else float(v) for f in PRICE_FIELDS)
+
+def iter_jsonl(fh: TextIO) -> Iterator[Optional[dict]]:
+    # An unparseable line comes through as None and is counted as rejected, not fatal to the file
+    for line in fh:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+
+def iter_csv(fh: TextIO) -> Iterator[dict]:
+    yield from csv.DictReader(fh)
+
+def synthetic_feed(n: int, games: int = 15, books: int = 12, change_prob: float = 0.3, seed: int = 7) -> Iterator[dict]:
+    """Stand-in feed: every (game, book) ticks in turn and moves its price with probability change_prob."""
+    rng = random.Random(seed)
+    gids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(games)]
+    state = {(g, b): [1.91, 1.95, 8.5, 1.91, 1.91] for g in gids for b in range(books)}
+    keys = list(state)
+    t0 = time.time()
+    for i in range(n):
+        g, b = keys[i % len(keys)]
+        p = state[(g, b)]
+        if rng.random() < change_prob:
+            j = rng.randrange(5)
+            p[j] = round(p[j] + (0.5 if j == 2 else 0.01) * rng.choice((-1, 1)), 2)
+        yield {"game_id": g, "book": f"book{b}", "ts": t0 + i / 1000.0,
+               "home_ml_decimal": p[0], "away_ml_decimal": p[1], "total": p[2], "over_price_dec": p[3], "under_price_dec": p[4]}
+
+@dataclass
+class Deduper:
+    """Last seen price vector per (game_id, book). Runs on the raw dict, so unchanged ticks skip record conversion."""
+    last: dict = field(default_factory=dict)
+    dropped: int = 0
+
+    def changed(self, d: dict) -> Optional[tuple]:
+        """(key, prices) if d moves the price for its (game, book), else None. Nothing is recorded until keep()."""
+        key, prices = (str(d.get("game_id")), d.get("book") or None), price_key(d)
+        if self.last.get(key) == prices:
+            self.dropped += 1
+            return None
+        return key, prices
+
+    def keep(self, key: tuple, prices: tuple) -> None:
+        self.last[key] = prices
+
+@dataclass
+class IngestStats:
+    parsed: int = 0
+    rejected: int = 0
+    dropped_unchanged: int = 0
+    written: int = 0
+    batches: int = 0
+    backpressure_waits: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "parsed": self.parsed, "rejected": self.rejected, "dropped_unchanged": self.dropped_unchanged,
+            "written": self.written, "batches": self.batches, "backpressure_waits": self.backpressure_waits,
+            "elapsed_s": round(elapsed, 3),
+            "parsed_per_s": round(self.parsed / elapsed) if elapsed else None,
+            "written_per_s": round(self.written / elapsed) if elapsed else None,
+        }
+
+def asyncpg_dsn(url: str) -> str:
+    # SQLAlchemy URL -> plain libpq DSN for asyncpg
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+async def warm_deduper(dedup: Deduper, dsn: str) -> None:
+    """Seed dedup state with the latest stored price per (game, book) for recent games, so a restart doesn't rewrite them."""
+    import asyncpg
+    conn = await asyncpg.connect(dsn)
+    try:
+        rows = await conn.fetch("""
+            SELECT DISTINCT ON (s.game_id, s.book) s.game_id, s.book, s.home_ml_decimal, s.away_ml_decimal,
+                   s.total, s.over_price_dec, s.under_price_dec
+            FROM odds_snapshots s JOIN games g ON g.id = s.game_id
+            WHERE g.game_date >= current_date - 1
+            ORDER BY s.game_id, s.book, s.ts DESC
+        """)
+    finally:
+        await conn.close()
+    for r in rows:
+        dedup.last[(str(r["game_id"]), r["book"])] = tuple(None if r[f] is None else float(r[f]) for f in PRICE_FIELDS)
+
+class OddsIngestor:
+    def __init__(self, dsn: Optional[str], batch_size: int = 5000, flush_ms: float = 250, writers: int = 2,
+                 queue_batches: int = 8, hooks: Iterable[BatchHook] = ()):
+        self.dsn = dsn  # None = dry run (parse/dedup/batch only)
+        self.batch_size = batch_size
+        self.flush_s = flush_ms / 1000.0
+        self.writers = writers
+        self.queue: asyncio.Queue[Optional[list[Record]]] = asyncio.Queue(maxsize=queue_batches)
+        self.dedup = Deduper()
+        self.stats = IngestStats()
+        self.hooks = list(hooks)
+
+    async def _read(self, source: AsyncIterator[dict] | Iterable[dict]) -> None:
+        batch: list[Record] = []
+        deadline = time.monotonic() + self.flush_s
+        async for d in _aiter(source):
+            self.stats.parsed += 1
+            try:
+                if not isinstance(d, dict):
+                    raise FeedError(f"bad record {d!r}")
+                seen = self.dedup.changed(d)
+                if seen is None:
+                    continue
+                # Validate before recording the price, so a rejected tick doesn't mask the next good one
+                batch.append(to_record(d))
+                self.dedup.keep(*seen)
+            except (FeedError, TypeError, ValueError):
+                self.stats.rejected += 1
+                continue
+            # Flush on size, or on time so a slow live feed still lands promptly
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                await self._put(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_s
+        if batch:
+            await self._put(batch)
+        for _ in range(self.writers):
+            await self.queue.put(None)
+
+    async def _put(self, batch: list[Record]) -> None:
+        if self.queue.full():
+            self.stats.backpressure_waits += 1
+        await self.queue.put(batch)
+
+    async def _writer(self) -> None:
+        conn = None
+        if self.dsn:
+            import asyncpg
+            conn = await asyncpg.connect(self.dsn)
+        try:
+            while (batch := await self.queue.get()) is not None:
+                if conn is not None:
+                    await conn.copy_records_to_table("odds_snapshots", records=batch, columns=COLUMNS)
+                self.stats.written += len(batch)
+                self.stats.batches += 1
+                for hook in self.hooks:
+                    await hook(batch)
+        finally:
+            if conn is not None:
+                await conn.close()
+
+    async def run(self, source: AsyncIterator[dict] | Iterable[dict]) -> IngestStats:
+        """Ingest the whole source. A failing writer (COPY error, hook error) stops the run and is re-raised,
+        rather than leaving the reader blocked on a queue nobody drains.
+        """
+        tasks = [asyncio.create_task(self._read(source)), *(asyncio.create_task(self._writer()) for _ in range(self.writers))]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for t in done:
+                if t.exception() is not None:
+                    raise t.exception()
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.stats.dropped_unchanged = self.dedup.dropped
+        return self.stats
+
+async def _aiter(source) -> AsyncIterator[dict]:
+    if hasattr(source, "__aiter__"):
+        async for d in source:
+            yield d
+        return
+    # Yield to the loop every chunk so writers can drain while a sync iterator is parsed
+    for i, d in enumerate(source):
+        yield d
+        if i % 1000 == 999:
+            await asyncio.sleep(0)
+
+async def _main(a: argparse.Namespace) -> None:
+    dsn = None if a.dry_run else asyncpg_dsn(settings.DATABASE_URL)
+    ing = OddsIngestor(dsn, batch_size=a.batch_size, flush_ms=a.flush_ms, writers=a.writers, queue_batches=a.queue_batches)
+    if dsn and not a.no_warm:
+        await warm_deduper(ing.dedup, dsn)
+    if a.synthetic:
+        await ing.run(synthetic_feed(a.synthetic, change_prob=a.change_prob))
+    else:
+        fh = sys.stdin if a.path == "-" else open(a.path, newline="")
+        try:
+            is_csv = a.format == "csv" or (a.format is None and a.path.endswith(".csv"))
+            await ing.run(iter_csv(fh) if is_csv else iter_jsonl(fh))
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+    print(json.dumps(ing.stats.summary()))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Bulk-load odds snapshots")
+    ap.add_argument("path", nargs="?", help="JSONL/CSV file, or - for stdin")
+    ap.add_argument("--format", choices=("jsonl", "csv"))
+    ap.add_argument("--synthetic", type=int, help="Generate N stand-in feed records instead of reading a file")
+    ap.add_argument("--change-prob", type=float, default=0.3)
+    ap.add_argument("--batch-size", type=int, default=5000)
+    ap.add_argument("--flush-ms", type=float, default=250)
+    ap.add_argument("--writers", type=int, default=2)
+    ap.add_argument("--queue-batches", type=int, default=8)
+    ap.add_argument("--dry-run", action="store_true", help="Parse, dedup and batch without writing")
+    ap.add_argument("--no-warm", action="store_true", help="Skip seeding dedup state from the DB")
+    args = ap.parse_args()
+    if not args.path and not args.synthetic:
+        ap.error("give a feed path or --synthetic N")
+    asyncio.run(_main(args))
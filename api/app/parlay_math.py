@@ -0,0 +1,65 @@
+# api/app/parlay_math.py
+"""Array parlay math (price conversion, combined odds, EV) for routers_parlay / routers_predictions.
+
+All legs of all parlays in a batch are flattened into one array; per-parlay products are taken
+with np.multiply.reduceat over the leg offsets, so a batch costs a handful of numpy passes
+instead of one Python loop per leg.
+"""
+from dataclasses import dataclass
+import numpy as np
+
+class BatchValidationError(ValueError):
+    pass
+
+def american_to_decimal_arr(a: np.ndarray) -> np.ndarray:
+    return np.where(a > 0, 1.0 + a / 100.0, 1.0 + 100.0 / np.abs(a))
+
+def decimal_to_american_arr(d: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.rint(np.where(d >= 2.0, (d - 1.0) * 100.0, -100.0 / (d - 1.0))).astype(np.int64)
+
+def to_decimal_arr(odds: np.ndarray, is_american: np.ndarray) -> np.ndarray:
+    """Decimal price per leg from mixed American/decimal inputs."""
+    with np.errstate(divide="ignore"):
+        return np.where(is_american, american_to_decimal_arr(np.where(is_american, odds, 100.0)), odds)
+
+def invalid_prices(odds: np.ndarray, is_american: np.ndarray) -> np.ndarray:
+    """True per leg whose price can't be bet: American inside (-100, 100), decimal <= 1.0, or not finite."""
+    return (is_american & (np.abs(odds) < 100)) | (~is_american & (odds <= 1.0)) | ~np.isfinite(odds)
+
+@dataclass
+class FlatLegs:
+    odds: np.ndarray         # raw price per leg
+    is_american: np.ndarray  # bool per leg
+    prob: np.ndarray         # leg win probability, NaN = use the price's implied probability
+    lengths: np.ndarray      # legs per parlay
+    stake_cents: np.ndarray  # per parlay
+
+def evaluate_batch(legs: FlatLegs) -> dict[str, np.ndarray]:
+    """Combined odds, win probability, payout and EV for every parlay in the batch."""
+    if legs.lengths.size == 0:
+        raise BatchValidationError("No parlays provided")
+    empty = np.flatnonzero(legs.lengths == 0)
+    if empty.size:
+        raise BatchValidationError(f"Parlay {int(empty[0])} has no legs")
+    leg_parlay = np.repeat(np.arange(legs.lengths.size), legs.lengths)
+    bad = invalid_prices(legs.odds, legs.is_american)
+    if bad.any():
+        raise BatchValidationError(f"Parlay {int(leg_parlay[np.argmax(bad)])} has an invalid price")
+
+    dec = to_decimal_arr(legs.odds, legs.is_american)
+    prob = np.clip(np.where(np.isnan(legs.prob), 1.0 / dec, legs.prob), 0.0, 1.0)
+    offsets = np.concatenate(([0], np.cumsum(legs.lengths)[:-1]))
+    combined = np.multiply.reduceat(dec, offsets)
+    p_win = np.multiply.reduceat(prob, offsets)
+    stake = legs.stake_cents.astype(np.float64)
+    payout_cents = np.rint(stake * combined - stake)  # profit on a win, as in /v1/parlays/evaluate
+    ev = p_win * payout_cents - (1.0 - p_win) * stake
+    return {
+        "combined_decimal_odds": np.round(combined, 4),
+        "combined_american": decimal_to_american_arr(combined),
+        "p_parlay_win": np.round(p_win, 6),
+        "payout_cents": payout_cents.astype(np.int64),
+        "expected_value_cents": np.rint(ev).astype(np.int64),
+        "ev_positive": ev >= 0,
+    }
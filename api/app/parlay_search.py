@@ -0,0 +1,142 @@
+# api/app/parlay_search.py
+"""Top-K k-leg parlay search over a slate by EV or Kelly growth.
+
+Legs are independent by construction (at most one leg per game; same-game combos belong in
+/v1/parlay/simulate), so a parlay's expected return per unit staked is the product of its legs'
+e_i = p_win * price + p_push. Legs are sorted by e_i descending and searched depth-first; the best
+reachable product from a node is the current product times the next r largest e_i. For Kelly,
+g* <= P(no loss) * ln E[payoff], bounded with the largest remaining no-loss probability.
+Branches whose bound cannot beat the worst entry of the size-K heap are pruned.
+"""
+from dataclasses import dataclass
+from typing import Literal, Optional
+import heapq, itertools, math, time
+
+from .slate import SlateGame
+
+Objective = Literal["ev", "kelly"]
+
+@dataclass(frozen=True)
+class CandidateLeg:
+    game_index: int
+    game_id: str
+    market: str          # ML | TOTAL
+    selection: str       # HOME | AWAY | OVER | UNDER
+    line: Optional[float]
+    price_decimal: float
+    p_win: float
+    p_push: float = 0.0
+
+    @property
+    def expected_return(self) -> float:
+        return self.p_win * self.price_decimal + self.p_push
+
+@dataclass
+class SearchResult:
+    parlays: list[tuple[float, tuple[CandidateLeg, ...]]]   # (score, legs), best first
+    nodes: int
+    truncated: bool
+    elapsed_ms: float
+
+def _poisson_cdf(k: int, lam: float) -> float:
+    if k < 0:
+        return 0.0
+    term = total = math.exp(-lam)
+    for i in range(1, k + 1):
+        term *= lam / i
+        total += term
+    return min(total, 1.0)
+
+def total_probabilities(lam_total: float, line: float) -> tuple[float, float, float]:
+    """(p_over, p_under, p_push) for total runs ~ Poisson(lam_total)."""
+    if line == int(line):
+        below = _poisson_cdf(int(line) - 1, lam_total)
+        push = _poisson_cdf(int(line), lam_total) - below
+    else:
+        below = _poisson_cdf(math.floor(line), lam_total)
+        push = 0.0
+    return max(0.0, 1.0 - below - push), below, push
+
+def candidate_legs(slate: list[SlateGame], markets: set[str]) -> list[CandidateLeg]:
+    legs: list[CandidateLeg] = []
+    for i, g in enumerate(slate):
+        gid = str(g.game_id)
+        if "ML" in markets:
+            if g.home_ml:
+                legs.append(CandidateLeg(i, gid, "ML", "HOME", None, g.home_ml, g.p_home_win))
+            if g.away_ml:
+                legs.append(CandidateLeg(i, gid, "ML", "AWAY", None, g.away_ml, 1.0 - g.p_home_win))
+        if "TOTAL" in markets and g.total_line is not None:
+            lam = g.expected_total
+            if lam is None and g.pred_home_runs is not None and g.pred_away_runs is not None:
+                lam = g.pred_home_runs + g.pred_away_runs
+            if lam:
+                p_over, p_under, p_push = total_probabilities(lam, g.total_line)
+                if g.over_price:
+                    legs.append(CandidateLeg(i, gid, "TOTAL", "OVER", g.total_line, g.over_price, p_over, p_push))
+                if g.under_price:
+                    legs.append(CandidateLeg(i, gid, "TOTAL", "UNDER", g.total_line, g.under_price, p_under, p_push))
+    return legs
+
+def kelly_growth(legs: tuple[CandidateLeg, ...]) -> float:
+    """Expected log growth at the full-Kelly fraction, treating pushes as voided legs at their expectation."""
+    p = math.prod(l.p_win + l.p_push for l in legs)
+    d = math.prod(l.expected_return for l in legs) / p if p > 0 else 0.0  # effective price given no loss
+    if p <= 0 or d <= 1 or p * d <= 1:
+        return 0.0
+    f = (p * d - 1) / (d - 1)
+    return p * math.log(1 + f * (d - 1)) + (1 - p) * math.log(1 - f) if f < 1 else math.log(d) * p
+
+def search(legs: list[CandidateLeg], k: int, top: int, objective: Objective, time_limit_s: float, max_nodes: int) -> SearchResult:
+    started = time.perf_counter()
+    deadline = started + time_limit_s
+    order = sorted(legs, key=lambda l: l.expected_return, reverse=True)
+    e = [l.expected_return for l in order]
+    n = len(order)
+    q_suffix_max = [0.0] * (n + 1)  # largest p_win + p_push among order[j:]
+    for j in range(n - 1, -1, -1):
+        q_suffix_max[j] = max(q_suffix_max[j + 1], order[j].p_win + order[j].p_push)
+    heap: list[tuple[float, int, tuple[CandidateLeg, ...]]] = []  # min-heap of the best `top`
+    tiebreak = itertools.count()
+    nodes = 0
+    truncated = False
+
+    def score(chosen: tuple[CandidateLeg, ...], product: float) -> float:
+        return product - 1.0 if objective == "ev" else kelly_growth(chosen)
+
+    def bound(product: float, no_loss: float, start: int, remaining: int) -> float:
+        best = product * math.prod(e[start:start + remaining])
+        if objective == "ev":
+            return best - 1.0
+        return no_loss * q_suffix_max[start] ** remaining * math.log(best) if best > 1.0 else 0.0
+
+    def dfs(start: int, chosen: tuple[CandidateLeg, ...], games: frozenset, product: float, no_loss: float) -> None:
+        nonlocal nodes, truncated
+        remaining = k - len(chosen)
+        if remaining == 0:
+            s = score(chosen, product)
+            entry = (s, next(tiebreak), chosen)
+            if len(heap) < top:
+                heapq.heappush(heap, entry)
+            elif s > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+            return
+        for j in range(start, n - remaining + 1):
+            nodes += 1
+            if nodes >= max_nodes or (nodes & 1023 == 0 and time.perf_counter() > deadline):
+                truncated = True
+                return
+            # Sorted descending: once this bound fails, every later j is no better
+            if len(heap) >= top and bound(product, no_loss, j, remaining) <= heap[0][0]:
+                return
+            leg = order[j]
+            if leg.game_index in games:
+                continue
+            dfs(j + 1, chosen + (leg,), games | {leg.game_index}, product * e[j], no_loss * (leg.p_win + leg.p_push))
+            if truncated:
+                return
+
+    if 0 < k <= n:
+        dfs(0, (), frozenset(), 1.0, 1.0)
+    ranked = sorted(heap, key=lambda t: t[0], reverse=True)
+    return SearchResult([(s, c) for s, _, c in ranked], nodes, truncated, (time.perf_counter() - started) * 1000.0)
@@ -0,0 +1,222 @@
+# api/app/parlays.py
+"""Saved parlays and their bulk settlement.
+
+Saving writes the parlay and all its legs in one transaction (legs as one multi-row INSERT).
+Settlement is set-based, not a loop over rows:
+  1. one UPDATE grades every open leg on a settled game (ML from outcomes.winner, TOTAL from the runs);
+  2. one statement settles every open parlay that now has a lost leg or no open legs, and adds the
+     realized P&L of those parlays to parlay_pnl (per user and day) through a data-modifying CTE.
+Pushed/void legs pay 1.0, so a parlay's payout is stake x the product of its winning legs' prices.
+A parlay with a leg priced at 1.0 or below (or over MAX_COMBINED_ODDS combined) is only settled if it lost;
+otherwise it stays open and is skipped, so one bad row cannot fail the statement for every other parlay.
+Both statements only touch ungraded legs and 'open' parlays, so reruns and concurrent runs are harmless.
+
+API workers wake the settler on live-hub outcome notifications and poll as a fallback.
+
+CLI:
+    python -m app.parlays settle                 # every game with a settled outcome and open legs
+    python -m app.parlays settle <game_id> ...
+"""
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+import asyncio, logging, math, sys, time, uuid
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import SessionLocal
+from .models import Game, Parlay, ParlayLeg
+
+log = logging.getLogger(__name__)
+
+SELECTIONS = {"ML": ("HOME", "AWAY"), "TOTAL": ("OVER", "UNDER")}
+MAX_COMBINED_ODDS = 1_000_000.0  # keeps stake x odds well inside payout_cents (BIGINT)
+
+class InvalidParlay(ValueError):
+    pass
+
+def normalize_leg(i: int, game_id, market: str, selection: str, line: Optional[float]) -> tuple[uuid.UUID, str, str]:
+    """(game_id, MARKET, SELECTION) for a leg that can be graded, else InvalidParlay."""
+    market, selection = (market or "").strip().upper(), (selection or "").strip().upper()
+    if market not in SELECTIONS:
+        raise InvalidParlay(f"Leg {i}: market must be ML or TOTAL to save")
+    if selection not in SELECTIONS[market]:
+        raise InvalidParlay(f"Leg {i}: selection must be one of {', '.join(SELECTIONS[market])} for {market}")
+    if market == "TOTAL" and line is None:
+        raise InvalidParlay(f"Leg {i}: TOTAL legs need a line")
+    try:
+        return uuid.UUID(str(game_id)), market, selection
+    except ValueError:
+        raise InvalidParlay(f"Leg {i}: invalid game_id")
+
+async def save(db: AsyncSession, user_id: uuid.UUID, stake_cents: int, legs: Sequence[dict], source: str,
+               combined_decimal_odds: float, expected_value_cents: Optional[int] = None) -> uuid.UUID:
+    """Persist an open parlay. `legs` hold game_id/market/selection/line/price_decimal/leg_probability,
+    already normalized. Games must exist and not have started.
+    """
+    for i, l in enumerate(legs):
+        price = l.get("price_decimal")
+        if price is None or not math.isfinite(price) or price <= 1.0:
+            raise InvalidParlay(f"Leg {i}: price_decimal must be greater than 1.0")
+    if not combined_decimal_odds <= MAX_COMBINED_ODDS:
+        raise InvalidParlay(f"Combined odds above {MAX_COMBINED_ODDS:g} can't be saved")
+    game_ids = list({l["game_id"] for l in legs})
+    games = {r.id: r.start_time_et for r in (await db.execute(
+        select(Game.id, Game.start_time_et).where(Game.id.in_(game_ids))
+    )).all()}
+    missing = [str(g) for g in game_ids if g not in games]
+    if missing:
+        raise InvalidParlay(f"Unknown game(s): {', '.join(missing)}")
+    now = datetime.now(tz=timezone.utc)
+    started = [str(g) for g, t in games.items() if t is not None and t <= now]
+    if started:
+        raise InvalidParlay(f"Game(s) already started: {', '.join(started)}")
+    parlay_id = uuid.uuid4()
+    await db.execute(insert(Parlay).values(
+        id=parlay_id, user_id=user_id, stake_cents=stake_cents, status="open", source=source,
+        combined_decimal_odds=round(combined_decimal_odds, 6), expected_value_cents=expected_value_cents, created_at=now,
+    ))
+    await db.execute(insert(ParlayLeg), [{"id": uuid.uuid4(), "parlay_id": parlay_id, **l} for l in legs])
+    await db.commit()
+    return parlay_id
+
+# Latest outcome per game; ML needs a winner, TOTAL needs both scores (left open until they arrive)
+_GRADE_SQL = text("""
+WITH o AS (
+  SELECT DISTINCT ON (game_id) game_id, winner, actual_home_runs + actual_away_runs AS runs
+  FROM outcomes
+  WHERE game_id = ANY(:game_ids) AND winner IS NOT NULL
+  ORDER BY game_id, closed_at DESC NULLS LAST
+)
+UPDATE parlay_legs l
+SET result = g.result, settled_at = now()
+FROM (
+  SELECT l.id,
+    CASE
+      WHEN l.market = 'ML' THEN CASE WHEN o.winner = l.selection THEN 'won' ELSE 'lost' END
+      WHEN o.runs IS NULL THEN NULL
+      WHEN o.runs = l.line THEN 'push'
+      WHEN (o.runs > l.line) = (l.selection = 'OVER') THEN 'won'
+      ELSE 'lost'
+    END AS result
+  FROM parlay_legs l JOIN o ON o.game_id = l.game_id
+  WHERE l.result IS NULL
+) g
+WHERE l.id = g.id AND g.result IS NOT NULL
+""")
+
+# One lost leg settles the parlay even while other legs are open
+_SETTLE_SQL = text("""
+WITH legs AS (
+  SELECT l.parlay_id,
+    bool_or(l.result = 'lost') AS any_lost,
+    bool_or(l.result IS NULL) AS any_open,
+    bool_and(l.result IN ('push', 'void')) AS all_void,
+    bool_or(l.price_decimal IS NULL OR l.price_decimal <= 1) AS bad_price,
+    sum(CASE WHEN l.result = 'won' AND l.price_decimal > 1 THEN ln(l.price_decimal) ELSE 0 END) AS log_odds
+  FROM parlay_legs l
+  WHERE l.parlay_id IN (SELECT parlay_id FROM parlay_legs WHERE game_id = ANY(:game_ids))
+  GROUP BY l.parlay_id
+), settled AS (
+  UPDATE parlays p
+  SET status = s.status, payout_cents = s.payout, pnl_cents = s.payout - p.stake_cents, settled_at = now()
+  FROM (
+    SELECT p.id,
+      CASE WHEN legs.any_lost THEN 'lost' WHEN legs.all_void THEN 'void' ELSE 'won' END AS status,
+      CASE WHEN legs.any_lost THEN 0 ELSE round(p.stake_cents * exp(legs.log_odds))::bigint END AS payout
+    FROM parlays p JOIN legs ON legs.parlay_id = p.id
+    WHERE p.status = 'open'
+      AND (legs.any_lost OR (NOT legs.any_open AND NOT legs.bad_price AND legs.log_odds <= :max_log_odds))
+  ) s
+  WHERE p.id = s.id AND p.status = 'open'
+  RETURNING p.user_id, p.status, p.stake_cents, p.pnl_cents
+), pnl AS (
+  INSERT INTO parlay_pnl AS t (user_id, day, n_settled, n_won, n_lost, n_void, staked_cents, pnl_cents, updated_at)
+  SELECT user_id, (now() AT TIME ZONE 'America/New_York')::date, count(*),
+    count(*) FILTER (WHERE status = 'won'), count(*) FILTER (WHERE status = 'lost'), count(*) FILTER (WHERE status = 'void'),
+    sum(stake_cents), sum(pnl_cents), now()
+  FROM settled GROUP BY user_id
+  ON CONFLICT (user_id, day) DO UPDATE SET
+    n_settled = t.n_settled + EXCLUDED.n_settled, n_won = t.n_won + EXCLUDED.n_won,
+    n_lost = t.n_lost + EXCLUDED.n_lost, n_void = t.n_void + EXCLUDED.n_void,
+    staked_cents = t.staked_cents + EXCLUDED.staked_cents, pnl_cents = t.pnl_cents + EXCLUDED.pnl_cents,
+    updated_at = now()
+)
+SELECT count(*) FROM settled
+""")
+
+_SETTLEABLE_SQL = text("""
+SELECT DISTINCT l.game_id FROM parlay_legs l
+WHERE l.result IS NULL
+  AND EXISTS (SELECT 1 FROM outcomes o WHERE o.game_id = l.game_id AND o.winner IS NOT NULL)
+""")
+
+async def settle(db: AsyncSession, game_ids: Optional[list[uuid.UUID]] = None) -> dict:
+    """Grade open legs and settle parlays for these games (default: every settleable game). Commits."""
+    started = time.perf_counter()
+    if game_ids is None:
+        game_ids = list((await db.execute(_SETTLEABLE_SQL)).scalars().all())
+    if not game_ids:
+        return {"games": 0, "legs": 0, "parlays": 0, "ms": 0.0}
+    legs = (await db.execute(_GRADE_SQL, {"game_ids": game_ids})).rowcount
+    parlays = (await db.execute(_SETTLE_SQL, {"game_ids": game_ids, "max_log_odds": math.log(MAX_COMBINED_ODDS)})).scalar() if legs else 0
+    await db.commit()
+    return {"games": len(game_ids), "legs": legs, "parlays": parlays, "ms": round((time.perf_counter() - started) * 1000, 3)}
+
+class ParlaySettler:
+    """Runs settle() when the live hub sees an outcome, and on a poll as a fallback.
+    A try-lock keeps it to one worker at a time; the others skip that tick.
+    """
+    def __init__(self):
+        self.wake = asyncio.Event()
+        self.runs = 0
+        self.legs = 0
+        self.parlays = 0
+        self.last: Optional[dict] = None
+
+    def notify(self) -> None:
+        self.wake.set()
+
+    async def settle_once(self) -> Optional[dict]:
+        async with SessionLocal() as db:
+            if not (await db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('parlay_settlement'))"))).scalar():
+                await db.rollback()
+                return None
+            res = await settle(db)
+        if res["games"]:
+            self.runs += 1
+            self.legs += res["legs"]
+            self.parlays += res["parlays"]
+            self.last = res
+            log.info("settled %(parlays)d parlay(s), %(legs)d leg(s) over %(games)d game(s) in %(ms).1fms", res)
+        return res
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.settle_once()
+            except Exception:
+                log.warning("parlay settlement failed", exc_info=True)
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+
+    def stats(self) -> dict:
+        return {"runs": self.runs, "legs": self.legs, "parlays": self.parlays, "last": self.last}
+
+parlay_settler = ParlaySettler()
+
+async def _main(argv: list[str]) -> None:
+    if not argv or argv[0] != "settle":
+        raise SystemExit(__doc__)
+    try:
+        game_ids = [uuid.UUID(g) for g in argv[1:]] or None
+    except ValueError:
+        raise SystemExit("invalid game id")
+    async with SessionLocal() as db:
+        print(await settle(db, game_ids))
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1:]))
@@ -0,0 +1,128 @@
+# api/app/response_cache.py
+"""Pre-serialized response cache for read-mostly endpoints.
+
+Entries are final JSON bytes plus a strong ETag (content hash), keyed by the route's parameters and the
+versions of the data it reads. Versions come from data_versions (bumped by triggers, see 0009) and are
+polled by one background task per worker, so a hit costs a dict lookup and a conditional request with
+a matching If-None-Match gets a 304 without touching the body. When versions are unknown (table missing,
+poller not yet run) the cache is bypassed rather than risk serving stale data.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Hashable, Optional
+import asyncio, hashlib, logging
+
+from fastapi import Request, Response
+from sqlalchemy import text
+
+from .config import settings
+from .db import SessionLocal
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class Entry:
+    body: bytes
+    etag: str
+    headers: dict = field(default_factory=dict)
+
+def make_entry(body: bytes, headers: Optional[dict] = None) -> Entry:
+    return Entry(body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"', headers or {})
+
+class DataVersions:
+    def __init__(self):
+        self.versions: dict[str, int] = {}
+        self.ready = False
+
+    def get(self, *names: str) -> Optional[tuple]:
+        if not self.ready:
+            return None
+        return tuple(self.versions.get(n, 0) for n in names)
+
+    async def refresh(self) -> None:
+        async with SessionLocal() as db:
+            rows = (await db.execute(text("SELECT name, version FROM data_versions"))).all()
+        self.versions = {r.name: r.version for r in rows}
+        self.ready = True
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Stale versions could serve stale bytes; stop caching until the poll recovers
+                self.ready = False
+                log.warning("data version poll failed", exc_info=True)
+            await asyncio.sleep(interval)
+
+class _Abandoned(Exception):
+    """Set on a pending build whose builder was cancelled; waiters retry instead of failing."""
+
+class ResponseCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Entry] = OrderedDict()
+        self._building: dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.bypassed = 0
+
+    async def get_or_build(self, key: Optional[Hashable], build: Callable[[], Awaitable[Entry]]) -> Entry:
+        """Cached entry for key; on a miss one caller builds and concurrent callers await it. key=None bypasses.
+        If the building request is cancelled, its waiters are not: they retry, and one of them builds.
+        """
+        if key is None or self.max_entries <= 0:
+            self.bypassed += 1
+            return await build()
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            pending = self._building.get(key)
+            if pending is None:
+                break
+            try:
+                entry = await asyncio.shield(pending)
+            except _Abandoned:
+                continue
+            self.hits += 1
+            return entry
+        self.misses += 1
+        fut = self._building[key] = asyncio.get_running_loop().create_future()
+        try:
+            entry = await build()
+        except asyncio.CancelledError:
+            fut.set_exception(_Abandoned())
+            fut.exception()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._building.pop(key, None)
+        fut.set_result(entry)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, request: Request, entry: Entry, cache_control: str) -> Response:
+        headers = {"ETag": entry.etag, "Cache-Control": cache_control, **entry.headers}
+        inm = request.headers.get("if-none-match")
+        if inm and (inm.strip() == "*" or entry.etag in (t.strip() for t in inm.split(","))):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+            "not_modified": self.not_modified, "bypassed": self.bypassed,
+        }
+
+data_versions = DataVersions()
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,254 @@
+# api/app/rollups.py
+"""Incremental accuracy rollups (7d/30d/90d) and the in-memory snapshot /v1/accuracy serves from.
+
+Each settled game is folded in exactly once: its pick adds to the additive counters of every
+(window, as_of_date) row whose window covers the game date, and the ratio columns are re-derived
+from those counters in the same UPSERT. History is never rescanned.
+
+API workers run RollupApplier: it applies pending outcomes when the live hub sees an outcome (polling as a
+fallback) and then reloads the snapshot, so /v1/accuracy moves as soon as a game settles.
+
+CLI:
+    python -m app.rollups apply-pending      # fold in every outcome not yet applied
+    python -m app.rollups apply <game_id>
+    python -m app.rollups rebuild            # wipe and re-apply everything (backfill / formula change)
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+import asyncio, logging, sys, uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import SessionLocal
+from .slate import today_et
+
+log = logging.getLogger(__name__)
+
+WINDOWS = {"7d": 7, "30d": 30, "90d": 90}
+
+# Latest archived pick for the game, its outcome, and the picked side's closing price
+# (last snapshot at or before first pitch, any book).
+_PICK_SQL = text("""
+SELECT g.game_date, pa.p_home_win, pa.confidence, o.winner,
+  (SELECT CASE WHEN pa.p_home_win >= 0.5 THEN s.home_ml_decimal ELSE s.away_ml_decimal END
+     FROM odds_snapshots s
+    WHERE s.game_id = g.id AND (g.start_time_et IS NULL OR s.ts <= g.start_time_et)
+    ORDER BY s.ts DESC LIMIT 1) AS closing_price
+FROM games g
+JOIN outcomes o ON o.game_id = g.id AND o.winner IS NOT NULL
+JOIN LATERAL (
+  SELECT p_home_win, confidence FROM prediction_archive
+   WHERE game_id = g.id ORDER BY published_at DESC LIMIT 1
+) pa ON true
+WHERE g.id = :game_id
+LIMIT 1
+""")
+
+_CLAIM_SQL = text("""
+INSERT INTO accuracy_rollup_inputs (game_id) VALUES (:game_id)
+ON CONFLICT (game_id) DO NOTHING
+RETURNING game_id
+""")
+
+_UPSERT_SQL = text("""
+INSERT INTO accuracy_rollups AS r
+  ("window", as_of_date, n_picks, n_wins, n_priced, profit_units, n_confidence, confidence_sum, win_pct, roi_pct, avg_confidence)
+SELECT CAST(:window AS text), CAST(d AS date), 1, CAST(:n_wins AS integer), CAST(:n_priced AS integer),
+       CAST(:profit AS numeric), CAST(:n_conf AS integer), CAST(:conf_sum AS numeric),
+       CAST(:win_pct AS numeric), CAST(:roi_pct AS numeric), CAST(:avg_conf AS numeric)
+FROM generate_series(CAST(:first_day AS date), CAST(:last_day AS date), interval '1 day') AS d
+ON CONFLICT ("window", as_of_date) DO UPDATE SET
+  n_picks        = COALESCE(r.n_picks, 0) + 1,
+  n_wins         = r.n_wins + EXCLUDED.n_wins,
+  n_priced       = r.n_priced + EXCLUDED.n_priced,
+  profit_units   = r.profit_units + EXCLUDED.profit_units,
+  n_confidence   = r.n_confidence + EXCLUDED.n_confidence,
+  confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum,
+  win_pct        = CAST(r.n_wins + EXCLUDED.n_wins AS numeric) / (COALESCE(r.n_picks, 0) + 1),
+  roi_pct        = (r.profit_units + EXCLUDED.profit_units) / NULLIF(r.n_priced + EXCLUDED.n_priced, 0),
+  avg_confidence = (r.confidence_sum + EXCLUDED.confidence_sum) / NULLIF(r.n_confidence + EXCLUDED.n_confidence, 0)
+""")
+
+def pick_contribution(p_home_win: float, winner: str, confidence: Optional[float], closing_price: Optional[float]) -> dict:
+    """Counter deltas for one settled pick (flat 1-unit stake on the side we favoured)."""
+    picked = "HOME" if p_home_win >= 0.5 else "AWAY"
+    won = winner == picked
+    priced = closing_price is not None and closing_price > 1
+    profit = ((closing_price - 1) if won else -1.0) if priced else 0.0
+    has_conf = confidence is not None
+    return {
+        "n_wins": int(won),
+        "n_priced": int(priced),
+        "profit": profit,
+        "n_conf": int(has_conf),
+        "conf_sum": confidence if has_conf else 0.0,
+        "win_pct": float(won),
+        "roi_pct": profit if priced else None,
+        "avg_conf": confidence,
+    }
+
+async def apply_outcome(db: AsyncSession, game_id: uuid.UUID) -> bool:
+    """Fold one game's outcome into every window it touches. Idempotent per game; caller commits.
+    Returns False if the game was already applied or has no settled, archived pick.
+    """
+    row = (await db.execute(_PICK_SQL, {"game_id": game_id})).first()
+    if row is None:
+        return False
+    if (await db.execute(_CLAIM_SQL, {"game_id": game_id})).first() is None:
+        return False
+    delta = pick_contribution(
+        float(row.p_home_win),
+        row.winner,
+        float(row.confidence) if row.confidence is not None else None,
+        float(row.closing_price) if row.closing_price is not None else None,
+    )
+    for window, days in WINDOWS.items():
+        await db.execute(_UPSERT_SQL, {
+            "window": window,
+            "first_day": row.game_date,
+            "last_day": row.game_date + timedelta(days=days - 1),
+            **delta,
+        })
+    return True
+
+async def apply_pending(db: AsyncSession, commit_each: bool = True) -> int:
+    """Apply every settled game not yet folded in. Commits per game so a failure keeps earlier progress;
+    with commit_each=False the caller commits (keeps a transaction-scoped lock held throughout).
+    """
+    pending = (await db.execute(text("""
+        SELECT o.game_id FROM outcomes o
+        JOIN games g ON g.id = o.game_id
+        WHERE o.winner IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM accuracy_rollup_inputs i WHERE i.game_id = o.game_id)
+        ORDER BY g.game_date
+    """))).scalars().all()
+    applied = 0
+    for game_id in pending:
+        if await apply_outcome(db, game_id):
+            applied += 1
+        if commit_each:
+            await db.commit()
+    return applied
+
+async def rebuild(db: AsyncSession) -> int:
+    await db.execute(text("DELETE FROM accuracy_rollups"))
+    await db.execute(text("DELETE FROM accuracy_rollup_inputs"))
+    await db.commit()
+    return await apply_pending(db)
+
+class AccuracySnapshot:
+    """Each window's rollup row as of today (ET), held in memory. Reloaded when accuracy_rollup_inputs moves
+    and when the ET day rolls over. No row for today means no settled picks in the window: empty counters.
+    """
+    def __init__(self):
+        self.windows: dict[str, dict] = {}
+        self.day: Optional[date] = None
+        self.version: Optional[datetime] = None
+        self.loaded_at: Optional[datetime] = None
+
+    def get(self, window: str) -> dict:
+        return self.windows.get(window) or {
+            "window": window, "as_of": self.day.isoformat() if self.day else None, "win_pct": None, "roi_pct": None, "avg_confidence": None, "n_picks": 0,
+        }
+
+    async def refresh(self, force: bool = False) -> bool:
+        today = today_et()
+        async with SessionLocal() as db:
+            version = (await db.execute(text("SELECT max(applied_at) FROM accuracy_rollup_inputs"))).scalar()
+            if not force and self.loaded_at is not None and version == self.version and today == self.day:
+                return False
+            rows = (await db.execute(text("""
+                SELECT "window", as_of_date, win_pct, roi_pct, avg_confidence, n_picks
+                FROM accuracy_rollups
+                WHERE as_of_date = :today
+            """), {"today": today})).all()
+        self.windows = {
+            r.window: {
+                "window": r.window,
+                "as_of": r.as_of_date.isoformat(),
+                "win_pct": round(float(r.win_pct), 4) if r.win_pct is not None else None,
+                "roi_pct": round(float(r.roi_pct), 4) if r.roi_pct is not None else None,
+                "avg_confidence": round(float(r.avg_confidence), 4) if r.avg_confidence is not None else None,
+                "n_picks": r.n_picks or 0,
+            }
+            for r in rows
+        }
+        self.day = today
+        self.version = version
+        self.loaded_at = datetime.now(tz=timezone.utc)
+        return True
+
+    async def run_refresher(self, interval: float) -> None:
+        # refresh() also reloads at ET midnight; the version check keeps idle ticks to one tiny query.
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                log.warning("accuracy snapshot refresh failed", exc_info=True)
+            await asyncio.sleep(interval)
+
+accuracy_snapshot = AccuracySnapshot()
+
+class RollupApplier:
+    """Runs apply_pending() when the live hub sees an outcome, and on a poll as a fallback.
+    A try-lock keeps it to one worker at a time; the others skip that tick.
+    """
+    def __init__(self):
+        self.wake = asyncio.Event()
+        self.runs = 0
+        self.applied = 0
+        self.last_applied_at: Optional[datetime] = None
+
+    def notify(self) -> None:
+        self.wake.set()
+
+    async def apply_once(self) -> Optional[int]:
+        async with SessionLocal() as db:
+            if not (await db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('accuracy_rollups'))"))).scalar():
+                await db.rollback()
+                return None
+            n = await apply_pending(db, commit_each=False)
+            await db.commit()
+        if n:
+            self.runs += 1
+            self.applied += n
+            self.last_applied_at = datetime.now(tz=timezone.utc)
+            log.info("applied %d outcome(s) to accuracy rollups", n)
+            await accuracy_snapshot.refresh()
+        return n
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.apply_once()
+            except Exception:
+                log.warning("accuracy rollup apply failed", exc_info=True)
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+
+    def stats(self) -> dict:
+        return {"runs": self.runs, "applied": self.applied,
+                "last_applied_at": self.last_applied_at.isoformat() if self.last_applied_at else None}
+
+rollup_applier = RollupApplier()
+
+async def _main(argv: list[str]) -> None:
+    cmd = argv[0] if argv else "apply-pending"
+    async with SessionLocal() as db:
+        if cmd == "apply-pending":
+            print(f"applied {await apply_pending(db)} outcome(s)")
+        elif cmd == "apply" and len(argv) == 2:
+            ok = await apply_outcome(db, uuid.UUID(argv[1]))
+            await db.commit()
+            print("applied" if ok else "skipped (already applied or no settled pick)")
+        elif cmd == "rebuild":
+            print(f"rebuilt from {await rebuild(db)} outcome(s)")
+        else:
+            raise SystemExit(__doc__)
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1:]))
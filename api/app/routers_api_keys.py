@@ -0,0 +1,76 @@
+# api/app/routers_api_keys.py
+from datetime import datetime, timezone
+from typing import Optional
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .api_keys import api_key_index, hash_key, new_key
+from .audit import audit_log
+from .auth import get_db, require_auth
+from .config import settings
+from .models import ApiKey
+
+router = APIRouter(prefix="/v1/api-keys", tags=["api-keys"])
+
+class IssueKeyRequest(BaseModel):
+    name: Optional[str] = Field(None, max_length=100)
+
+def _key_json(k: ApiKey) -> dict:
+    n, last_used = api_key_index.pending(k.id)
+    last = max(filter(None, (k.last_used_at, last_used)), default=None)
+    return {
+        "id": str(k.id), "name": k.name, "prefix": k.prefix,
+        "created_at": k.created_at.isoformat(), "revoked_at": k.revoked_at.isoformat() if k.revoked_at else None,
+        "request_count": k.request_count + n, "last_used_at": last.isoformat() if last else None,
+    }
+
+@router.post("", status_code=201)
+async def issue_key(body: IssueKeyRequest, user=Depends(require_auth), db: AsyncSession = Depends(get_db)):
+    """Create a key for programmatic access. The key itself is returned only in this response."""
+    if user["api_key_id"] is not None:
+        # A leaked key must not be able to mint more
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sign in with a password to issue API keys")
+    u = user["user"]
+    active = (await db.execute(
+        select(func.count()).select_from(ApiKey).where(ApiKey.user_id == u.id, ApiKey.revoked_at.is_(None))
+    )).scalar()
+    if active >= settings.API_KEYS_MAX_PER_USER:
+        raise HTTPException(status_code=400, detail=f"At most {settings.API_KEYS_MAX_PER_USER} active API keys; revoke one first")
+    key = new_key()
+    row = ApiKey(id=uuid.uuid4(), user_id=u.id, token_hash=hash_key(key), name=body.name, prefix=key[:8],
+                 created_at=datetime.now(tz=timezone.utc), request_count=0)
+    db.add(row)
+    await db.commit()
+    api_key_index.add(row.token_hash, row.id, u.id)
+    audit_log.record(u.id, "api_key.issue", "api_key", row.id, {"name": body.name, "prefix": row.prefix})
+    return {**_key_json(row), "key": key}
+
+@router.get("")
+async def list_keys(user=Depends(require_auth), db: AsyncSession = Depends(get_db)):
+    rows = (await db.execute(
+        select(ApiKey).where(ApiKey.user_id == user["user"].id).order_by(ApiKey.created_at.desc())
+    )).scalars().all()
+    return [_key_json(k) for k in rows]
+
+@router.delete("/{key_id}")
+async def revoke_key(key_id: uuid.UUID, user=Depends(require_auth), db: AsyncSession = Depends(get_db)):
+    """Revoke at once in this worker; other workers stop accepting the key within API_KEY_INDEX_POLL_SECONDS."""
+    u = user["user"]
+    # Fold this worker's unflushed count in with the revocation; the index forgets the key after it
+    n, last_used = api_key_index.pending(key_id)
+    values = {"revoked_at": datetime.now(tz=timezone.utc), "request_count": ApiKey.request_count + n}
+    if last_used is not None:
+        values["last_used_at"] = func.greatest(ApiKey.last_used_at, last_used)
+    res = await db.execute(
+        update(ApiKey).where(ApiKey.id == key_id, ApiKey.user_id == u.id, ApiKey.revoked_at.is_(None)).values(**values)
+    )
+    await db.commit()
+    if res.rowcount == 0:
+        raise HTTPException(status_code=404, detail="No active API key with that id")
+    api_key_index.remove(key_id)
+    audit_log.record(u.id, "api_key.revoke", "api_key", key_id, {"via_api_key": str(user["api_key_id"]) if user["api_key_id"] else None})
+    return {"ok": True, "id": str(key_id)}
@@ -0,0 +1,23 @@
+# api/app/routers_archive.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .archive_chain import chain_head, verify_range
+from .auth import get_db
+
+# Public integrity endpoints for the append-only prediction archive
+router = APIRouter(prefix="/v1/archive", tags=["archive"])
+
+@router.get("/chain")
+async def archive_chain(db: AsyncSession = Depends(get_db)):
+    """Chain head and every checkpoint hash, so anyone can pin and later compare them."""
+    return await chain_head(db)
+
+@router.get("/verify")
+async def archive_verify(segment_end: int | None = None, db: AsyncSession = Depends(get_db)):
+    """Re-hash one checkpoint segment (ending at `segment_end`, default: the tail since the last checkpoint)."""
+    try:
+        res = await verify_range(db, segment_end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return res.__dict__
@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from .auth import get_db, hash_password, verify_password, create_jwt
+from .auth import get_db, hash_password_async, verify_password_async, create_jwt
 from .models import User
 from .schemas import RegisterRequest, LoginRequest, LoginResponse
 from datetime import datetime, timezone
@@ -15,7 +15,7 @@ async def register(body: RegisterRequest, db: AsyncSession = Depends(get_db)):
     existing = (await db.execute(select(User).where(User.email==email))).scalar_one_or_none()
     if existing:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
-    user = User(email=email, created_at=datetime.now(tz=timezone.utc), password_hash=hash_password(body.password))
+    user = User(email=email, created_at=datetime.now(tz=timezone.utc), password_hash=await hash_password_async(body.password))
     db.add(user)
     await db.flush()  # get server/default PK value
     token=create_jwt(str(user.id), user.email)
@@ -26,7 +26,7 @@ async def register(body: RegisterRequest, db: AsyncSession = Depends(get_db)):
 async def login(body: LoginRequest, db: AsyncSession = Depends(get_db)):
     email=body.email.lower()
     user=(await db.execute(select(User).where(User.email==email))).scalar_one_or_none()
-    if not user or not user.password_hash or not verify_password(body.password, user.password_hash):
+    if not user or not user.password_hash or not await verify_password_async(body.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     token=create_jwt(str(user.id), user.email)
     return LoginResponse(token=token, user_id=str(user.id), email=user.email)
@@ -0,0 +1,75 @@
+# api/app/routers_backtest.py
+from datetime import date
+from typing import List, Literal, Optional
+import asyncio, time
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .access import require_active_subscription
+from .auth import get_db
+from .backtest import Strategy, backtest_cache, evaluate, grid
+from .config import settings
+
+router = APIRouter(prefix="/v1/backtest", tags=["backtest"], dependencies=[Depends(require_active_subscription)])
+
+Market = Literal["ML", "TOTAL"]
+Staking = Literal["flat", "kelly"]
+
+class StrategySpec(BaseModel):
+    market: Market = "ML"
+    staking: Staking = "flat"
+    kelly_fraction: float = Field(0.25, gt=0, le=1)
+    min_confidence: float = Field(0.0, ge=0, le=1)
+    min_edge: Optional[float] = Field(None, description="Minimum expected return per unit staked; null = no filter")
+
+class StrategyGrid(BaseModel):
+    markets: List[Market] = ["ML"]
+    staking: List[Staking] = ["flat", "kelly"]
+    kelly_fractions: List[float] = [0.25]
+    min_confidence: List[float] = [0.0]
+    min_edge: List[Optional[float]] = [None]
+
+class BacktestRequest(BaseModel):
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    strategies: List[StrategySpec] = []
+    grid: Optional[StrategyGrid] = Field(None, description="Cartesian product, added to `strategies`")
+    series: bool = Field(False, description="Daily bankroll/drawdown/ROI/CLV series (up to BACKTEST_SERIES_MAX strategies)")
+    sort: Literal["input", "roi", "profit", "final_bankroll", "max_drawdown", "avg_clv"] = "input"
+    top: Optional[int] = Field(None, ge=1)
+
+@router.post("/run")
+async def run_backtest(body: BacktestRequest, db: AsyncSession = Depends(get_db)):
+    """Replay archived picks under each strategy. Bankroll starts at 1.0; flat stakes are BACKTEST_FLAT_STAKE units."""
+    strategies = [Strategy(**s.model_dump()) for s in body.strategies]
+    if body.grid:
+        g = body.grid
+        if any(not 0 < k <= 1 for k in g.kelly_fractions):
+            raise HTTPException(status_code=400, detail="kelly_fractions must be in (0, 1]")
+        strategies += grid(g.markets, g.staking, g.kelly_fractions, g.min_confidence, g.min_edge)
+    if not strategies:
+        raise HTTPException(status_code=400, detail="No strategies provided")
+    if len(strategies) > settings.BACKTEST_MAX_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"Too many strategies (max {settings.BACKTEST_MAX_STRATEGIES})")
+    if body.series and len(strategies) > settings.BACKTEST_SERIES_MAX:
+        raise HTTPException(status_code=400, detail=f"series is limited to {settings.BACKTEST_SERIES_MAX} strategies")
+
+    ds = (await backtest_cache.get(db)).between(body.from_date, body.to_date)
+    started = time.perf_counter()
+    results = await asyncio.get_running_loop().run_in_executor(
+        None, evaluate, ds, strategies, settings.BACKTEST_FLAT_STAKE, settings.BACKTEST_MAX_STAKE, body.series,
+    )
+    elapsed = time.perf_counter() - started
+    if body.sort != "input":
+        sign = 1 if body.sort == "max_drawdown" else -1
+        results.sort(key=lambda r: (r[body.sort] is None, sign * (r[body.sort] or 0.0)))
+    return {
+        "games": len(ds),
+        "strategies": len(strategies),
+        "flat_stake": settings.BACKTEST_FLAT_STAKE,
+        "max_stake": settings.BACKTEST_MAX_STAKE,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "results": results[:body.top] if body.top else results,
+    }
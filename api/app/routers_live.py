@@ -0,0 +1,96 @@
+# api/app/routers_live.py
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import asyncio, secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .access import require_active_subscription
+from .api_keys import hash_key
+from .auth import get_db, load_principal, require_auth
+from .config import settings
+from .db import SessionLocal
+from .live import KINDS, HubFull, live_hub
+from .models import LiveStreamTicket
+
+router = APIRouter(prefix="/v1/live", tags=["live"])
+
+@router.post("/ticket")
+async def issue_ticket(user=Depends(require_active_subscription), db: AsyncSession = Depends(get_db)):
+    """A single-use ticket for opening /v1/live/stream from EventSource, which can't send headers.
+    Keeps the session token out of the stream URL (and so out of access logs and browser history).
+    """
+    if settings.DEV_SKIP_AUTH:
+        return {"ticket": "dev", "expires_in": settings.LIVE_TICKET_SECONDS}
+    ticket = secrets.token_urlsafe(32)
+    now = datetime.now(tz=timezone.utc)
+    await db.execute(delete(LiveStreamTicket).where(LiveStreamTicket.expires_at <= now))
+    await db.execute(insert(LiveStreamTicket).values(
+        ticket_hash=hash_key(ticket), user_id=user["user"].id, expires_at=now + timedelta(seconds=settings.LIVE_TICKET_SECONDS),
+    ))
+    await db.commit()
+    return {"ticket": ticket, "expires_in": settings.LIVE_TICKET_SECONDS}
+
+async def _redeem(db: AsyncSession, ticket: str) -> dict:
+    user_id = (await db.execute(
+        delete(LiveStreamTicket)
+        .where(LiveStreamTicket.ticket_hash == hash_key(ticket), LiveStreamTicket.expires_at > datetime.now(tz=timezone.utc))
+        .returning(LiveStreamTicket.user_id)
+    )).scalar()
+    await db.commit()
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired stream ticket")
+    principal = await load_principal(db, user_id)
+    return {"user": principal.user, "sub_active": principal.sub_active, "api_key_id": None}
+
+@router.get("/stream")
+async def live_stream(
+    kinds: str = Query(",".join(KINDS), description="Comma-separated subset of prediction,odds,outcome"),
+    ticket: Optional[str] = Query(None, description="From POST /v1/live/ticket, for EventSource, which can't send headers"),
+    last_event: Optional[str] = Query(None, description="Last-Event-ID for a reconnect that can't send the header"),
+    authorization: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None),
+    last_event_id: Optional[str] = Header(None),
+):
+    """Server-sent events: prediction publications, line moves and outcome settlements as they happen.
+    Authenticate with a header (session token or API key) or a single-use `ticket`; tickets are spent on
+    use, so a browser reconnects with a new ticket and its last event id in `last_event`.
+    A `resync` event means notifications may have been missed (or Last-Event-ID is too old to replay); refetch. A `dropped` event means this client
+    fell too far behind and is being disconnected; reconnect with Last-Event-ID.
+    """
+    # Short-lived session: the stream must not hold a pooled connection for its lifetime
+    async with SessionLocal() as db:
+        if ticket and not settings.DEV_SKIP_AUTH:
+            user = await _redeem(db, ticket)
+        else:
+            user = await require_auth(authorization=authorization, x_api_key=x_api_key, db=db)
+    await require_active_subscription(user)
+    last_event_id = last_event_id or last_event
+    wanted = frozenset(k.strip() for k in kinds.split(",") if k.strip())
+    if not wanted or not wanted <= set(KINDS):
+        raise HTTPException(status_code=400, detail=f"kinds must be a subset of {', '.join(KINDS)}")
+    try:
+        sub = live_hub.subscribe(wanted, last_event_id)
+    except HubFull:
+        raise HTTPException(status_code=503, detail="Live stream is at capacity", headers={"Retry-After": "5"})
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    ev = await asyncio.wait_for(sub.queue.get(), timeout=settings.LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if ev is None:
+                    yield b"event: dropped\ndata: {}\n\n"
+                    return
+                yield ev.sse
+        finally:
+            live_hub.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
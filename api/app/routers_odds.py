@@ -0,0 +1,114 @@
+# api/app/routers_odds.py
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
+from typing import Literal
+import json, uuid
+
+import numpy as np
+
+from .access import require_active_subscription
+from .auth import get_db
+from .market import market_engine
+from .odds_index import odds_index
+from .response_cache import data_versions, make_entry, response_cache
+from .slate import load_slate, today_et
+
+DevigMethod = Literal["multiplicative", "power", "shin"]
+
+# Served from the in-process odds index; only /edges reads the DB (the served predictions, response-cached)
+router = APIRouter(prefix="/v1/odds", tags=["odds"], dependencies=[Depends(require_active_subscription)])
+
+def _game_id(game_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(game_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid game_id")
+
+def _require_ready():
+    if not odds_index.ready:
+        raise HTTPException(status_code=503, detail="Odds index warming up", headers={"Retry-After": "2"})
+
+def _col(a: np.ndarray, digits: int = 6) -> list:
+    return np.where(np.isnan(a), None, np.round(a, digits)).tolist()
+
+@router.get("/edges")
+async def edges(request: Request, day: date | None = None, method: DevigMethod | None = None, db: AsyncSession = Depends(get_db)):
+    """Our p_home_win against the vig-free market for a slate (default: today ET). Columnar:
+    `games` is one entry per game with the consensus; `lines` one per (game, book), `game` indexing into `games`.
+    """
+    _require_ready()
+    day = day or today_et()
+    snap = market_engine.snapshot(method)
+
+    async def build():
+        slate = await load_slate(db, day, with_odds=False)
+        p_model = np.fromiter((g.p_home_win for g in slate), dtype=np.float64, count=len(slate))
+        pos, rows = snap.edges([g.game_id for g in slate], p_model)
+        found = pos >= 0
+        at = np.where(found, pos, 0)
+        cons = lambda a: _col(np.where(found, a[at], np.nan))
+        p_home = np.where(found, snap.p_home[at], np.nan)
+        body = {
+            "day": day.isoformat(), "method": snap.method, "odds_version": snap.version,
+            "games": {
+                "game_id": [str(g.game_id) for g in slate], "home": [g.home for g in slate], "away": [g.away for g in slate],
+                "p_home_win": _col(p_model), "fair_p_home": _col(p_home), "edge_home": _col(p_model - p_home),
+                "books": np.where(found, snap.n_ml[at], 0).tolist(),
+                "total": cons(snap.total), "fair_p_over": cons(snap.p_over), "total_books": np.where(found, snap.n_total[at], 0).tolist(),
+            },
+            "lines": {
+                "game": rows["game"].tolist(), "book": [snap.books[r] for r in rows["row"]],
+                "home_ml_decimal": _col(snap.prices[rows["row"], 0], 4), "away_ml_decimal": _col(snap.prices[rows["row"], 1], 4),
+                **{k: _col(rows[k]) for k in ("fair_home", "edge_home", "ev_home", "ev_away")},
+            },
+        }
+        return make_entry(json.dumps(body, separators=(",", ":")).encode())
+
+    versions = data_versions.get("games", "predictions")
+    key = versions and ("odds-edges", day, snap.method, snap.version, versions)
+    return response_cache.respond(request, await response_cache.get_or_build(key, build), "private, no-cache")
+
+@router.get("/{game_id}/fair")
+async def fair_prices(game_id: str, method: DevigMethod | None = None):
+    """Each book's vig-free probabilities for the game and the consensus across books."""
+    _require_ready()
+    snap = market_engine.snapshot(method)
+    i = snap.index.get(_game_id(game_id))
+    if i is None:
+        raise HTTPException(status_code=404, detail="No odds for this game")
+    rows = np.flatnonzero(snap.row_game == i)
+    return {
+        "game_id": game_id, "method": snap.method, "odds_version": snap.version,
+        "consensus": {
+            "p_home": _col(snap.p_home[i:i + 1])[0], "books": int(snap.n_ml[i]),
+            "total": _col(snap.total[i:i + 1], 1)[0], "p_over": _col(snap.p_over[i:i + 1])[0], "total_books": int(snap.n_total[i]),
+        },
+        "books": [
+            {"book": snap.books[r], "p_home": ph, "total": t, "p_over": po}
+            for r, ph, t, po in zip(rows.tolist(), _col(snap.fair_home[rows]), _col(snap.prices[rows, 2], 1), _col(snap.fair_over[rows]))
+        ],
+    }
+
+@router.get("/{game_id}/latest")
+async def latest_lines(game_id: str):
+    _require_ready()
+    lines = odds_index.lines(_game_id(game_id))
+    return {"game_id": game_id, "lines": [l.as_dict() for l in lines]}
+
+@router.get("/{game_id}/best")
+async def best_price(game_id: str):
+    _require_ready()
+    best = odds_index.best(_game_id(game_id))
+    if best is None:
+        raise HTTPException(status_code=404, detail="No odds for this game")
+    return best
+
+@router.get("/{game_id}/movement")
+async def line_movement(game_id: str, book: str | None = None, since: datetime | None = None):
+    """Columnar line history for the game (oldest first), optionally for one book and/or after `since`."""
+    _require_ready()
+    moves = odds_index.movement_for(_game_id(game_id), since=since, book=book)
+    if moves is None:
+        raise HTTPException(status_code=404, detail="No odds for this game")
+    return moves
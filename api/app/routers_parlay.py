@@ -1,10 +1,27 @@
 # api/app/routers_parlay.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Union
 from math import prod
+from dataclasses import asdict
+from datetime import date
+import asyncio, uuid
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .access import require_active_subscription
+from .audit import audit_log
+from .auth import get_db
+from .config import settings
+from .models import Prediction
+from .market import market_engine
+from .parlay_math import BatchValidationError, FlatLegs, decimal_to_american_arr, evaluate_batch, invalid_prices, to_decimal_arr
+from .parlay_search import candidate_legs, search
+from .parlays import InvalidParlay, normalize_leg, save as save_parlay
+from .slate import load_slate, served_predictions, today_et
+from .simulation import SimLeg, SimSpec, simulate
 
 router = APIRouter(prefix="/v1/parlay", tags=["parlay"])
 
@@ -13,10 +30,13 @@ class ParlayPick(BaseModel):
     selection: str = Field(..., description="e.g., NYY ML or Over 8.5")
     odds_type: Literal["american","decimal"]
     odds: float
+    game_id: Optional[str] = Field(None, description="Required to save")
+    line: Optional[float] = Field(None, description="Total line; required to save a Total pick")
 
 class BuildParlayRequest(BaseModel):
     stake: float = 10.0
     picks: List[ParlayPick]
+    save: bool = Field(False, description="Save as an open parlay; picks then need game_id, market ML/Total and selection HOME/AWAY/OVER/UNDER")
 
 class BuildParlayResponse(BaseModel):
     legs: int
@@ -25,33 +45,81 @@ class BuildParlayResponse(BaseModel):
     combined_american: int
     potential_payout: float
     potential_profit: float
+    fair_p_win: Optional[float] = Field(None, description="Vig-free market consensus P(win); null unless every pick is a priced ML/Total leg")
+    fair_expected_value: Optional[float] = None
+    parlay_id: Optional[str] = None
 
-def american_to_decimal(a: float) -> float:
-    if a > 0:
-        return 1 + (a / 100.0)
-    else:
-        return 1 + (100.0 / abs(a))
+OddsType = Literal["american","decimal"]
 
-def decimal_to_american(d: float) -> int:
-    if d >= 2.0:
-        return int(round((d - 1) * 100))
-    else:
-        return int(round(-100 / (d - 1)))
+class BatchParlay(BaseModel):
+    stake_cents: int = Field(..., ge=1)
+    odds: List[float] = Field(..., description="One price per leg")
+    odds_type: Union[OddsType, List[OddsType]] = Field("decimal", description="One type for all legs, or one per leg")
+    leg_probabilities: Optional[List[Optional[float]]] = Field(None, description="Model win probability per leg; null = implied by the price")
 
-@router.post("/build", response_model=BuildParlayResponse, dependencies=[Depends(require_active_subscription)])
-async def build_parlay(payload: BuildParlayRequest):
+class BatchEvaluateRequest(BaseModel):
+    parlays: List[BatchParlay]
+
+class SimulateLeg(BaseModel):
+    game_id: str
+    market: Literal["ML","TOTAL"]
+    selection: Literal["HOME","AWAY","OVER","UNDER"]
+    line: Optional[float] = None
+    price_decimal: float = Field(..., gt=1.0)
+    correlated_group_id: Optional[str] = None
+
+class SimulateParlayRequest(BaseModel):
+    stake_cents: int = Field(..., ge=1)
+    legs: List[SimulateLeg]
+    n_sims: Optional[int] = Field(None, ge=1000, description="Defaults to SIM_DEFAULT_SIMS, capped at SIM_MAX_SIMS")
+    seed: Optional[int] = None
+    workers: int = Field(1, ge=1, description="Shard across up to SIM_MAX_WORKERS processes")
+
+class SimulateParlayResponse(BaseModel):
+    legs: int
+    games: int
+    n_sims: int
+    p_win: float
+    p_win_se: float
+    p_independent: float
+    combined_decimal_odds: float
+    expected_value_cents: float
+    expected_value_se_cents: float
+    ev_positive: bool
+    elapsed_ms: float
+    truncated: bool
+
+@router.post("/build", response_model=BuildParlayResponse)
+async def build_parlay(payload: BuildParlayRequest, user=Depends(require_active_subscription), db: AsyncSession = Depends(get_db)):
     if not payload.picks:
         raise HTTPException(status_code=400, detail="No picks provided")
-    decimal_odds = []
-    for p in payload.picks:
-        if p.odds_type == "decimal":
-            decimal_odds.append(p.odds)
-        else:
-            decimal_odds.append(american_to_decimal(p.odds))
-    combined_decimal = prod(decimal_odds)
-    combined_american = decimal_to_american(combined_decimal)
+    audit_log.record(user["user"].id, "parlay.build", "parlay", details={"legs": len(payload.picks), "stake": payload.stake})
+    odds = np.fromiter((p.odds for p in payload.picks), dtype=np.float64, count=len(payload.picks))
+    is_american = np.fromiter((p.odds_type == "american" for p in payload.picks), dtype=bool, count=len(payload.picks))
+    bad = invalid_prices(odds, is_american)
+    if bad.any():
+        raise HTTPException(status_code=400, detail=f"Pick {int(np.argmax(bad))} has an invalid price")
+    decimal_odds = to_decimal_arr(odds, is_american)
+    combined_decimal = float(np.prod(decimal_odds))
+    combined_american = int(decimal_to_american_arr(np.asarray(combined_decimal)))
     payout = round(payload.stake * combined_decimal, 2)
     profit = round(payout - payload.stake, 2)
+    snap = market_engine.snapshot()
+    fair = [snap.fair(p.game_id, p.market, p.selection, p.line) for p in payload.picks]
+    fair_p = prod(fair) if None not in fair else None
+    fair_ev = round(fair_p * profit - (1 - fair_p) * payload.stake, 2) if fair_p is not None else None
+    parlay_id = None
+    if payload.save:
+        if payload.stake < 0.01:
+            raise HTTPException(status_code=400, detail="stake must be at least 0.01 to save")
+        try:
+            legs = []
+            for i, (p, dec) in enumerate(zip(payload.picks, decimal_odds.tolist())):
+                game_id, market, selection = normalize_leg(i, p.game_id, p.market, p.selection, p.line)
+                legs.append({"game_id": game_id, "market": market, "selection": selection, "line": p.line, "price_decimal": dec})
+            parlay_id = str(await save_parlay(db, user["user"].id, int(round(payload.stake * 100)), legs, "build", combined_decimal))
+        except InvalidParlay as e:
+            raise HTTPException(status_code=400, detail=str(e))
     return BuildParlayResponse(
         legs=len(payload.picks),
         stake=payload.stake,
@@ -59,4 +127,136 @@ async def build_parlay(payload: BuildParlayRequest):
         combined_american=combined_american,
         potential_payout=payout,
         potential_profit=profit,
+        fair_p_win=round(fair_p, 6) if fair_p is not None else None,
+        fair_expected_value=fair_ev,
+        parlay_id=parlay_id,
+    )
+
+@router.post("/evaluate-batch", dependencies=[Depends(require_active_subscription)])
+async def evaluate_parlay_batch(payload: BatchEvaluateRequest):
+    """Evaluate many parlays in one call. Response is columnar: one array per field, index-aligned with `parlays`."""
+    if len(payload.parlays) > settings.PARLAY_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {settings.PARLAY_BATCH_MAX} parlays per batch")
+    odds: list[float] = []
+    is_american: list[bool] = []
+    probs: list[float] = []
+    lengths: list[int] = []
+    for i, p in enumerate(payload.parlays):
+        n = len(p.odds)
+        if isinstance(p.odds_type, list):
+            if len(p.odds_type) != n:
+                raise HTTPException(status_code=400, detail=f"Parlay {i}: odds_type length does not match odds")
+            is_american.extend(t == "american" for t in p.odds_type)
+        else:
+            is_american.extend([p.odds_type == "american"] * n)
+        if p.leg_probabilities is None:
+            probs.extend([np.nan] * n)
+        elif len(p.leg_probabilities) != n:
+            raise HTTPException(status_code=400, detail=f"Parlay {i}: leg_probabilities length does not match odds")
+        else:
+            probs.extend(np.nan if x is None else x for x in p.leg_probabilities)
+        odds.extend(p.odds)
+        lengths.append(n)
+    try:
+        out = evaluate_batch(FlatLegs(
+            odds=np.asarray(odds, dtype=np.float64),
+            is_american=np.asarray(is_american, dtype=bool),
+            prob=np.asarray(probs, dtype=np.float64),
+            lengths=np.asarray(lengths, dtype=np.int64),
+            stake_cents=np.fromiter((p.stake_cents for p in payload.parlays), dtype=np.int64, count=len(payload.parlays)),
+        ))
+    except BatchValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Plain JSONResponse: skips the per-element jsonable_encoder walk over large arrays
+    return JSONResponse({"n": len(lengths), **{k: v.tolist() for k, v in out.items()}})
+
+@router.post("/simulate", response_model=SimulateParlayResponse, dependencies=[Depends(require_active_subscription)])
+async def simulate_parlay(payload: SimulateParlayRequest, db: AsyncSession = Depends(get_db)):
+    """Price a parlay by simulating joint game outcomes, so same-game ML + TOTAL legs are graded on one scoreline."""
+    if not payload.legs:
+        raise HTTPException(status_code=400, detail="No legs provided")
+    group_game: dict[str, str] = {}
+    for i, leg in enumerate(payload.legs):
+        if (leg.market == "ML") != (leg.selection in ("HOME", "AWAY")):
+            raise HTTPException(status_code=400, detail=f"Leg {i}: selection {leg.selection} does not fit market {leg.market}")
+        if leg.market == "TOTAL" and leg.line is None:
+            raise HTTPException(status_code=400, detail=f"Leg {i}: TOTAL legs need a line")
+        if leg.correlated_group_id and group_game.setdefault(leg.correlated_group_id, leg.game_id) != leg.game_id:
+            raise HTTPException(status_code=400, detail=f"Leg {i}: correlated_group_id {leg.correlated_group_id} spans more than one game")
+    try:
+        game_ids = list(dict.fromkeys(uuid.UUID(l.game_id) for l in payload.legs))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid game_id")
+    rows = (await db.execute(
+        select(Prediction.game_id, Prediction.pred_home_runs, Prediction.pred_away_runs)
+        .where(Prediction.game_id.in_(game_ids), *served_predictions())
+        .order_by(Prediction.game_id, Prediction.created_at.desc())
+        .distinct(Prediction.game_id)
+    )).all()
+    lam = {r.game_id: r for r in rows if r.pred_home_runs is not None and r.pred_away_runs is not None}
+    missing = [str(g) for g in game_ids if g not in lam]
+    if missing:
+        raise HTTPException(status_code=404, detail={"error": "no_run_projection", "game_ids": missing})
+    index = {g: i for i, g in enumerate(game_ids)}
+    spec = SimSpec(
+        lam_home=np.array([float(lam[g].pred_home_runs) for g in game_ids]),
+        lam_away=np.array([float(lam[g].pred_away_runs) for g in game_ids]),
+        legs=[SimLeg(index[uuid.UUID(l.game_id)], l.market, l.selection, l.line, l.price_decimal) for l in payload.legs],
+        shared=settings.SIM_SHARED_RUNS,
+    )
+    res = await simulate(
+        spec,
+        payload.stake_cents,
+        min(payload.n_sims or settings.SIM_DEFAULT_SIMS, settings.SIM_MAX_SIMS),
+        payload.seed,
+        workers=min(payload.workers, settings.SIM_MAX_WORKERS),
+    )
+    out = asdict(res)
+    return SimulateParlayResponse(
+        legs=len(payload.legs),
+        games=len(game_ids),
+        ev_positive=res.expected_value_cents >= 0,
+        **{k: round(v, 6) if isinstance(v, float) else v for k, v in out.items()},
+    )
+
+@router.get("/search", dependencies=[Depends(require_active_subscription)])
+async def search_parlays(
+    legs: int = Query(3, ge=2, le=8),
+    top: int = Query(10, ge=1),
+    objective: Literal["ev", "kelly"] = "ev",
+    markets: str = Query("ML,TOTAL", description="Comma-separated subset of ML,TOTAL"),
+    day: date | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Top-K independent k-leg parlays over a slate (default: today ET), using the latest best price per side."""
+    market_set = {m.strip().upper() for m in markets.split(",") if m.strip()}
+    if not market_set or not market_set <= {"ML", "TOTAL"}:
+        raise HTTPException(status_code=400, detail="markets must be a subset of ML,TOTAL")
+    slate = await load_slate(db, day or today_et())
+    candidates = candidate_legs(slate, market_set)
+    res = await asyncio.get_running_loop().run_in_executor(
+        None, search, candidates, legs, min(top, settings.SEARCH_MAX_TOP), objective,
+        settings.SEARCH_TIME_LIMIT_MS / 1000.0, settings.SEARCH_MAX_NODES,
     )
+    return {
+        "objective": objective,
+        "games": len(slate),
+        "candidate_legs": len(candidates),
+        "nodes": res.nodes,
+        "truncated": res.truncated,
+        "elapsed_ms": round(res.elapsed_ms, 2),
+        "parlays": [
+            {
+                "score": round(score, 6),
+                "combined_decimal_odds": round(prod(l.price_decimal for l in chosen), 4),
+                "p_parlay_win": round(prod(l.p_win for l in chosen), 6),
+                "expected_return": round(prod(l.expected_return for l in chosen), 6),
+                "legs": [
+                    {"game_id": l.game_id, "market": l.market, "selection": l.selection, "line": l.line,
+                     "price_decimal": l.price_decimal, "leg_probability": round(l.p_win, 6)}
+                    for l in chosen
+                ],
+            }
+            for score, chosen in res.parlays
+        ],
+    }
@@ -0,0 +1,74 @@
+# api/app/routers_parlays.py
+from datetime import date
+from typing import Literal, Optional
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .auth import get_db, require_auth
+from .models import Parlay, ParlayLeg
+
+# Saved parlays (POST /v1/parlay/build or /v1/parlays/evaluate with save=true) and their realized P&L
+router = APIRouter(prefix="/v1/parlays", tags=["parlays"])
+
+def _parlay_json(p: Parlay, legs: list[ParlayLeg]) -> dict:
+    return {
+        "id": str(p.id), "status": p.status, "source": p.source, "stake_cents": p.stake_cents,
+        "combined_decimal_odds": float(p.combined_decimal_odds) if p.combined_decimal_odds is not None else None,
+        "expected_value_cents": p.expected_value_cents, "payout_cents": p.payout_cents, "pnl_cents": p.pnl_cents,
+        "created_at": p.created_at.isoformat(), "settled_at": p.settled_at.isoformat() if p.settled_at else None,
+        "legs": [{
+            "game_id": str(l.game_id), "market": l.market, "selection": l.selection,
+            "line": float(l.line) if l.line is not None else None,
+            "price_decimal": float(l.price_decimal) if l.price_decimal is not None else None,
+            "result": l.result,
+        } for l in legs],
+    }
+
+@router.get("")
+async def list_parlays(
+    status: Optional[Literal["open", "won", "lost", "void"]] = None,
+    limit: int = Query(50, ge=1, le=200),
+    user=Depends(require_auth),
+    db: AsyncSession = Depends(get_db),
+):
+    q = select(Parlay).where(Parlay.user_id == user["user"].id)
+    if status:
+        q = q.where(Parlay.status == status)
+    parlays = (await db.execute(q.order_by(Parlay.created_at.desc()).limit(limit))).scalars().all()
+    legs: dict[uuid.UUID, list[ParlayLeg]] = {p.id: [] for p in parlays}
+    if parlays:
+        for l in (await db.execute(select(ParlayLeg).where(ParlayLeg.parlay_id.in_(list(legs))))).scalars():
+            legs[l.parlay_id].append(l)
+    return [_parlay_json(p, legs[p.id]) for p in parlays]
+
+@router.get("/pnl")
+async def parlay_pnl(from_date: Optional[date] = None, to_date: Optional[date] = None,
+                     user=Depends(require_auth), db: AsyncSession = Depends(get_db)):
+    """Realized P&L by settlement day (ET), written by the settlement job; plus the open exposure."""
+    rows = (await db.execute(text("""
+        SELECT day, n_settled, n_won, n_lost, n_void, staked_cents, pnl_cents FROM parlay_pnl
+        WHERE user_id = :user_id AND (CAST(:from_date AS date) IS NULL OR day >= :from_date)
+          AND (CAST(:to_date AS date) IS NULL OR day <= :to_date)
+        ORDER BY day
+    """), {"user_id": user["user"].id, "from_date": from_date, "to_date": to_date})).all()
+    open_n, open_stake = (await db.execute(
+        select(func.count(), func.coalesce(func.sum(Parlay.stake_cents), 0))
+        .where(Parlay.user_id == user["user"].id, Parlay.status == "open")
+    )).one()
+    days = [{**r._asdict(), "day": r.day.isoformat()} for r in rows]
+    return {
+        "days": days,
+        "total": {k: sum(d[k] for d in days) for k in ("n_settled", "n_won", "n_lost", "n_void", "staked_cents", "pnl_cents")},
+        "open": {"n": open_n, "staked_cents": int(open_stake)},
+    }
+
+@router.get("/{parlay_id}")
+async def get_parlay(parlay_id: uuid.UUID, user=Depends(require_auth), db: AsyncSession = Depends(get_db)):
+    p = (await db.execute(select(Parlay).where(Parlay.id == parlay_id, Parlay.user_id == user["user"].id))).scalar_one_or_none()
+    if p is None:
+        raise HTTPException(status_code=404, detail="Parlay not found")
+    legs = (await db.execute(select(ParlayLeg).where(ParlayLeg.parlay_id == parlay_id))).scalars().all()
+    return _parlay_json(p, list(legs))
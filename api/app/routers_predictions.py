@@ -1,131 +1,136 @@
 # api/app/routers_predictions.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Literal
 from math import prod
-from .auth import require_auth
+import json
+from .audit import audit_log
+from .parlays import InvalidParlay, normalize_leg, save as save_parlay
+from .auth import require_auth, get_db
+from .market import market_engine
+from .history import InvalidCursor, decode_cursor, encode_cursor, history_query, row_to_item, stream_history
+from .response_cache import data_versions, make_entry, response_cache
+from .rollups import WINDOWS, accuracy_snapshot
+from .slate import load_slate, today_et
 from .schemas import Prediction, ParlayEvalRequest, ParlayEvalResponse
 
 router = APIRouter(prefix="/v1", tags=["predictions"])
 
+_predictions_json = TypeAdapter(list[Prediction])
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
 @router.get("/predictions/history")
-async def history(from_date: str | None = None, to_date: str | None = None):
-    # Seeded sample rows for UI demo; replace with DB query in Phase 3
-    return [
-  {
-    "game_id": "uuid-1",
-    "date": "2025-08-10",
-    "home": "NYY",
-    "away": "BOS",
-    "p_home_win": 0.62,
-    "expected_total": 8.4,
-    "pred_home_runs": 5.1,
-    "pred_away_runs": 3.3,
-    "confidence": 0.78,
-    "result": {
-      "winner": "HOME",
-      "home_runs": 6,
-      "away_runs": 3,
-      "win": True
-    }
-  },
-  {
-    "game_id": "uuid-2",
-    "date": "2025-08-11",
-    "home": "LAD",
-    "away": "SF",
-    "p_home_win": 0.55,
-    "expected_total": 8.0,
-    "pred_home_runs": 4.2,
-    "pred_away_runs": 3.8,
-    "confidence": 0.64,
-    "result": {
-      "winner": "AWAY",
-      "home_runs": 3,
-      "away_runs": 4,
-      "win": False
-    }
-  },
-  {
-    "game_id": "uuid-3",
-    "date": "2025-08-12",
-    "home": "ATL",
-    "away": "PHI",
-    "p_home_win": 0.58,
-    "expected_total": 9.1,
-    "pred_home_runs": 5.0,
-    "pred_away_runs": 4.1,
-    "confidence": 0.69,
-    "result": {
-      "winner": "HOME",
-      "home_runs": 7,
-      "away_runs": 4,
-      "win": True
-    }
-  },
-  {
-    "game_id": "uuid-4",
-    "date": "2025-08-13",
-    "home": "HOU",
-    "away": "TEX",
-    "p_home_win": 0.47,
-    "expected_total": 8.7,
-    "pred_home_runs": 4.1,
-    "pred_away_runs": 4.6,
-    "confidence": 0.55,
-    "result": {
-      "winner": "AWAY",
-      "home_runs": 3,
-      "away_runs": 6,
-      "win": False
-    }
-  },
-  {
-    "game_id": "uuid-5",
-    "date": "2025-08-14",
-    "home": "CHC",
-    "away": "STL",
-    "p_home_win": 0.51,
-    "expected_total": 8.2,
-    "pred_home_runs": 4.3,
-    "pred_away_runs": 3.9,
-    "confidence": 0.58,
-    "result": {
-      "winner": "HOME",
-      "home_runs": 5,
-      "away_runs": 4,
-      "win": True
-    }
-  }
-]
+async def history(
+    request: Request,
+    from_date: date | None = None,
+    to_date: date | None = None,
+    cursor: str | None = None,
+    limit: int = Query(200, ge=1, le=1000),
+    fmt: Literal["json", "ndjson", "csv"] = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Public archived predictions with outcomes, oldest first.
+    json: one page of `limit` rows; pass the X-Next-Cursor response header back as `cursor` for the next page.
+    ndjson/csv: the whole range streamed from a server-side cursor (limit is ignored, cursor still resumes).
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stmt = history_query(from_date, to_date, after)
+    if fmt != "json":
+        media = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        return StreamingResponse(stream_history(stmt, fmt), media_type=media)
+
+    async def build():
+        rows = (await db.execute(stmt.limit(limit + 1))).all()
+        headers = {}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(rows[-1].game_date, rows[-1].game_id, rows[-1].id)
+        return make_entry(_dumps([row_to_item(r) for r in rows]), headers)
+
+    versions = data_versions.get("games", "prediction_archive", "outcomes")
+    key = versions and ("history", from_date, to_date, cursor, limit, versions)
+    return response_cache.respond(request, await response_cache.get_or_build(key, build), "public, no-cache")
 
 @router.get("/accuracy")
-async def accuracy(window: str = "30d"):
-    return {"window": window, "as_of": "2025-08-14", "win_pct": 0.586, "roi_pct": 0.072, "n_picks": 210}
+async def accuracy(request: Request, window: str = "30d"):
+    # Served from the in-memory rollup snapshot; never touches the raw tables on the request path
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {', '.join(WINDOWS)}")
+
+    async def build():
+        return make_entry(_dumps(accuracy_snapshot.get(window)))
+
+    key = accuracy_snapshot.loaded_at and ("accuracy", window, accuracy_snapshot.loaded_at)
+    return response_cache.respond(request, await response_cache.get_or_build(key, build), "public, no-cache")
 
 @router.get("/predictions/today")
-async def todays_predictions(user=Depends(require_auth)):
+async def todays_predictions(request: Request, user=Depends(require_auth), db: AsyncSession = Depends(get_db)):
+    # Entitlement (require_auth) has already run; only then is the shared cached body served
+    day = today_et()
+    audit_log.record(user["user"].id, "predictions.today", "slate", details={"day": day.isoformat()})
+
+    async def build():
+        slate = await load_slate(db, day, with_odds=False)
+        return make_entry(_predictions_json.dump_json(_today_items(slate)))
+
+    versions = data_versions.get("games", "predictions")
+    key = versions and ("today", day, versions)
+    return response_cache.respond(request, await response_cache.get_or_build(key, build), "private, no-cache")
+
+def _today_items(slate) -> list[Prediction]:
     return [Prediction(
-        game_id="uuid-today-1",
-        date="2025-08-15",
-        home="NYY",
-        away="BOS",
-        p_home_win=0.60,
-        expected_total=8.3,
-        pred_home_runs=4.7,
-        pred_away_runs=3.6,
-        confidence=0.75
-    )]
+        game_id=str(g.game_id),
+        date=g.game_date.isoformat(),
+        home=g.home,
+        away=g.away,
+        p_home_win=g.p_home_win,
+        expected_total=g.expected_total,
+        pred_home_runs=g.pred_home_runs,
+        pred_away_runs=g.pred_away_runs,
+        confidence=g.confidence,
+    ) for g in slate]
 
 @router.post("/parlays/evaluate", response_model=ParlayEvalResponse)
-async def evaluate_parlay(body: ParlayEvalRequest, user=Depends(require_auth)):
+async def evaluate_parlay(body: ParlayEvalRequest, user=Depends(require_auth), db: AsyncSession = Depends(get_db)):
     if not body.legs:
         raise HTTPException(status_code=400, detail="No legs provided")
+    audit_log.record(user["user"].id, "parlays.evaluate", "parlay", details={"legs": len(body.legs), "stake_cents": body.stake_cents})
+    probs = [leg.leg_probability for leg in body.legs]
+    if None in probs:
+        snap = market_engine.snapshot()
+        for i, leg in enumerate(body.legs):
+            if probs[i] is None:
+                probs[i] = snap.fair(leg.game_id, leg.market, leg.selection, leg.line)
+                if probs[i] is None:
+                    raise HTTPException(status_code=400, detail=f"Leg {i}: no leg_probability and no market consensus for this leg")
     combined_decimal_odds = prod(leg.price_decimal for leg in body.legs)
-    p_parlay_win = prod(max(0.0, min(1.0, leg.leg_probability)) for leg in body.legs)
+    p_parlay_win = prod(max(0.0, min(1.0, p)) for p in probs)
     payout_cents = int(round(body.stake_cents * combined_decimal_odds - body.stake_cents))
     expected_value = p_parlay_win * payout_cents - (1 - p_parlay_win) * body.stake_cents
+    parlay_id = None
+    if body.save:
+        try:
+            legs = []
+            for i, (leg, p) in enumerate(zip(body.legs, probs)):
+                game_id, market, selection = normalize_leg(i, leg.game_id, leg.market, leg.selection, leg.line)
+                legs.append({"game_id": game_id, "market": market, "selection": selection, "line": leg.line,
+                             "price_decimal": leg.price_decimal, "leg_probability": p})
+            parlay_id = str(await save_parlay(db, user["user"].id, body.stake_cents, legs, "evaluate",
+                                              combined_decimal_odds, int(round(expected_value))))
+        except InvalidParlay as e:
+            raise HTTPException(status_code=400, detail=str(e))
     return ParlayEvalResponse(
         combined_decimal_odds=round(combined_decimal_odds, 4),
         p_parlay_win=round(p_parlay_win, 6),
         expected_value_cents=int(round(expected_value)),
-        ev_positive=expected_value >= 0
+        ev_positive=expected_value >= 0,
+        parlay_id=parlay_id,
     )
@@ -0,0 +1,32 @@
+# api/app/routers_seasons.py
+import json
+
+from fastapi import APIRouter, HTTPException, Request
+
+from .response_cache import make_entry, response_cache
+from .season_store import season_store
+
+# Public analytics over finished seasons, served from the memory-mapped season store (no DB)
+router = APIRouter(prefix="/v1/seasons", tags=["seasons"])
+
+@router.get("")
+async def list_seasons():
+    out = []
+    for year in season_store.seasons():
+        s = season_store.get(year)
+        if s is not None:
+            out.append({"season": year, "games": len(s), "settled": int((s.cols["winner"] >= 0).sum()), "teams": len(s.teams)})
+    return out
+
+@router.get("/{season}/teams")
+async def team_splits(season: int, request: Request):
+    """Per-team record of the model's ML picks on and against each team, flat 1 unit at the closing price."""
+    s = season_store.get(season)
+    if s is None:
+        raise HTTPException(status_code=404, detail=f"Season {season} is not in the season store")
+
+    async def build():
+        return make_entry(json.dumps(s.team_splits(), separators=(",", ":")).encode())
+
+    # Keyed on the snapshot's directory, which changes whenever the season is rewritten
+    return response_cache.respond(request, await response_cache.get_or_build(("season_teams", season, str(s.path)), build), "public, no-cache")
@@ -0,0 +1,21 @@
+# api/app/routers_teams.py
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from .access import require_active_subscription
+from .team_features import team_feature_store
+
+# Rolling team form (model inputs), served from the in-memory team feature store
+router = APIRouter(prefix="/v1/teams", tags=["teams"], dependencies=[Depends(require_active_subscription)])
+
+@router.get("/{team}/features")
+async def team_features(team: str, day: Optional[date] = None):
+    """The team's features going into a game on `day` (latest row before it); default: its latest row."""
+    if not team_feature_store.ready:
+        raise HTTPException(status_code=503, detail="Team features are loading")
+    out = team_feature_store.lookup(team.upper(), day)
+    if out is None:
+        raise HTTPException(status_code=404, detail=f"No features for {team.upper()}" + (f" before {day}" if day else ""))
+    return out
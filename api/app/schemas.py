@@ -25,13 +25,15 @@ class ParlayLeg(BaseModel):
     market: str
     selection: str
     line: float | None = None
-    price_decimal: float
-    leg_probability: float
+    price_decimal: float = Field(gt=1.0)
+    leg_probability: float | None = Field(None, description="Model win probability; null = vig-free market consensus")
 class ParlayEvalRequest(BaseModel):
     stake_cents: int = Field(ge=1)
     legs: list[ParlayLeg]
+    save: bool = Field(False, description="Save as an open parlay, settled when its games finish (ML/TOTAL legs only)")
 class ParlayEvalResponse(BaseModel):
     combined_decimal_odds: float
     p_parlay_win: float
     expected_value_cents: int
     ev_positive: bool
+    parlay_id: str | None = None
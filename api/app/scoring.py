@@ -0,0 +1,253 @@
+# api/app/scoring.py
+"""Batch slate scoring: one feature matrix per slate, one vectorized pass per model version, one bulk write.
+
+    python -m app.scoring                                   # today's slate (ET) with MODEL_VERSION + SHADOW_MODEL_VERSIONS
+    python -m app.scoring --day 2026-07-04 --version baseline-v2
+    python -m app.scoring --from-date 2026-04-01 --to-date 2026-09-30 --dry-run     # backfill-sized benchmark
+
+Stages: load the games (one query), build the feature matrix from the sportsbook lines, park factor,
+weather_json and each team's rolling form going into the game (team_features), score every requested
+model version concurrently on the default executor (numpy releases the GIL), then delete the range's
+previous rows for those versions and insert the new ones in a single transaction. Timings are reported
+per stage and per version, with shadow-vs-primary agreement stats.
+
+Only MODEL_VERSION is served (load_slate and the archive publisher filter on it when it is set), so
+shadow versions can be written next to it for comparison without reaching users.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+import argparse, asyncio, json, math, time, uuid
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .models import Game, Prediction
+from .parlay_math import american_to_decimal_arr
+from .slate import today_et
+from .team_features import FEATURE_NAMES, TeamFeatureStore, apply_pending, team_feature_store
+
+FEATURES = ("market_logit", "has_market", "market_total", "park", "temp", "wind_out",
+            "home_rd_10", "away_rd_10", "home_home_win", "away_away_win")
+VIG = 1.045                 # typical two-way overround, removed from the single home price we have
+HOME_P = 0.54               # prior when there is no line
+LEAGUE_TOTAL = 8.8
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Logistic win model and linear total model over FEATURES; runs are split by win probability."""
+    version: str
+    win_weights: dict
+    win_bias: float = 0.0
+    total_weights: dict = field(default_factory=dict)
+    total_bias: float = 0.0
+    run_split: float = 0.35     # home share of the total moves this much per unit of (p_home - 0.5)
+
+    def vectors(self) -> tuple[np.ndarray, np.ndarray]:
+        unknown = (set(self.win_weights) | set(self.total_weights)) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"{self.version}: unknown features {sorted(unknown)}")
+        return (np.array([self.win_weights.get(f, 0.0) for f in FEATURES]),
+                np.array([self.total_weights.get(f, 0.0) for f in FEATURES]))
+
+# Market-anchored baselines; real model versions are added with --models / SCORING_MODELS_FILE
+BUILTIN_MODELS = {
+    m.version: m for m in (
+        ModelSpec("baseline-v1", {"market_logit": 1.0}, 0.0,
+                  {"market_total": 1.0, "park": 8.0, "temp": 0.25, "wind_out": 0.08}, 0.0),
+        ModelSpec("baseline-v2", {"market_logit": 0.92, "has_market": -0.02, "home_rd_10": 0.04, "away_rd_10": -0.04}, 0.04,
+                  {"market_total": 0.9, "park": 9.0, "temp": 0.3, "wind_out": 0.1}, 0.9),
+    )
+}
+
+@dataclass
+class Slate:
+    game_ids: list[uuid.UUID]
+    days: list[date]
+    X: np.ndarray               # (games, len(FEATURES))
+
+@dataclass
+class Scored:
+    version: str
+    p_home: np.ndarray
+    expected_total: np.ndarray
+    home_runs: np.ndarray
+    away_runs: np.ndarray
+    confidence: np.ndarray
+    seconds: float
+
+def load_models(path: Optional[str]) -> dict[str, ModelSpec]:
+    models = dict(BUILTIN_MODELS)
+    if path:
+        with open(path) as fh:
+            for d in json.load(fh):
+                spec = ModelSpec(**d)
+                spec.vectors()
+                models[spec.version] = spec
+    return models
+
+def _num(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _weather(w) -> tuple[float, float]:
+    """(temperature F, wind blowing out in mph; negative = in) from a loosely structured weather_json."""
+    if not isinstance(w, dict):
+        return math.nan, 0.0
+    temp = _num(w.get("temp_f", w.get("temperature_f", w.get("temp"))))
+    mph = _num(w.get("wind_mph", w.get("wind_speed")))
+    direction = str(w.get("wind_dir", w.get("wind_direction", ""))).lower()
+    if math.isnan(mph):
+        return temp, 0.0
+    return temp, mph if "out" in direction else -mph if "in" in direction else 0.0
+
+_TEAM_COLS = [FEATURE_NAMES.index(f) for f in ("run_diff_10", "home_win_pct", "away_win_pct")]
+
+def _team_form(teams: Optional[TeamFeatureStore], team: str, day: date) -> list[float]:
+    """(run diff per game over the last 10, home win pct, away win pct) going into `day`; NaN if unknown."""
+    vec = teams.before(team, day) if teams is not None else None
+    return [math.nan if vec is None or vec[i] is None else vec[i] for i in _TEAM_COLS]
+
+def build_features(games: list, teams: Optional[TeamFeatureStore] = None) -> np.ndarray:
+    """Feature matrix for Game rows (or anything with the same attributes), columns in FEATURES order."""
+    n = len(games)
+    line = np.array([_num(g.sportsbook_line_home_ml) for g in games], dtype=np.float64)
+    total = np.array([_num(g.sportsbook_total) for g in games], dtype=np.float64)
+    park = np.array([_num(g.park_factor) for g in games], dtype=np.float64)
+    weather = np.array([_weather(g.weather_json) for g in games], dtype=np.float64).reshape(n, 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Stored lines are American (-150) or decimal (1.67)
+        dec = np.where(np.abs(line) >= 100, american_to_decimal_arr(np.where(np.abs(line) >= 100, line, 100.0)), line)
+        p = np.clip(1.0 / dec / VIG, 0.02, 0.98)
+    has = np.isfinite(p) & (dec > 1.0)
+    p = np.where(has, p, HOME_P)
+    X = np.empty((n, len(FEATURES)))
+    X[:, 0] = np.log(p / (1.0 - p))
+    X[:, 1] = has
+    X[:, 2] = np.where(np.isfinite(total), total, LEAGUE_TOTAL)
+    park = np.where(park > 10, park / 100.0, park)      # accept 105 as well as 1.05
+    X[:, 3] = np.where(np.isfinite(park), park - 1.0, 0.0)
+    X[:, 4] = np.where(np.isfinite(weather[:, 0]), (weather[:, 0] - 70.0) / 10.0, 0.0)
+    X[:, 5] = weather[:, 1]
+    home = np.array([_team_form(teams, g.home_abbr, g.game_date) for g in games], dtype=np.float64).reshape(n, 3)
+    away = np.array([_team_form(teams, g.away_abbr, g.game_date) for g in games], dtype=np.float64).reshape(n, 3)
+    X[:, 6] = np.nan_to_num(home[:, 0])
+    X[:, 7] = np.nan_to_num(away[:, 0])
+    X[:, 8] = np.where(np.isfinite(home[:, 1]), home[:, 1] - 0.5, 0.0)
+    X[:, 9] = np.where(np.isfinite(away[:, 2]), away[:, 2] - 0.5, 0.0)
+    return X
+
+def score(spec: ModelSpec, X: np.ndarray) -> Scored:
+    started = time.perf_counter()
+    w_win, w_total = spec.vectors()
+    p = 1.0 / (1.0 + np.exp(-(X @ w_win + spec.win_bias)))
+    total = np.clip(X @ w_total + spec.total_bias, 3.0, 20.0)
+    home = total * (0.5 + spec.run_split * (p - 0.5))
+    return Scored(spec.version, p, total, home, total - home, np.abs(p - 0.5) * 2.0, time.perf_counter() - started)
+
+async def load_games(db: AsyncSession, first: date, last: date) -> list[Game]:
+    return list((await db.execute(
+        select(Game).where(Game.game_date >= first, Game.game_date <= last).order_by(Game.game_date, Game.id)
+    )).scalars().all())
+
+def compare(primary: Scored, other: Scored) -> dict:
+    dp = other.p_home - primary.p_home
+    return {
+        "mean_abs_dp": round(float(np.mean(np.abs(dp))), 6),
+        "max_abs_dp": round(float(np.max(np.abs(dp))), 6),
+        "same_side": round(float(np.mean((other.p_home >= 0.5) == (primary.p_home >= 0.5))), 4),
+        "mean_d_total": round(float(np.mean(other.expected_total - primary.expected_total)), 4),
+    }
+
+async def write(db: AsyncSession, slate: Slate, results: list[Scored], replace: bool = True) -> int:
+    """All versions in one transaction; with replace, the range's earlier rows for those versions go first."""
+    now = datetime.now(tz=timezone.utc)
+    # One created_at per version, the served one newest, so "latest prediction per game" never ties between versions
+    ranked = sorted((r.version for r in results), key=lambda v: v == settings.MODEL_VERSION)
+    stamp = {v: now + timedelta(microseconds=i) for i, v in enumerate(ranked)}
+    rows = [
+        {
+            "id": uuid.uuid4(), "game_id": gid, "model_version": r.version, "p_home_win": round(float(r.p_home[i]), 4),
+            "expected_total": round(float(r.expected_total[i]), 2), "pred_home_runs": round(float(r.home_runs[i]), 2),
+            "pred_away_runs": round(float(r.away_runs[i]), 2), "confidence": round(float(r.confidence[i]), 4),
+            "extras_json": {"features": dict(zip(FEATURES, np.round(slate.X[i], 4).tolist()))}, "created_at": stamp[r.version],
+        }
+        for r in results for i, gid in enumerate(slate.game_ids)
+    ]
+    if replace:
+        await db.execute(delete(Prediction).where(
+            Prediction.game_id.in_(slate.game_ids), Prediction.model_version.in_([r.version for r in results]),
+        ))
+    if rows:
+        await db.execute(insert(Prediction), rows)
+    await db.commit()
+    return len(rows)
+
+async def run(db: AsyncSession, first: date, last: date, versions: list[str], models: dict[str, ModelSpec],
+              dry_run: bool = False, replace: bool = True) -> dict:
+    missing = [v for v in versions if v not in models]
+    if missing:
+        raise ValueError(f"unknown model version(s): {', '.join(missing)}")
+    if len(versions) > 1 and not settings.MODEL_VERSION:
+        raise ValueError("set MODEL_VERSION before writing shadow versions, or they would be served")
+    timings: dict[str, float] = {}
+    t = time.perf_counter()
+    games = await load_games(db, first, last)
+    timings["load_ms"] = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    if not dry_run:
+        await apply_pending(db)
+    await team_feature_store.refresh(db)
+    timings["team_features_ms"] = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    slate = Slate([g.id for g in games], [g.game_date for g in games], build_features(games, team_feature_store))
+    timings["features_ms"] = (time.perf_counter() - t) * 1000
+    loop = asyncio.get_running_loop()
+    t = time.perf_counter()
+    results = await asyncio.gather(*(loop.run_in_executor(None, score, models[v], slate.X) for v in versions))
+    timings["score_ms"] = (time.perf_counter() - t) * 1000
+    written = 0
+    if not dry_run and slate.game_ids:
+        t = time.perf_counter()
+        written = await write(db, slate, list(results), replace)
+        timings["write_ms"] = (time.perf_counter() - t) * 1000
+    primary = next((r for r in results if r.version == settings.MODEL_VERSION), results[0])
+    return {
+        "from_date": first.isoformat(), "to_date": last.isoformat(), "games": len(slate.game_ids),
+        "versions": versions, "primary": primary.version, "rows_written": written,
+        "timings_ms": {k: round(v, 3) for k, v in timings.items()},
+        "version_ms": {r.version: round(r.seconds * 1000, 3) for r in results},
+        "shadow": {r.version: compare(primary, r) for r in results if r is not primary and slate.game_ids},
+    }
+
+def _versions(a: argparse.Namespace) -> list[str]:
+    if a.version:
+        return a.version
+    versions = [settings.MODEL_VERSION or "baseline-v1"] + [v.strip() for v in settings.SHADOW_MODEL_VERSIONS.split(",") if v.strip()]
+    return list(dict.fromkeys(versions))
+
+async def _main(a: argparse.Namespace) -> None:
+    from .db import SessionLocal
+    first = date.fromisoformat(a.from_date or a.day) if (a.from_date or a.day) else today_et()
+    last = date.fromisoformat(a.to_date) if a.to_date else first
+    async with SessionLocal() as db:
+        try:
+            res = await run(db, first, last, _versions(a), load_models(a.models or settings.SCORING_MODELS_FILE or None), a.dry_run, not a.keep_previous)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    print(json.dumps(res))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Score a slate with one or more model versions")
+    ap.add_argument("--day", help="Default: today (ET)")
+    ap.add_argument("--from-date")
+    ap.add_argument("--to-date")
+    ap.add_argument("--version", action="append", help="Repeatable; default MODEL_VERSION + SHADOW_MODEL_VERSIONS")
+    ap.add_argument("--models", help="JSON list of ModelSpec objects")
+    ap.add_argument("--dry-run", action="store_true", help="Load, build and score; don't write")
+    ap.add_argument("--keep-previous", action="store_true", help="Append instead of replacing earlier rows for these versions")
+    asyncio.run(_main(ap.parse_args()))
@@ -0,0 +1,265 @@
+# api/app/season_store.py
+"""Read-only columnar snapshots of finished seasons, memory-mapped by every worker.
+
+A season (calendar year of game_date) is written once after it closes, as one directory of .npy files:
+fixed-width numeric columns, one row per archived game in (game_date, game id) order, with team
+abbreviations and model versions dictionary-encoded (codes in the columns, strings in meta.json).
+Readers np.load(..., mmap_mode="r"): pages come from the OS page cache, so all uvicorn workers share one
+copy and nothing is parsed or allocated per row. Historical reads over stored seasons (backtests, team
+splits) no longer touch Postgres.
+
+Layout under SEASON_STORE_DIR:
+    2025 -> 2025.1760000000      symlink swapped atomically on rewrite; the version it replaced is kept
+                                 until the next write, so readers mid-open never lose their files
+    2025.1760000000/meta.json    format, season, rows, teams, model_versions, per-column dtype/shape/sha256
+    2025.1760000000/<column>.npy
+
+    python -m app.season_store write 2025            # refuses the current season unless --force
+    python -m app.season_store list
+    python -m app.season_store splits 2025
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Optional
+import argparse, asyncio, hashlib, json, os, shutil, sys, time, uuid
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+
+FORMAT_VERSION = 1
+EPOCH = date(1970, 1, 1)
+
+# name -> dtype; missing floats are NaN, missing ints -1
+COLUMNS = {
+    "game_id": "u1",            # (rows, 16) raw UUID bytes
+    "day": "i4",                # days since 1970-01-01
+    "start_ts": "i8",           # first pitch, epoch seconds
+    "home": "u1", "away": "u1", "model_version": "u2",
+    "p_home_win": "f4", "confidence": "f4", "expected_total": "f4", "pred_home_runs": "f4", "pred_away_runs": "f4",
+    "winner": "i1",             # 1 home, 0 away, -1 unsettled
+    "home_runs": "i2", "away_runs": "i2",
+    "bet_home": "f4", "bet_away": "f4", "bet_line": "f4", "bet_over": "f4", "bet_under": "f4",
+    "close_home": "f4", "close_away": "f4", "close_line": "f4", "close_over": "f4", "close_under": "f4",
+}
+
+# Latest archived pick per game in the season, its outcome, and prices at publication and at the close
+# (same definitions as the backtester)
+_SEASON_SQL = text("""
+SELECT DISTINCT ON (g.game_date, g.id)
+  g.id, g.game_date, g.start_time_et, g.home_abbr, g.away_abbr,
+  pa.model_version_snapshot, pa.p_home_win, pa.confidence, pa.expected_total, pa.pred_home_runs, pa.pred_away_runs,
+  o.winner, o.actual_home_runs, o.actual_away_runs,
+  b.home_ml_decimal AS bet_home, b.away_ml_decimal AS bet_away, b.total AS bet_line, b.over_price_dec AS bet_over, b.under_price_dec AS bet_under,
+  c.home_ml_decimal AS close_home, c.away_ml_decimal AS close_away, c.total AS close_line, c.over_price_dec AS close_over, c.under_price_dec AS close_under
+FROM games g
+JOIN LATERAL (
+  SELECT model_version_snapshot, p_home_win, confidence, expected_total, pred_home_runs, pred_away_runs, published_at
+    FROM prediction_archive WHERE game_id = g.id ORDER BY published_at DESC LIMIT 1
+) pa ON true
+LEFT JOIN outcomes o ON o.game_id = g.id AND o.winner IS NOT NULL
+LEFT JOIN LATERAL (
+  SELECT * FROM odds_snapshots s WHERE s.game_id = g.id AND s.ts <= pa.published_at ORDER BY s.ts DESC LIMIT 1
+) b ON true
+LEFT JOIN LATERAL (
+  SELECT * FROM odds_snapshots s WHERE s.game_id = g.id AND (g.start_time_et IS NULL OR s.ts <= g.start_time_et)
+   ORDER BY s.ts DESC LIMIT 1
+) c ON true
+WHERE g.game_date >= :first AND g.game_date <= :last
+ORDER BY g.game_date, g.id, o.closed_at DESC NULLS LAST
+""")
+
+class StoreError(Exception):
+    pass
+
+@dataclass
+class Season:
+    season: int
+    path: Path
+    rows: int
+    teams: tuple[str, ...]
+    model_versions: tuple[str, ...]
+    cols: dict[str, np.ndarray]     # read-only memory maps
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def game_ids(self) -> list[uuid.UUID]:
+        return [uuid.UUID(bytes=bytes(b)) for b in self.cols["game_id"]]
+
+    def team_splits(self) -> list[dict]:
+        """Per team: settled ML picks on and against it, flat 1 unit at the closing price (missing price = unpriced)."""
+        c = self.cols
+        settled = c["winner"] >= 0
+        home_pick = c["p_home_win"] >= 0.5
+        won = settled & (home_pick == (c["winner"] == 1))
+        price = np.where(home_pick, c["close_home"], c["close_away"]).astype(np.float64)
+        priced = settled & ~np.isnan(price)
+        units = np.where(priced, np.where(won, price - 1.0, -1.0), 0.0)
+        picked = np.where(home_pick, c["home"], c["away"])
+        faded = np.where(home_pick, c["away"], c["home"])
+        n = len(self.teams)
+
+        def count(codes, weights=None):
+            return np.bincount(codes[settled], weights=None if weights is None else weights[settled], minlength=n)
+
+        games = np.bincount(c["home"], minlength=n) + np.bincount(c["away"], minlength=n)
+        p_n, p_w, p_u, p_priced = count(picked), count(picked, won.astype(np.float64)), count(picked, units), count(picked, priced.astype(np.float64))
+        f_n, f_w = count(faded), count(faded, won.astype(np.float64))
+        out = []
+        for t, team in enumerate(self.teams):
+            out.append({
+                "team": team, "games": int(games[t]),
+                "picked": int(p_n[t]), "picked_wins": int(p_w[t]),
+                "picked_win_pct": round(float(p_w[t] / p_n[t]), 4) if p_n[t] else None,
+                "picked_units": round(float(p_u[t]), 4), "picked_roi": round(float(p_u[t] / p_priced[t]), 4) if p_priced[t] else None,
+                "faded": int(f_n[t]), "faded_wins": int(f_w[t]),
+                "faded_win_pct": round(float(f_w[t] / f_n[t]), 4) if f_n[t] else None,
+            })
+        return out
+
+def _f(v) -> float:
+    return float(v) if v is not None else np.nan
+
+def _i(v) -> int:
+    return int(v) if v is not None else -1
+
+def build_columns(rows) -> tuple[dict[str, np.ndarray], list[str], list[str]]:
+    teams = sorted({r.home_abbr for r in rows} | {r.away_abbr for r in rows})
+    versions = sorted({r.model_version_snapshot for r in rows})
+    if len(teams) > 255 or len(versions) > 65535:
+        raise StoreError("too many distinct teams/model versions for the column widths")
+    team_code, version_code = {t: i for i, t in enumerate(teams)}, {v: i for i, v in enumerate(versions)}
+    n = len(rows)
+    cols = {k: np.empty(n, dtype=dt) for k, dt in COLUMNS.items() if k != "game_id"}
+    cols["game_id"] = np.frombuffer(b"".join(r.id.bytes for r in rows), dtype="u1").reshape(n, 16)
+    for i, r in enumerate(rows):
+        cols["day"][i] = (r.game_date - EPOCH).days
+        cols["start_ts"][i] = int(r.start_time_et.timestamp()) if r.start_time_et else -1
+        cols["home"][i], cols["away"][i] = team_code[r.home_abbr], team_code[r.away_abbr]
+        cols["model_version"][i] = version_code[r.model_version_snapshot]
+        cols["winner"][i] = {"HOME": 1, "AWAY": 0}.get(r.winner, -1)
+        cols["home_runs"][i], cols["away_runs"][i] = _i(r.actual_home_runs), _i(r.actual_away_runs)
+        for k in ("p_home_win", "confidence", "expected_total", "pred_home_runs", "pred_away_runs",
+                  "bet_home", "bet_away", "bet_line", "bet_over", "bet_under",
+                  "close_home", "close_away", "close_line", "close_over", "close_under"):
+            cols[k][i] = _f(getattr(r, k))
+    return cols, teams, versions
+
+class SeasonStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._open: dict[int, Season] = {}
+        self.opens = 0
+
+    def seasons(self) -> list[int]:
+        if not self.root.is_dir():
+            return []
+        return sorted(int(p.name) for p in self.root.iterdir() if p.name.isdigit() and (p / "meta.json").exists())
+
+    def get(self, season: int) -> Optional[Season]:
+        link = self.root / str(season)
+        if not (link / "meta.json").exists():
+            self._open.pop(season, None)
+            return None
+        target = link.resolve()
+        cur = self._open.get(season)
+        if cur is None or cur.path != target:
+            # First use, or the season was rewritten: map the new version (old maps stay valid until dropped)
+            cur = self._open[season] = self._map(season, target)
+            self.opens += 1
+        return cur
+
+    def _map(self, season: int, path: Path) -> Season:
+        meta = json.loads((path / "meta.json").read_text())
+        if meta.get("format") != FORMAT_VERSION:
+            raise StoreError(f"season {season}: unsupported format {meta.get('format')}")
+        cols = {name: np.load(path / f"{name}.npy", mmap_mode="r", allow_pickle=False) for name in meta["columns"]}
+        for name, arr in cols.items():
+            want = meta["columns"][name]
+            if len(arr) != meta["rows"] or list(arr.shape) != want["shape"] or arr.dtype.str != want["dtype"]:
+                raise StoreError(f"season {season}: column {name} is {arr.dtype.str}{list(arr.shape)}, expected {want['dtype']}{want['shape']}")
+            # Once per version per worker: reads the column through the page cache the maps share
+            if hashlib.sha256(arr.tobytes()).hexdigest() != want["sha256"]:
+                raise StoreError(f"season {season}: column {name} does not match its sha256")
+        return Season(season, path, meta["rows"], tuple(meta["teams"]), tuple(meta["model_versions"]), cols)
+
+    def write(self, season: int, cols: dict[str, np.ndarray], teams: list[str], versions: list[str]) -> Path:
+        """Write a new version of the season next to the old one, then swap the symlink."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{season}.{int(time.time() * 1000)}"
+        tmp = self.root / f".{path.name}.tmp"
+        tmp.mkdir()
+        try:
+            meta_cols = {}
+            for name in COLUMNS:
+                arr = np.ascontiguousarray(cols[name])
+                np.save(tmp / f"{name}.npy", arr, allow_pickle=False)
+                meta_cols[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "sha256": hashlib.sha256(arr.tobytes()).hexdigest()}
+            (tmp / "meta.json").write_text(json.dumps({
+                "format": FORMAT_VERSION, "season": season, "rows": int(len(cols["day"])),
+                "created_at": datetime.now(tz=timezone.utc).isoformat(), "teams": teams, "model_versions": versions,
+                "columns": meta_cols,
+            }, indent=1))
+            os.replace(tmp, path)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        link, tmp_link = self.root / str(season), self.root / f".{season}.link"
+        old = link.resolve() if link.is_symlink() else None
+        if tmp_link.is_symlink():
+            tmp_link.unlink()
+        tmp_link.symlink_to(path.name)
+        os.replace(tmp_link, link)
+        # Keep the version just replaced: a worker may have resolved the link but not loaded it yet.
+        # Anything older has had a whole write cycle to be reopened.
+        keep = {path.name, old.name if old is not None else None}
+        for p in self.root.glob(f"{season}.*"):
+            if p.is_dir() and p.name not in keep:
+                shutil.rmtree(p, ignore_errors=True)
+        return path
+
+    def stats(self) -> dict:
+        return {"seasons": self.seasons(), "mapped": sorted(self._open), "opens": self.opens}
+
+async def write_season(db: AsyncSession, store: SeasonStore, season: int) -> dict:
+    rows = (await db.execute(_SEASON_SQL, {"first": date(season, 1, 1), "last": date(season, 12, 31)})).all()
+    if not rows:
+        raise StoreError(f"no archived games in {season}")
+    cols, teams, versions = build_columns(rows)
+    path = store.write(season, cols, teams, versions)
+    return {
+        "season": season, "rows": len(rows), "settled": int((cols["winner"] >= 0).sum()), "teams": len(teams),
+        "bytes": sum(f.stat().st_size for f in path.iterdir()), "path": str(path),
+    }
+
+season_store = SeasonStore(settings.SEASON_STORE_DIR)
+
+async def _main(a: argparse.Namespace) -> None:
+    if a.cmd == "write":
+        if a.season >= date.today().year and not a.force:
+            raise SystemExit(f"season {a.season} may still be in progress; pass --force to snapshot it anyway")
+        from .db import SessionLocal
+        async with SessionLocal() as db:
+            print(json.dumps(await write_season(db, season_store, a.season)))
+    elif a.cmd == "list":
+        print(json.dumps([{"season": s, "rows": len(season_store.get(s)), "path": str(season_store.get(s).path)} for s in season_store.seasons()]))
+    else:
+        season = season_store.get(a.season)
+        if season is None:
+            sys.exit(f"season {a.season} is not stored")
+        print(json.dumps(season.team_splits(), indent=1))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Columnar snapshots of finished seasons")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("write")
+    w.add_argument("season", type=int)
+    w.add_argument("--force", action="store_true")
+    sub.add_parser("list")
+    s = sub.add_parser("splits")
+    s.add_argument("season", type=int)
+    asyncio.run(_main(ap.parse_args()))
@@ -0,0 +1,94 @@
+# api/app/slate.py
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from statistics import median_low
+from typing import Optional
+from zoneinfo import ZoneInfo
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .models import Game, OddsSnapshot, Prediction
+from .odds_index import odds_index
+
+ET = ZoneInfo("America/New_York")
+
+def today_et() -> date:
+    # games.game_date is the local (ET) calendar day
+    return datetime.now(tz=ET).date()
+
+@dataclass
+class SlateGame:
+    game_id: uuid.UUID
+    game_date: date
+    home: str
+    away: str
+    p_home_win: float
+    expected_total: Optional[float]
+    pred_home_runs: Optional[float]
+    pred_away_runs: Optional[float]
+    confidence: Optional[float]
+    # Best latest price across books (decimal); total line is the books' median, priced at books offering it
+    home_ml: Optional[float] = None
+    away_ml: Optional[float] = None
+    total_line: Optional[float] = None
+    over_price: Optional[float] = None
+    under_price: Optional[float] = None
+    books: list[str] = field(default_factory=list)
+
+def _f(v) -> Optional[float]:
+    return float(v) if v is not None else None
+
+def served_predictions() -> tuple:
+    # Shadow model versions are scored next to the served one but never shown
+    return (Prediction.model_version == settings.MODEL_VERSION,) if settings.MODEL_VERSION else ()
+
+async def load_slate(db: AsyncSession, day: date, with_odds: bool = True) -> list[SlateGame]:
+    """Latest prediction per game on `day`, optionally with the latest snapshot per (game, book) folded into best prices.
+    Prices come from the in-process odds index once it is warm, otherwise from odds_snapshots.
+    """
+    preds = (await db.execute(
+        select(Game.id, Game.game_date, Game.home_abbr, Game.away_abbr, Prediction.p_home_win, Prediction.expected_total,
+               Prediction.pred_home_runs, Prediction.pred_away_runs, Prediction.confidence)
+        .join(Prediction, Prediction.game_id == Game.id)
+        .where(Game.game_date == day, *served_predictions())
+        .order_by(Game.id, Prediction.created_at.desc())
+        .distinct(Game.id)
+    )).all()
+    slate = {
+        r.id: SlateGame(r.id, r.game_date, r.home_abbr, r.away_abbr, float(r.p_home_win), _f(r.expected_total),
+                        _f(r.pred_home_runs), _f(r.pred_away_runs), _f(r.confidence))
+        for r in preds
+    }
+    if not with_odds or not slate:
+        return list(slate.values())
+    if odds_index.ready:
+        by_game = {gid: odds_index.lines(gid) for gid in slate}
+    else:
+        snaps = (await db.execute(
+            select(OddsSnapshot)
+            .where(OddsSnapshot.game_id.in_(list(slate)))
+            .order_by(OddsSnapshot.game_id, OddsSnapshot.book, OddsSnapshot.ts.desc())
+            .distinct(OddsSnapshot.game_id, OddsSnapshot.book)
+        )).scalars().all()
+        by_game = {}
+        for s in snaps:
+            by_game.setdefault(s.game_id, []).append(s)
+    for gid, rows in by_game.items():
+        if rows:
+            _fold_prices(slate[gid], rows)
+    return list(slate.values())
+
+def _fold_prices(g: SlateGame, rows) -> None:
+    """Best price per side across the latest row of each book (OddsSnapshot rows or odds_index Lines)."""
+    g.books = [s.book for s in rows if s.book]
+    g.home_ml = max((float(s.home_ml_decimal) for s in rows if s.home_ml_decimal), default=None)
+    g.away_ml = max((float(s.away_ml_decimal) for s in rows if s.away_ml_decimal), default=None)
+    totals = [float(s.total) for s in rows if s.total is not None]
+    if totals:
+        g.total_line = median_low(totals)
+        at_line = [s for s in rows if s.total is not None and float(s.total) == g.total_line]
+        g.over_price = max((float(s.over_price_dec) for s in at_line if s.over_price_dec), default=None)
+        g.under_price = max((float(s.under_price_dec) for s in at_line if s.under_price_dec), default=None)
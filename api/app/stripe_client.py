@@ -1,15 +1,26 @@
 # api/app/stripe_client.py
+"""Stripe access for request handlers.
+
+StripeGateway talks to the Stripe REST API over one pooled keep-alive httpx.AsyncClient, so a call
+never blocks the event loop. Each call has its own timeout, latency is recorded per operation, and a
+circuit breaker fails fast (503) after repeated timeouts/5xx instead of tying up handlers while Stripe
+is degraded. The stripe SDK is still used for webhook signature checks, which are local.
+Point STRIPE_API_BASE at `python -m app.fake_stripe` for tests and benchmarks.
+"""
+from typing import Optional
+from urllib.parse import quote, urlencode
+import time
+
+import httpx
 import stripe
+from fastapi import HTTPException, status
+
 from .config import settings
+from .metrics import Histogram, registry
 
 if settings.STRIPE_SECRET_KEY:
     stripe.api_key = settings.STRIPE_SECRET_KEY
 
-try:
-    stripe.default_http_client = stripe.http_client.new_default_http_client(timeout=10)
-except Exception:
-    pass
-
 def ensure_configured():
     if not settings.STRIPE_SECRET_KEY:
         raise RuntimeError("Stripe not configured: STRIPE_SECRET_KEY missing")
@@ -26,3 +37,173 @@ def get_price_id(plan: str) -> str:
     if not pid:
         raise ValueError("Invalid plan")
     return pid
+
+class StripeAPIError(Exception):
+    """Stripe answered with a 4xx: the request itself was rejected."""
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+class StripeUnavailable(Exception):
+    """Timeout, transport error, 429/5xx, or the breaker is open."""
+
+def form_encode(params: dict, prefix: Optional[str] = None) -> list[tuple[str, str]]:
+    """Stripe's bracketed form encoding: {"line_items": [{"price": "p"}]} -> line_items[0][price]=p."""
+    out: list[tuple[str, str]] = []
+    items = params.items() if isinstance(params, dict) else enumerate(params)
+    for k, v in items:
+        key = f"{prefix}[{k}]" if prefix else str(k)
+        if v is None:
+            continue
+        if isinstance(v, (dict, list, tuple)):
+            out.extend(form_encode(v, key))
+        elif isinstance(v, bool):
+            out.append((key, "true" if v else "false"))
+        else:
+            out.append((key, str(v)))
+    return out
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `reset_after` seconds one probe call is let through."""
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            if self.opened_at is None or self.probing:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+class StripeGateway:
+    def __init__(self, base_url: str, timeout_s: float, max_connections: int, breaker: CircuitBreaker):
+        self.base_url = base_url.rstrip("/")
+        self.timeout_s = timeout_s
+        self.max_connections = max_connections
+        self.breaker = breaker
+        self._client: Optional[httpx.AsyncClient] = None
+        self.latency: dict[str, Histogram] = {}
+        self._latency_family = registry.histogram("stripe_call_duration_seconds", "Stripe API call latency", ("op",))
+        self.errors: dict[str, int] = {}
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout_s, connect=min(self.timeout_s, 3.0)),
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections, keepalive_expiry=60),
+                headers={"Stripe-Version": stripe.api_version} if getattr(stripe, "api_version", None) else None,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _call(self, op: str, method: str, path: str, params: dict, timeout_s: Optional[float] = None) -> dict:
+        if not self.breaker.allow():
+            raise StripeUnavailable("Stripe circuit open")
+        started = time.perf_counter()
+        encoded = form_encode(params)
+        headers = {"Authorization": f"Bearer {settings.STRIPE_SECRET_KEY}"}
+        if method != "GET":
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        try:
+            resp = await self._http().request(
+                method, path,
+                params=encoded if method == "GET" else None,
+                content=urlencode(encoded) if method != "GET" else None,
+                headers=headers,
+                timeout=timeout_s or self.timeout_s,
+            )
+        except httpx.HTTPError as e:
+            self._failed(op, started)
+            raise StripeUnavailable(f"{op}: {type(e).__name__}")
+        if resp.status_code == 429 or resp.status_code >= 500:
+            self._failed(op, started)
+            raise StripeUnavailable(f"{op}: HTTP {resp.status_code}")
+        # A 4xx means Stripe is healthy and rejected this request
+        self.breaker.record_success()
+        self._hist(op).observe(time.perf_counter() - started)
+        try:
+            body = resp.json()
+        except ValueError:
+            # e.g. an HTML error page from a proxy in front of Stripe
+            self.errors[op] = self.errors.get(op, 0) + 1
+            if resp.status_code >= 400:
+                raise StripeAPIError(resp.status_code, resp.text[:200] or f"HTTP {resp.status_code}")
+            raise StripeUnavailable(f"{op}: non-JSON response")
+        if resp.status_code >= 400:
+            self.errors[op] = self.errors.get(op, 0) + 1
+            error = body.get("error") if isinstance(body, dict) else None
+            raise StripeAPIError(resp.status_code, (error or {}).get("message") or f"HTTP {resp.status_code}")
+        return body
+
+    def _hist(self, op: str) -> Histogram:
+        h = self.latency.get(op)
+        if h is None:
+            h = self.latency[op] = self._latency_family.labels(op)
+        return h
+
+    def _failed(self, op: str, started: float) -> None:
+        self.breaker.record_failure()
+        self.errors[op] = self.errors.get(op, 0) + 1
+        self._hist(op).observe(time.perf_counter() - started)
+
+    async def create_checkout_session(self, **params) -> dict:
+        return await self._call("checkout.create", "POST", "/v1/checkout/sessions", params)
+
+    async def retrieve_checkout_session(self, session_id: str, expand: tuple[str, ...] = ()) -> dict:
+        return await self._call("checkout.retrieve", "GET", f"/v1/checkout/sessions/{quote(session_id, safe='')}", {"expand": list(expand)})
+
+    async def create_portal_session(self, **params) -> dict:
+        return await self._call("portal.create", "POST", "/v1/billing_portal/sessions", params)
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.state, "breaker_trips": self.breaker.trips, "breaker_rejected": self.breaker.rejected,
+            "errors": dict(self.errors), "latency_s": {op: h.snapshot() for op, h in self.latency.items()},
+        }
+
+def unavailable(e: StripeUnavailable) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Billing provider unavailable, please retry shortly",
+        headers={"Retry-After": str(max(1, int(settings.STRIPE_BREAKER_RESET_SECONDS)))},
+    )
+
+stripe_gateway = StripeGateway(
+    settings.STRIPE_API_BASE,
+    settings.STRIPE_TIMEOUT_SECONDS,
+    settings.STRIPE_MAX_CONNECTIONS,
+    CircuitBreaker(settings.STRIPE_BREAKER_FAILURES, settings.STRIPE_BREAKER_RESET_SECONDS),
+)
@@ -0,0 +1,193 @@
+# api/app/stripe_events.py
+"""Durable Stripe webhook inbox.
+
+The webhook verifies the signature, inserts the raw event into stripe_events (ON CONFLICT on the Stripe
+event id, so redeliveries are no-ops) and acks. StripeEventWorker drains pending rows in batches with
+FOR UPDATE SKIP LOCKED (safe with several API workers): events are mapped to subscription changes,
+coalesced so each user gets one upsert per batch (latest event wins), and marked processed in the
+same transaction. A batch that fails is retried row by row so one bad event can't block the rest;
+rows that keep failing stop being picked after STRIPE_EVENTS_MAX_ATTEMPTS.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+import asyncio, logging, uuid
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .audit import audit_log
+from .db import SessionLocal
+from .models import StripeEvent, Subscription
+from .principal_cache import principal_cache
+
+log = logging.getLogger(__name__)
+
+SUB_FIELDS = ("stripe_customer_id", "stripe_sub_id", "status", "current_period_end", "plan")
+
+async def enqueue(db: AsyncSession, event: dict) -> bool:
+    """Persist a verified event. Returns False for a redelivery of an event already stored."""
+    stmt = pg_insert(StripeEvent).values(
+        id=uuid.uuid4(), stripe_event_id=event.get("id"), type=event.get("type") or "unknown",
+        payload_json=event, received_at=datetime.now(tz=timezone.utc), attempts=0,
+    ).on_conflict_do_nothing(index_elements=[StripeEvent.stripe_event_id])
+    res = await db.execute(stmt)
+    await db.commit()
+    return res.rowcount > 0
+
+def subscription_change(event: dict) -> Optional[tuple[uuid.UUID, dict]]:
+    """(user_id, subscription values) for events that touch a subscription, else None."""
+    etype = event.get("type")
+    data = (event.get("data") or {}).get("object") or {}
+    if etype == "checkout.session.completed":
+        user_id, values = data.get("client_reference_id"), {
+            "stripe_customer_id": data.get("customer"), "stripe_sub_id": data.get("subscription"),
+            "status": "active", "current_period_end": None, "plan": None,
+        }
+    elif etype in ("customer.subscription.updated", "customer.subscription.created", "customer.subscription.deleted"):
+        cpe = data.get("current_period_end")
+        user_id, values = (data.get("metadata") or {}).get("user_id"), {
+            "stripe_customer_id": data.get("customer"), "stripe_sub_id": data.get("id"),
+            "status": data.get("status"),
+            "current_period_end": datetime.fromtimestamp(cpe, tz=timezone.utc) if cpe else None,
+            "plan": (data.get("items", {}).get("data", [{}])[0].get("plan", {}).get("interval") if data.get("items") else None),
+        }
+    else:
+        return None
+    if not user_id:
+        return None
+    try:
+        return uuid.UUID(str(user_id)), values
+    except ValueError:
+        log.warning("stripe event %s has a malformed user id %r", event.get("id"), user_id)
+        return None
+
+async def apply_events(db: AsyncSession, payloads: list[dict]) -> dict[uuid.UUID, dict]:
+    """Upsert one subscription row per affected user, the latest event (Stripe `created`) winning. Caller commits.
+    Returns the values written, by user.
+    """
+    latest: dict[uuid.UUID, tuple[int, int, dict]] = {}
+    for i, ev in enumerate(payloads):
+        change = subscription_change(ev)
+        if change is None:
+            continue
+        user_id, values = change
+        key = (ev.get("created") or 0, i)
+        if user_id not in latest or key >= latest[user_id][:2]:
+            latest[user_id] = (*key, values)
+    changes = {user_id: values for user_id, (_, _, values) in latest.items()}
+    await upsert_subscriptions(db, changes)
+    return changes
+
+async def upsert_subscriptions(db: AsyncSession, changes: dict[uuid.UUID, dict]) -> None:
+    """One INSERT .. ON CONFLICT (user_id) for all users. Caller commits."""
+    if not changes:
+        return
+    now = datetime.now(tz=timezone.utc)
+    stmt = pg_insert(Subscription).values([
+        {"id": uuid.uuid4(), "user_id": user_id, **values, "updated_at": now} for user_id, values in changes.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Subscription.user_id],
+        set_={**{f: stmt.excluded[f] for f in SUB_FIELDS}, "updated_at": stmt.excluded.updated_at},
+    )
+    await db.execute(stmt)
+
+def _audit(user_id: uuid.UUID, values: dict) -> None:
+    audit_log.record("stripe", "subscription.update", "subscription", user_id,
+                     {"status": values["status"], "plan": values["plan"], "stripe_sub_id": values["stripe_sub_id"]})
+
+class StripeEventWorker:
+    def __init__(self, batch_size: int, max_attempts: int):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.wake = asyncio.Event()
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+        self.upserts = 0
+
+    def notify(self) -> None:
+        # Same-process webhook: drain now instead of at the next poll
+        self.wake.set()
+
+    def _pending(self, limit: int):
+        return (
+            select(StripeEvent.id, StripeEvent.payload_json)
+            .where(StripeEvent.processed_at.is_(None), StripeEvent.attempts < self.max_attempts)
+            .order_by(StripeEvent.received_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+
+    async def drain_once(self) -> int:
+        async with SessionLocal() as db:
+            rows = (await db.execute(self._pending(self.batch_size))).all()
+            if not rows:
+                return 0
+            try:
+                users = await apply_events(db, [r.payload_json for r in rows])
+                await db.execute(
+                    update(StripeEvent).where(StripeEvent.id.in_([r.id for r in rows]))
+                    .values(processed_at=datetime.now(tz=timezone.utc))
+                )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                log.warning("stripe event batch of %d failed; retrying one by one", len(rows), exc_info=True)
+                return await self._drain_singly([r.id for r in rows])
+        self.batches += 1
+        self.processed += len(rows)
+        self.upserts += len(users)
+        for u, values in users.items():
+            principal_cache.invalidate(u)
+            _audit(u, values)
+        return len(rows)
+
+    async def _drain_singly(self, ids: list[uuid.UUID]) -> int:
+        done = 0
+        for event_id in ids:
+            async with SessionLocal() as db:
+                row = (await db.execute(self._pending(1).where(StripeEvent.id == event_id))).first()
+                if row is None:
+                    continue
+                try:
+                    users = await apply_events(db, [row.payload_json])
+                    await db.execute(update(StripeEvent).where(StripeEvent.id == event_id).values(processed_at=datetime.now(tz=timezone.utc)))
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    await db.execute(
+                        update(StripeEvent).where(StripeEvent.id == event_id)
+                        .values(attempts=StripeEvent.attempts + 1, last_error=str(e)[:2000])
+                    )
+                    await db.commit()
+                    self.failed += 1
+                    continue
+            done += 1
+            self.processed += 1
+            self.upserts += len(users)
+            for u, values in users.items():
+                principal_cache.invalidate(u)
+                _audit(u, values)
+        return done
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                # Keep going while batches come back full
+                while await self.drain_once() >= self.batch_size:
+                    pass
+            except Exception:
+                log.warning("stripe event drain failed", exc_info=True)
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+
+    def stats(self) -> dict:
+        return {"processed": self.processed, "failed": self.failed, "batches": self.batches, "upserts": self.upserts}
+
+stripe_event_worker = StripeEventWorker(settings.STRIPE_EVENTS_BATCH_SIZE, settings.STRIPE_EVENTS_MAX_ATTEMPTS)
@@ -0,0 +1,302 @@
+# api/app/team_features.py
+"""Incrementally maintained rolling team features (team_features) and the in-memory store that serves them.
+
+Each settled game is folded in exactly once (team_feature_inputs). Both teams' latest state takes the
+result in O(1): season and home/away counters add, and every last-N window adds the new game and drops
+the one sliding out of the ring of recent games. The new state is upserted as the team's row for that
+date. An outcome that lands behind a team's latest row replays that team from the game's date.
+
+Features for a game on day D are each team's latest row with as_of < D, so scoring a game never sees
+its own result.
+
+CLI:
+    python -m app.team_features apply-pending
+    python -m app.team_features rebuild          # wipe and re-apply every outcome
+    python -m app.team_features show NYY [2026-07-04]
+"""
+from bisect import bisect_left
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+import asyncio, json, logging, sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import SessionLocal
+
+log = logging.getLogger(__name__)
+
+WINDOWS = (5, 10, 20)
+RING = max(WINDOWS)
+_COUNTS = ("games", "wins", "runs_scored", "runs_allowed",
+           "home_games", "home_wins", "home_runs_scored", "home_runs_allowed",
+           "away_games", "away_wins", "away_runs_scored", "away_runs_allowed")
+_WINDOW_COLS = tuple(f"{k}_{n}" for n in WINDOWS for k in ("rs", "ra", "wins"))
+COLUMNS = ("team", "as_of", "season") + _COUNTS + _WINDOW_COLS + ("recent_scored", "recent_allowed", "recent_home")
+
+FEATURE_NAMES = (
+    "games", "win_pct", "runs_scored_pg", "runs_allowed_pg", "run_diff_pg",
+    "home_win_pct", "home_run_diff_pg", "away_win_pct", "away_run_diff_pg",
+) + tuple(f"{k}_{n}" for n in WINDOWS for k in ("win_pct", "runs_scored", "runs_allowed", "run_diff"))
+
+def _ratio(a: int, b: int) -> Optional[float]:
+    return round(a / b, 4) if b else None
+
+class TeamState:
+    """One team's rolling state after its games through as_of."""
+    __slots__ = ("team", "as_of", "season", "counts", "windows", "recent")
+
+    def __init__(self, team: str):
+        self.team = team
+        self.as_of: Optional[date] = None
+        self.season = 0
+        self.counts = [0] * len(_COUNTS)
+        self.windows = [[0, 0, 0] for _ in WINDOWS]     # runs scored, runs allowed, wins
+        self.recent: deque = deque(maxlen=RING)          # (scored, allowed, home), newest last
+
+    def apply(self, day: date, scored: int, allowed: int, home: bool) -> None:
+        if day.year != self.season:
+            self.season, self.counts = day.year, [0] * len(_COUNTS)
+        won = int(scored > allowed)
+        split = 4 if home else 8
+        for i, v in enumerate((1, won, scored, allowed)):
+            self.counts[i] += v
+            self.counts[split + i] += v
+        for w, n in zip(self.windows, WINDOWS):
+            if len(self.recent) >= n:
+                s, a, _ = self.recent[-n]
+                w[0] -= s
+                w[1] -= a
+                w[2] -= s > a
+            w[0] += scored
+            w[1] += allowed
+            w[2] += won
+        self.recent.append((scored, allowed, home))
+        self.as_of = day
+
+    def to_row(self) -> dict:
+        row = {"team": self.team, "as_of": self.as_of, "season": self.season, **dict(zip(_COUNTS, self.counts))}
+        for w, n in zip(self.windows, WINDOWS):
+            row.update({f"rs_{n}": w[0], f"ra_{n}": w[1], f"wins_{n}": w[2]})
+        row["recent_scored"] = [g[0] for g in self.recent]
+        row["recent_allowed"] = [g[1] for g in self.recent]
+        row["recent_home"] = [g[2] for g in self.recent]
+        return row
+
+    @classmethod
+    def from_row(cls, r) -> "TeamState":
+        st = cls(r.team)
+        st.as_of, st.season = r.as_of, r.season
+        st.counts = [getattr(r, c) for c in _COUNTS]
+        st.windows = [[getattr(r, f"rs_{n}"), getattr(r, f"ra_{n}"), getattr(r, f"wins_{n}")] for n in WINDOWS]
+        st.recent.extend(zip(r.recent_scored, r.recent_allowed, r.recent_home))
+        return st
+
+    def vector(self) -> tuple:
+        """Values in FEATURE_NAMES order; None where the denominator is still zero."""
+        games, wins, rs, ra, hg, hw, hrs, hra, ag, aw, ars, ara = self.counts
+        out = [games, _ratio(wins, games), _ratio(rs, games), _ratio(ra, games), _ratio(rs - ra, games),
+               _ratio(hw, hg), _ratio(hrs - hra, hg), _ratio(aw, ag), _ratio(ars - ara, ag)]
+        for (s, a, w), n in zip(self.windows, WINDOWS):
+            k = min(n, len(self.recent))
+            out += [_ratio(w, k), _ratio(s, k), _ratio(a, k), _ratio(s - a, k)]
+        return tuple(out)
+
+# Latest outcome row per game, settled games only
+_SETTLED = """
+SELECT DISTINCT ON (o.game_id) o.game_id, g.game_date, g.start_time_et, g.home_abbr, g.away_abbr,
+       o.actual_home_runs, o.actual_away_runs
+FROM outcomes o JOIN games g ON g.id = o.game_id
+WHERE o.actual_home_runs IS NOT NULL AND o.actual_away_runs IS NOT NULL
+"""
+
+_PENDING_SQL = text(f"""
+SELECT * FROM ({_SETTLED}
+  AND NOT EXISTS (SELECT 1 FROM team_feature_inputs i WHERE i.game_id = o.game_id)
+  ORDER BY o.game_id, o.closed_at DESC NULLS LAST) s
+ORDER BY game_date, start_time_et NULLS LAST, game_id
+""")
+
+# Only claimed games: anything settled after the pending read is left for the next pass
+_TEAM_GAMES_SQL = text(f"""
+SELECT * FROM ({_SETTLED}
+  AND (g.home_abbr = :team OR g.away_abbr = :team) AND g.game_date >= :since
+  AND EXISTS (SELECT 1 FROM team_feature_inputs i WHERE i.game_id = o.game_id)
+  ORDER BY o.game_id, o.closed_at DESC NULLS LAST) s
+ORDER BY game_date, start_time_et NULLS LAST, game_id
+""")
+
+_LATEST_SQL = text("SELECT DISTINCT ON (team) * FROM team_features WHERE team = ANY(:teams) ORDER BY team, as_of DESC")
+_BEFORE_SQL = text("SELECT * FROM team_features WHERE team = :team AND as_of < :since ORDER BY as_of DESC LIMIT 1")
+_CLAIM_SQL = text("INSERT INTO team_feature_inputs (game_id) VALUES (:game_id) ON CONFLICT (game_id) DO NOTHING")
+_UPSERT_SQL = text(
+    f"INSERT INTO team_features ({', '.join(COLUMNS)}, updated_at) "
+    f"VALUES ({', '.join(':' + c for c in COLUMNS)}, clock_timestamp()) "
+    f"ON CONFLICT (team, as_of) DO UPDATE SET {', '.join(f'{c} = EXCLUDED.{c}' for c in COLUMNS[2:])}, "
+    "updated_at = clock_timestamp()"
+)
+
+def _sides(g) -> tuple:
+    home, away = int(g.actual_home_runs), int(g.actual_away_runs)
+    return (g.home_abbr, home, away, True), (g.away_abbr, away, home, False)
+
+async def _replay(db: AsyncSession, team: str, since: date) -> int:
+    prev = (await db.execute(_BEFORE_SQL, {"team": team, "since": since})).first()
+    st = TeamState.from_row(prev) if prev else TeamState(team)
+    rows: dict[date, dict] = {}
+    for g in (await db.execute(_TEAM_GAMES_SQL, {"team": team, "since": since})).all():
+        side = next(s for s in _sides(g) if s[0] == team)
+        st.apply(g.game_date, side[1], side[2], side[3])
+        rows[st.as_of] = st.to_row()
+    if rows:
+        await db.execute(_UPSERT_SQL, list(rows.values()))
+    log.info("replayed team features for %s from %s (%d day(s))", team, since, len(rows))
+    return len(rows)
+
+async def apply_pending(db: AsyncSession, wait: bool = True) -> int:
+    """Fold every settled, unapplied game into both teams' rows, in game order, in one transaction.
+    With wait=False, returns 0 at once if another process is already applying.
+    """
+    if wait:
+        await db.execute(text("SELECT pg_advisory_xact_lock(hashtext('team_features'))"))
+    elif not (await db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('team_features'))"))).scalar():
+        await db.rollback()
+        return 0
+    games = (await db.execute(_PENDING_SQL)).all()
+    if not games:
+        await db.commit()
+        return 0
+    teams = sorted({g.home_abbr for g in games} | {g.away_abbr for g in games})
+    states = {r.team: TeamState.from_row(r) for r in (await db.execute(_LATEST_SQL, {"teams": teams})).all()}
+    rows: dict[tuple, dict] = {}
+    replay: dict[str, date] = {}
+    for g in games:
+        for team, scored, allowed, home in _sides(g):
+            st = states.setdefault(team, TeamState(team))
+            if team in replay or (st.as_of is not None and g.game_date < st.as_of):
+                # Late outcome: rebuild this team's rows from here once the batch is claimed
+                replay[team] = min(replay.get(team, g.game_date), g.game_date)
+                continue
+            st.apply(g.game_date, scored, allowed, home)
+            rows[(team, st.as_of)] = st.to_row()
+    if rows:
+        await db.execute(_UPSERT_SQL, list(rows.values()))
+    await db.execute(_CLAIM_SQL, [{"game_id": g.game_id} for g in games])
+    for team, since in replay.items():
+        await _replay(db, team, since)
+    await db.commit()
+    return len(games)
+
+async def rebuild(db: AsyncSession) -> int:
+    await db.execute(text("DELETE FROM team_features"))
+    await db.execute(text("DELETE FROM team_feature_inputs"))
+    return await apply_pending(db)
+
+class TeamFeatureStore:
+    """Every team_features row as a FEATURE_NAMES tuple, per team in date order.
+    Refreshes pull only rows whose updated_at moved; lookups are a bisect on one team's dates.
+    """
+    OVERLAP = timedelta(minutes=5)     # re-read margin for writers that committed late
+
+    def __init__(self):
+        self.teams: dict[str, tuple[list[date], list[tuple]]] = {}
+        self.version: Optional[datetime] = None
+        self.loaded_at: Optional[datetime] = None
+        self.rows = 0
+        self.refreshes = 0
+        self.applied = 0
+        self.wake = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def notify(self) -> None:
+        # An outcome landed: apply and refresh now instead of at the next poll
+        self.wake.set()
+
+    def before(self, team: str, day: date) -> Optional[tuple]:
+        """The team's features going into a game on `day` (its latest row with as_of < day)."""
+        series = self.teams.get(team)
+        if not series:
+            return None
+        i = bisect_left(series[0], day)
+        return series[1][i - 1] if i else None
+
+    def lookup(self, team: str, day: Optional[date] = None) -> Optional[dict]:
+        series = self.teams.get(team)
+        if not series:
+            return None
+        i = bisect_left(series[0], day) if day else len(series[0])
+        if not i:
+            return None
+        return {"team": team, "as_of": series[0][i - 1].isoformat(), **dict(zip(FEATURE_NAMES, series[1][i - 1]))}
+
+    def _put(self, st: TeamState) -> None:
+        dates, vecs = self.teams.setdefault(st.team, ([], []))
+        i = bisect_left(dates, st.as_of)
+        if i < len(dates) and dates[i] == st.as_of:
+            vecs[i] = st.vector()
+        else:
+            dates.insert(i, st.as_of)
+            vecs.insert(i, st.vector())
+            self.rows += 1
+
+    async def refresh(self, db: Optional[AsyncSession] = None) -> int:
+        if db is None:
+            async with SessionLocal() as db:
+                return await self.refresh(db)
+        version = (await db.execute(text("SELECT max(updated_at) FROM team_features"))).scalar()
+        if self.ready and version == self.version:
+            return 0
+        if self.version is None or version is None or version < self.version:
+            q, params = "SELECT * FROM team_features ORDER BY team, as_of", {}
+            self.teams, self.rows = {}, 0
+        else:
+            q, params = "SELECT * FROM team_features WHERE updated_at > :since ORDER BY team, as_of", {"since": self.version - self.OVERLAP}
+        rows = (await db.execute(text(q), params)).all()
+        for r in rows:
+            self._put(TeamState.from_row(r))
+        self.version = version
+        self.loaded_at = datetime.now(tz=timezone.utc)
+        self.refreshes += 1
+        return len(rows)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                async with SessionLocal() as db:
+                    self.applied += await apply_pending(db, wait=False)
+                    await self.refresh(db)
+            except Exception:
+                log.warning("team feature refresh failed", exc_info=True)
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+
+    def stats(self) -> dict:
+        return {
+            "teams": len(self.teams), "rows": self.rows, "refreshes": self.refreshes, "applied": self.applied,
+            "version": self.version.isoformat() if self.version else None,
+        }
+
+team_feature_store = TeamFeatureStore()
+
+async def _main(argv: list[str]) -> None:
+    cmd = argv[0] if argv else "apply-pending"
+    async with SessionLocal() as db:
+        if cmd == "apply-pending":
+            print(f"applied {await apply_pending(db)} outcome(s)")
+        elif cmd == "rebuild":
+            print(f"rebuilt from {await rebuild(db)} outcome(s)")
+        elif cmd == "show" and len(argv) in (2, 3):
+            await team_feature_store.refresh(db)
+            print(json.dumps(team_feature_store.lookup(argv[1], date.fromisoformat(argv[2]) if len(argv) == 3 else None)))
+        else:
+            raise SystemExit(__doc__)
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1:]))
@@ -0,0 +1,14 @@
+-- 0003_history_keyset_indexes.sql
+-- Supports /v1/predictions/history keyset pagination on (game_date, prediction_archive.id)
+
+-- Range scan over games in date order (from_date/to_date + cursor on game_date)
+CREATE INDEX IF NOT EXISTS games_game_date_id_idx
+  ON games (game_date, id);
+
+-- Archive rows for a game, already in cursor tie-break order
+CREATE INDEX IF NOT EXISTS prediction_archive_game_id_id_idx
+  ON prediction_archive (game_id, id);
+
+-- Outcome lookup per game for the LEFT JOIN
+CREATE INDEX IF NOT EXISTS outcomes_game_id_idx
+  ON outcomes (game_id);
@@ -0,0 +1,19 @@
+-- 0004_accuracy_rollup_counters.sql
+-- Additive counters so a new outcome adjusts the windows it falls in without rescanning history.
+-- The ratio columns (win_pct, roi_pct, avg_confidence) are derived from these on every update.
+
+ALTER TABLE accuracy_rollups
+  ADD COLUMN IF NOT EXISTS n_wins INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS n_priced INTEGER NOT NULL DEFAULT 0,          -- picks with a closing price (ROI denominator)
+  ADD COLUMN IF NOT EXISTS profit_units NUMERIC NOT NULL DEFAULT 0,      -- 1-unit flat stake at the closing price
+  ADD COLUMN IF NOT EXISTS n_confidence INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS confidence_sum NUMERIC NOT NULL DEFAULT 0;
+
+-- One row per game whose outcome has been folded into the rollups; makes apply idempotent.
+CREATE TABLE IF NOT EXISTS accuracy_rollup_inputs (
+  game_id UUID PRIMARY KEY REFERENCES games(id) ON DELETE CASCADE,
+  applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS odds_snapshots_game_id_ts_idx
+  ON odds_snapshots (game_id, ts);
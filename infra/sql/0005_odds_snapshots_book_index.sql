@@ -0,0 +1,4 @@
+-- 0005_odds_snapshots_book_index.sql
+-- Latest snapshot per (game, book): dedup warm-up in app.odds_ingest and latest-line lookups
+CREATE INDEX IF NOT EXISTS odds_snapshots_game_book_ts_idx
+  ON odds_snapshots (game_id, book, ts DESC);
@@ -0,0 +1,28 @@
+-- 0007_prediction_archive_chain.sql
+-- Explicit chain order for prediction_archive.sha256_chain plus periodic checkpoints,
+-- so the chain can be verified in independent segments.
+
+ALTER TABLE prediction_archive
+  ADD COLUMN IF NOT EXISTS chain_seq BIGINT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS prediction_archive_chain_seq_key
+  ON prediction_archive (chain_seq);
+
+-- Chain hash after row `seq`; a verifier can start a segment from any checkpoint.
+CREATE TABLE IF NOT EXISTS archive_checkpoints (
+  seq BIGINT PRIMARY KEY,
+  sha256_chain TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Checkpoints are as append-only as the archive they vouch for
+CREATE OR REPLACE FUNCTION deny_mutations() RETURNS trigger AS $$
+BEGIN
+  RAISE EXCEPTION '% is append-only', TG_TABLE_NAME;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS archive_checkpoints_no_update ON archive_checkpoints;
+CREATE TRIGGER archive_checkpoints_no_update
+BEFORE UPDATE OR DELETE ON archive_checkpoints
+FOR EACH ROW EXECUTE FUNCTION deny_mutations();
@@ -0,0 +1,24 @@
+-- 0008_stripe_event_queue.sql
+-- stripe_events becomes a durable inbox: the webhook inserts and acks, a worker drains it.
+
+ALTER TABLE stripe_events
+  ADD COLUMN IF NOT EXISTS stripe_event_id TEXT,
+  ADD COLUMN IF NOT EXISTS received_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS last_error TEXT;
+
+-- Stripe redelivers; one row per event id
+CREATE UNIQUE INDEX IF NOT EXISTS stripe_events_event_id_key
+  ON stripe_events (stripe_event_id);
+
+CREATE INDEX IF NOT EXISTS stripe_events_pending_idx
+  ON stripe_events (received_at) WHERE processed_at IS NULL;
+
+-- One subscription row per user (the API already assumes it); lets the worker upsert with ON CONFLICT
+DELETE FROM subscriptions s
+USING subscriptions newer
+WHERE newer.user_id = s.user_id
+  AND (newer.updated_at, newer.id) > (s.updated_at, s.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS subscriptions_user_id_key
+  ON subscriptions (user_id);
@@ -0,0 +1,35 @@
+-- 0009_data_versions.sql
+-- Monotonic per-table data versions, bumped by statement-level triggers whenever published data changes.
+-- API workers poll this tiny table to key their response caches.
+
+CREATE TABLE IF NOT EXISTS data_versions (
+  name TEXT PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO data_versions (name) VALUES ('games'), ('predictions'), ('prediction_archive'), ('outcomes')
+ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$
+BEGIN
+  UPDATE data_versions SET version = version + 1, updated_at = now() WHERE name = TG_ARGV[0];
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS games_data_version ON games;
+CREATE TRIGGER games_data_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON games
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('games');
+
+DROP TRIGGER IF EXISTS predictions_data_version ON predictions;
+CREATE TRIGGER predictions_data_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON predictions
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('predictions');
+
+DROP TRIGGER IF EXISTS prediction_archive_data_version ON prediction_archive;
+CREATE TRIGGER prediction_archive_data_version AFTER INSERT ON prediction_archive
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('prediction_archive');
+
+DROP TRIGGER IF EXISTS outcomes_data_version ON outcomes;
+CREATE TRIGGER outcomes_data_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON outcomes
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('outcomes');
@@ -0,0 +1,39 @@
+-- 0010_live_notify.sql
+-- NOTIFY predictiq_live once per statement (not per row) with the distinct game ids touched,
+-- chunked to stay under the 8000-byte payload limit. API workers LISTEN and fan out to SSE clients.
+
+CREATE OR REPLACE FUNCTION notify_live_event() RETURNS trigger AS $$
+DECLARE
+  ids TEXT[];
+  chunk CONSTANT INT := 100;
+BEGIN
+  SELECT array_agg(DISTINCT game_id::text) INTO ids FROM new_rows;
+  IF ids IS NULL THEN
+    RETURN NULL;
+  END IF;
+  FOR i IN 0 .. (array_length(ids, 1) - 1) / chunk LOOP
+    PERFORM pg_notify('predictiq_live', json_build_object(
+      'kind', TG_ARGV[0], 'game_ids', ids[i * chunk + 1 : (i + 1) * chunk]
+    )::text);
+  END LOOP;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS predictions_live ON predictions;
+CREATE TRIGGER predictions_live AFTER INSERT ON predictions
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_live_event('prediction');
+
+-- Transition tables allow one event per trigger
+DROP TRIGGER IF EXISTS outcomes_live_insert ON outcomes;
+CREATE TRIGGER outcomes_live_insert AFTER INSERT ON outcomes
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_live_event('outcome');
+
+DROP TRIGGER IF EXISTS outcomes_live_update ON outcomes;
+CREATE TRIGGER outcomes_live_update AFTER UPDATE ON outcomes
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_live_event('outcome');
+
+-- Fires once per COPY batch from the odds ingestor
+DROP TRIGGER IF EXISTS odds_snapshots_live ON odds_snapshots;
+CREATE TRIGGER odds_snapshots_live AFTER INSERT ON odds_snapshots
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_live_event('odds');
@@ -0,0 +1,42 @@
+-- 0011_team_features.sql
+-- Rolling team features for model inputs, one row per (team, date the team played): the team's state
+-- after that day's games. Features for a game on day D are the team's latest row with as_of < D.
+-- The recent_* arrays (newest last, up to 20 games) let the next outcome slide every window in O(1)
+-- without rereading history.
+
+CREATE TABLE IF NOT EXISTS team_features (
+  team TEXT NOT NULL,
+  as_of DATE NOT NULL,
+  season INTEGER NOT NULL,
+  -- season to date; reset on the first game of a new season
+  games INTEGER NOT NULL,
+  wins INTEGER NOT NULL,
+  runs_scored INTEGER NOT NULL,
+  runs_allowed INTEGER NOT NULL,
+  home_games INTEGER NOT NULL,
+  home_wins INTEGER NOT NULL,
+  home_runs_scored INTEGER NOT NULL,
+  home_runs_allowed INTEGER NOT NULL,
+  away_games INTEGER NOT NULL,
+  away_wins INTEGER NOT NULL,
+  away_runs_scored INTEGER NOT NULL,
+  away_runs_allowed INTEGER NOT NULL,
+  -- last N games, carried across seasons; the window size is min(N, cardinality(recent_scored))
+  rs_5 INTEGER NOT NULL, ra_5 INTEGER NOT NULL, wins_5 INTEGER NOT NULL,
+  rs_10 INTEGER NOT NULL, ra_10 INTEGER NOT NULL, wins_10 INTEGER NOT NULL,
+  rs_20 INTEGER NOT NULL, ra_20 INTEGER NOT NULL, wins_20 INTEGER NOT NULL,
+  recent_scored SMALLINT[] NOT NULL,
+  recent_allowed SMALLINT[] NOT NULL,
+  recent_home BOOLEAN[] NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (team, as_of)
+);
+
+-- In-memory readers pick up changes incrementally by watermark
+CREATE INDEX IF NOT EXISTS team_features_updated_at_idx ON team_features (updated_at);
+
+-- One row per game folded into team_features; makes apply idempotent.
+CREATE TABLE IF NOT EXISTS team_feature_inputs (
+  game_id UUID PRIMARY KEY REFERENCES games(id) ON DELETE CASCADE,
+  applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
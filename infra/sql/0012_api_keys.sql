@@ -0,0 +1,14 @@
+-- 0012_api_keys.sql
+-- API keys for programmatic clients. Only the SHA-256 of a key is stored; `prefix` is the first few
+-- characters, kept so users can tell their keys apart in listings.
+-- request_count/last_used_at are flushed from each worker's in-memory counters, so they lag by up to
+-- API_KEY_INDEX_POLL_SECONDS.
+
+ALTER TABLE api_keys
+  ADD COLUMN IF NOT EXISTS name TEXT,
+  ADD COLUMN IF NOT EXISTS prefix TEXT,
+  ADD COLUMN IF NOT EXISTS request_count BIGINT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS last_used_at TIMESTAMPTZ;
+
+CREATE UNIQUE INDEX IF NOT EXISTS api_keys_token_hash_idx ON api_keys (token_hash);
+CREATE INDEX IF NOT EXISTS api_keys_user_id_idx ON api_keys (user_id);
@@ -0,0 +1,34 @@
+-- 0013_parlay_settlement.sql
+-- Saved parlays are graded in bulk as outcomes land (app/parlays.py).
+-- Parlay status: 'draft' (legacy default), 'open' (saved, waiting on legs), then 'won' | 'lost' | 'void'.
+-- payout_cents is the amount returned: stake x the product of winning leg prices. Pushed/void legs drop
+-- out at 1.0, so an all-push parlay returns the stake.
+
+ALTER TABLE parlays
+  ADD COLUMN IF NOT EXISTS source TEXT,                    -- 'build' | 'evaluate'
+  ADD COLUMN IF NOT EXISTS settled_at TIMESTAMPTZ,
+  ADD COLUMN IF NOT EXISTS payout_cents INTEGER,
+  ADD COLUMN IF NOT EXISTS pnl_cents INTEGER;
+
+ALTER TABLE parlay_legs
+  ADD COLUMN IF NOT EXISTS result TEXT CHECK (result IN ('won','lost','push','void')),
+  ADD COLUMN IF NOT EXISTS settled_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS parlays_user_created_idx ON parlays (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS parlay_legs_parlay_id_idx ON parlay_legs (parlay_id);
+-- Only ungraded legs, so finding the games to settle stays small however much history accumulates
+CREATE INDEX IF NOT EXISTS parlay_legs_open_game_idx ON parlay_legs (game_id) WHERE result IS NULL;
+
+-- Realized P&L per user and settlement day, added to in the same statement that settles the parlays
+CREATE TABLE IF NOT EXISTS parlay_pnl (
+  user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  day DATE NOT NULL,
+  n_settled INTEGER NOT NULL DEFAULT 0,
+  n_won INTEGER NOT NULL DEFAULT 0,
+  n_lost INTEGER NOT NULL DEFAULT 0,
+  n_void INTEGER NOT NULL DEFAULT 0,
+  staked_cents BIGINT NOT NULL DEFAULT 0,
+  pnl_cents BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (user_id, day)
+);
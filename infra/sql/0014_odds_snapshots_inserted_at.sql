@@ -0,0 +1,14 @@
+-- 0014_odds_snapshots_inserted_at.sql
+-- Insert time of each snapshot, for the odds index's incremental sync. `ts` is the feed's timestamp, and a book
+-- whose feed lags the newest ts by more than the lookback was never picked up by a ts watermark.
+-- Added without a default first so existing rows are not rewritten (they stay NULL; the index warm loads them
+-- by game date), then defaulted to clock_timestamp() so each row of a long COPY gets its own time.
+
+ALTER TABLE odds_snapshots ADD COLUMN IF NOT EXISTS inserted_at TIMESTAMPTZ;
+ALTER TABLE odds_snapshots ALTER COLUMN inserted_at SET DEFAULT clock_timestamp();
+
+CREATE INDEX IF NOT EXISTS odds_snapshots_inserted_at_idx
+  ON odds_snapshots (inserted_at);
+
+-- The ts index was only for the old watermark sync; it was one more index on the busiest insert path
+DROP INDEX IF EXISTS odds_snapshots_ts_idx;
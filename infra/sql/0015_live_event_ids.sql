@@ -0,0 +1,23 @@
+-- 0015_live_event_ids.sql
+-- SSE event ids shared by every API worker: each live notification carries the next value of one
+-- sequence, so a client's Last-Event-ID means the same thing on any worker and across restarts.
+
+CREATE SEQUENCE IF NOT EXISTS live_event_seq;
+
+CREATE OR REPLACE FUNCTION notify_live_event() RETURNS trigger AS $$
+DECLARE
+  ids TEXT[];
+  chunk CONSTANT INT := 100;
+BEGIN
+  SELECT array_agg(DISTINCT game_id::text) INTO ids FROM new_rows;
+  IF ids IS NULL THEN
+    RETURN NULL;
+  END IF;
+  FOR i IN 0 .. (array_length(ids, 1) - 1) / chunk LOOP
+    PERFORM pg_notify('predictiq_live', json_build_object(
+      'id', nextval('live_event_seq'), 'kind', TG_ARGV[0], 'game_ids', ids[i * chunk + 1 : (i + 1) * chunk]
+    )::text);
+  END LOOP;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,7 @@
+-- 0016_parlay_payout_bigint.sql
+-- A long parlay at real odds returns more than 2^31 cents on a large stake; an INTEGER overflow there would
+-- fail the settle statement for every parlay in the run.
+
+ALTER TABLE parlays
+  ALTER COLUMN payout_cents TYPE BIGINT,
+  ALTER COLUMN pnl_cents TYPE BIGINT;
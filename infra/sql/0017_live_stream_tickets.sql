@@ -0,0 +1,12 @@
+-- 0017_live_stream_tickets.sql
+-- Single-use tickets for the live SSE stream. EventSource can't send headers, so the browser puts a ticket
+-- in the URL instead of its session token; the stream deletes it on use and it expires after
+-- LIVE_TICKET_SECONDS, so a URL that lands in an access log is worthless. Only the SHA-256 is stored.
+
+CREATE TABLE IF NOT EXISTS live_stream_tickets (
+  ticket_hash TEXT PRIMARY KEY,
+  user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS live_stream_tickets_expires_at_idx ON live_stream_tickets (expires_at);
@@ -2,7 +2,7 @@
 "use client";
 
 import { useEffect, useState } from "react";
-import { fetchTodaysPredictions, getToken } from "@/lib/api";
+import { fetchTodaysPredictions, getToken, subscribeLive } from "@/lib/api";
 import { useRouter } from "next/navigation";
 import RequirePro from "@/components/RequirePro";
 
@@ -10,7 +10,10 @@ function DashboardInner(){
   const [data,setData]=useState<any[]|null>(null);
   const [error,setError]=useState<string|null>(null);
   useEffect(()=>{
-    fetchTodaysPredictions().then(setData).catch((err:any)=>setError(err?.response?.data?.detail||"Failed to load predictions"));
+    const load=()=>fetchTodaysPredictions().then(setData).catch((err:any)=>setError(err?.response?.data?.detail||"Failed to load predictions"));
+    load();
+    // New predictions or a missed-notification resync: refetch (the response is cached server-side)
+    return subscribeLive(load, ["prediction"]);
   },[]);
   return (
     <main className="p-8 max-w-5xl mx-auto">
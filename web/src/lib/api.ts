@@ -72,3 +72,44 @@ export async function syncCheckout(session_id: string) {
   const res = await api.post(`/v1/billing/sync-checkout?session_id=${encodeURIComponent(session_id)}`);
   return res.data;
 }
+
+// ---------- Live (server-sent events) ----------
+export type LiveKind = "prediction" | "odds" | "outcome";
+export type LiveEvent = { kind: LiveKind | "resync"; ts: number; game_ids?: string[]; best?: Record<string, unknown> };
+
+// Replaces polling: refetch only when the server says something changed. EventSource can't send
+// headers, so each connection opens with a single-use ticket (never the session token) in the URL. A spent
+// ticket fails the browser's own reconnect, so on close we fetch a new one and resume from the last event id.
+export function subscribeLive(onEvent: (e: LiveEvent) => void, kinds: LiveKind[] = ["prediction", "odds", "outcome"]): () => void {
+  let es: EventSource | null = null;
+  let lastId: string | null = null;
+  let closed = false;
+  let timer: ReturnType<typeof setTimeout> | undefined;
+  const handler = (ev: MessageEvent) => {
+    if (ev.lastEventId) lastId = ev.lastEventId;
+    onEvent(JSON.parse(ev.data));
+  };
+  const open = async () => {
+    try {
+      const { ticket } = (await api.post("/v1/live/ticket")).data;
+      if (closed) return;
+      const params = new URLSearchParams({ kinds: kinds.join(","), ticket });
+      if (lastId) params.set("last_event", lastId);
+      es = new EventSource(`${API_URL}/v1/live/stream?${params}`);
+      for (const k of [...kinds, "resync"]) es.addEventListener(k, handler as EventListener);
+      es.onerror = () => {
+        if (es?.readyState !== EventSource.CLOSED) return;
+        es = null;
+        if (!closed) timer = setTimeout(open, 3000);
+      };
+    } catch {
+      if (!closed) timer = setTimeout(open, 3000);
+    }
+  };
+  open();
+  return () => {
+    closed = true;
+    clearTimeout(timer);
+    es?.close();
+  };
+}